@@ -7,6 +7,9 @@ See help text for details.
 import os
 import subprocess
 import sys
+import tempfile
+import threading
+import time
 
 save_dir_path = sys.path.pop(0)
 
@@ -120,6 +123,27 @@ parser.add_argument(
     "--mch_class", default="obmc", help=mch_class_help_text + default_string
 )
 
+parser.add_argument(
+    "--max_parallel",
+    default=int(os.environ.get("PLUG_IN_MAX_PARALLEL", 1)),
+    type=int,
+    help="The maximum number of call point programs to run concurrently.  If"
+    + " this value is greater than 1, call point programs are run"
+    + " concurrently except where a plug-in package directory contains a"
+    + ' "run_after" file listing the names of plug-ins whose call point'
+    + " programs must complete before its own is started.  The output of"
+    + " each call point program is printed as a block when it completes"
+    + " followed by a summary of the elapsed time of each.  The"
+    + " failed_plug_in_name and shell_rc values printed last are those of"
+    + " the last call point program to return a non-zero shell_rc, if any."
+    + "  If a stop condition (see stop_on_plug_in_failure and"
+    + " stop_on_non_zero_rc) is met, no further call point programs are"
+    + " started but those already running are allowed to complete.  This"
+    + " value defaults to the PLUG_IN_MAX_PARALLEL environment variable or"
+    + " to 1."
+    + default_string,
+)
+
 # Populate stock_list with options we want.
 stock_list = [("test_mode", 0), ("quiet", 1), ("debug", 0)]
 
@@ -132,6 +156,7 @@ def validate_parms():
     """
 
     valid_value(call_point)
+    valid_integer(max_parallel, lower=1)
 
     global allow_shell_rc
     valid_integer(allow_shell_rc)
@@ -141,7 +166,7 @@ def validate_parms():
     set_pgm_arg(allow_shell_rc)
 
 
-def run_pgm(plug_in_dir_path, call_point, allow_shell_rc):
+def run_pgm(plug_in_dir_path, call_point, allow_shell_rc, output=None):
     r"""
     Run the call point program in the given plug_in_dir_path.  Return the following:
     rc                              The return code - 0 = PASS, 1 = FAIL.
@@ -158,6 +183,9 @@ def run_pgm(plug_in_dir_path, call_point, allow_shell_rc):
                                     means that for each plug-in call point that runs, a 0x00000200 will not
                                     be counted as a failure.  See note above regarding left-shifting of
                                     return codes.
+    output                          A list to which all output (including that of the call point program) is
+                                    to be appended rather than printed.  This allows call point programs to
+                                    be run concurrently without their output being interleaved.
     """
 
     rc = 0
@@ -171,12 +199,21 @@ def run_pgm(plug_in_dir_path, call_point, allow_shell_rc):
         # No such call point in this plug in dir path.  This is legal so we return 0, etc.
         return rc, shell_rc, failed_plug_in_name
 
-    print(
+    if output is None:
+        emit = gp_print
+    else:
+        emit = output.append
+
+    emit(
         "------------------------------------------------- Starting plug-"
-        + "in -----------------------------------------------"
+        + "in -----------------------------------------------\n"
     )
 
-    print_timen("Running " + plug_in_name + "/" + cp_prefix + call_point + ".")
+    emit(
+        sprint_timen(
+            "Running " + plug_in_name + "/" + cp_prefix + call_point + "."
+        )
+    )
 
     stdout = 1 - quiet
     if AUTOBOOT_OPENBMC_NICKNAME != "":
@@ -193,7 +230,7 @@ def run_pgm(plug_in_dir_path, call_point, allow_shell_rc):
         )
         status_dir_path = AUTOBOOT_EXECDIR + "logs/"
         if not os.path.exists(status_dir_path):
-            os.makedirs(status_dir_path)
+            os.makedirs(status_dir_path, exist_ok=True)
     status_file_name = (
         auto_status_file_prefix + "." + file_date_time_stamp() + ".status"
     )
@@ -210,15 +247,32 @@ def run_pgm(plug_in_dir_path, call_point, allow_shell_rc):
     )
 
     cmd_buf = "PATH=" + plug_in_dir_path.rstrip("/") + ":${PATH}"
-    print_issuing(cmd_buf)
-    os.environ["PATH"] = (
-        plug_in_dir_path.rstrip("/") + os.pathsep + original_path
-    )
+    emit(sprint_issuing(cmd_buf))
+    env = dict(os.environ)
+    env["PATH"] = plug_in_dir_path.rstrip("/") + os.pathsep + original_path
     cmd_buf = auto_status_file_subcmd + cp_prefix + call_point
-    print_issuing(cmd_buf)
+    emit(sprint_issuing(cmd_buf))
 
-    sub_proc = subprocess.Popen(cmd_buf, shell=True)
-    sub_proc.communicate()
+    start_time = time.time()
+    if output is None:
+        os.environ["PATH"] = env["PATH"]
+        sub_proc = subprocess.Popen(cmd_buf, shell=True)
+        sub_proc.communicate()
+    else:
+        # The PATH is passed via env rather than set in os.environ since other threads may be starting call
+        # point programs for other plug-ins.
+        with tempfile.TemporaryFile() as out_file:
+            sub_proc = subprocess.Popen(
+                cmd_buf,
+                shell=True,
+                env=env,
+                stdout=out_file,
+                stderr=subprocess.STDOUT,
+            )
+            sub_proc.communicate()
+            out_file.seek(0)
+            emit(out_file.read().decode("utf-8", errors="replace"))
+    elapsed_time = time.time() - start_time
     shell_rc = sub_proc.returncode
     # Shift to left.
     shell_rc *= 0x100
@@ -229,21 +283,191 @@ def run_pgm(plug_in_dir_path, call_point, allow_shell_rc):
         failed_plug_in_name = plug_in_name + "/" + cp_prefix + call_point
     if failed_plug_in_name != "" and not stdout:
         # Use tail to avoid double-printing of status_file_url.
-        shell_cmd(
+        _, out_buf = shell_cmd(
             "tail -n +2 " + status_dir_path + status_file_name,
             quiet=1,
-            print_output=1,
+            print_output=output is None,
         )
+        if output is not None:
+            emit(out_buf)
 
-    print(
+    emit(
         "------------------------------------------------- Ending plug-in"
-        + " -------------------------------------------------"
+        + " -------------------------------------------------\n"
+    )
+    emit(sprint_timen("Elapsed time: %.2f seconds." % elapsed_time))
+    if failed_plug_in_name != "":
+        emit(sprint_var(failed_plug_in_name))
+    emit(sprint_var(shell_rc, hexa()))
+
+    return rc, shell_rc, failed_plug_in_name
+
+
+def get_plug_in_run_order(plug_in_packages_list, call_point):
+    r"""
+    Return a list of the plug-in directory paths which have the call point program and a dictionary mapping
+    each of them to a list of the plug-in directory paths which must be run before it.
+
+    Plug-ins are ordered by name so that the order in which they are started is repeatable.  Ordering is
+    declared via each plug-in's "run_after" file (see return_plug_in_run_after_list).  This function exits
+    with an error if the declared ordering is circular.
+
+    Description of arguments:
+    plug_in_packages_list           A list of plug-in directory paths.
+    call_point                      The call point (e.g. "setup").
+    """
+
+    plug_in_paths = {}
+    for plug_in_dir_path in plug_in_packages_list:
+        if os.path.exists(plug_in_dir_path + "cp_" + call_point):
+            plug_in_name = os.path.basename(os.path.normpath(plug_in_dir_path))
+            plug_in_paths[plug_in_name] = plug_in_dir_path
+
+    run_list = [plug_in_paths[name] for name in sorted(plug_in_paths)]
+    run_after = {}
+    for plug_in_dir_path in run_list:
+        run_after[plug_in_dir_path] = [
+            plug_in_paths[name]
+            for name in return_plug_in_run_after_list(plug_in_dir_path)
+            if name in plug_in_paths
+            and plug_in_paths[name] != plug_in_dir_path
+        ]
+
+    # Check for circular ordering by repeatedly removing plug-ins whose predecessors have all been removed.
+    remaining = list(run_list)
+    removed = set()
+    while remaining:
+        ready = [
+            path
+            for path in remaining
+            if all(x in removed for x in run_after[path])
+        ]
+        if not ready:
+            print_error_report(
+                "The run_after files of the following plug-ins specify"
+                + " circular ordering:\n"
+                + sprint_var(remaining)
+            )
+            exit(1)
+        removed.update(ready)
+        remaining = [path for path in remaining if path not in removed]
+
+    return run_list, run_after
+
+
+def run_pgms_parallel(plug_in_packages_list, call_point, allow_shell_rc):
+    r"""
+    Run the call point programs of the given plug-ins concurrently (up to max_parallel at a time) honoring
+    any ordering declared by the plug-ins.  Return the following:
+    rc                              The return code - 0 = PASS, 1 = FAIL.
+    shell_rc                        The last non-zero shell return code of any call point program (or 0).
+    failed_plug_in_name             The plug-in name which corresponds to shell_rc (if any).
+
+    Description of arguments:
+    plug_in_packages_list           A list of plug-in directory paths.
+    call_point                      See run_pgm for details.
+    allow_shell_rc                  See run_pgm for details.
+    """
+
+    run_list, run_after = get_plug_in_run_order(
+        plug_in_packages_list, call_point
     )
+
+    ret_code = 0
+    shell_rc = 0
+    failed_plug_in_name = ""
+    stop = False
+    lock = threading.Lock()
+    condition = threading.Condition(lock)
+    # Each entry is [plug_in_dir_path, start_time, elapsed_time, rc, shell_rc] in start order.
+    timings = []
+    results = []
+    pending = list(run_list)
+    done = set()
+    running = set()
+
+    def run_one(plug_in_dir_path, timing):
+        output = []
+        try:
+            result = run_pgm(
+                plug_in_dir_path, call_point, allow_shell_rc, output
+            )
+        except Exception as e:
+            output.append(sprint_error(str(e) + "\n"))
+            result = (1, 0, "")
+        with condition:
+            timing[2] = time.time() - timing[1]
+            results.append((plug_in_dir_path, result, output))
+            condition.notify()
+
+    with condition:
+        while pending or running:
+            if not stop:
+                for plug_in_dir_path in list(pending):
+                    if len(running) >= max_parallel:
+                        break
+                    if not all(x in done for x in run_after[plug_in_dir_path]):
+                        continue
+                    pending.remove(plug_in_dir_path)
+                    running.add(plug_in_dir_path)
+                    timing = [plug_in_dir_path, time.time(), 0.0, 0, 0]
+                    timings.append(timing)
+                    thread = threading.Thread(
+                        target=run_one, args=(plug_in_dir_path, timing)
+                    )
+                    thread.daemon = True
+                    thread.start()
+            if not running:
+                break
+            while not results:
+                condition.wait()
+            plug_in_dir_path, result, output = results.pop(0)
+            running.remove(plug_in_dir_path)
+            done.add(plug_in_dir_path)
+            gp_print(replace_passwords("".join(output)))
+            rc, loc_shell_rc, loc_failed_plug_in_name = result
+            for timing in timings:
+                if timing[0] == plug_in_dir_path:
+                    timing[3:] = [rc, loc_shell_rc]
+            if loc_shell_rc != 0:
+                shell_rc = loc_shell_rc
+                failed_plug_in_name = loc_failed_plug_in_name
+            if rc != 0:
+                ret_code = 1
+                if stop_on_plug_in_failure:
+                    stop = True
+            if loc_shell_rc != 0 and stop_on_non_zero_rc and not stop:
+                qprint_time(
+                    "Stopping on non-zero shell return code as requested"
+                    + " by caller.\n"
+                )
+                stop = True
+
+    print_timen("Call point program elapsed times:")
+    for (
+        plug_in_dir_path,
+        start_time,
+        elapsed_time,
+        rc,
+        loc_shell_rc,
+    ) in timings:
+        plug_in_name = os.path.basename(os.path.normpath(plug_in_dir_path))
+        gp_print(
+            "  %-40s %8.2f seconds  rc: %d  shell_rc: 0x%08x\n"
+            % (
+                plug_in_name + "/cp_" + call_point,
+                elapsed_time,
+                rc,
+                loc_shell_rc,
+            )
+        )
+    if pending:
+        qprint_var(pending)
     if failed_plug_in_name != "":
         print_var(failed_plug_in_name)
     print_var(shell_rc, hexa())
 
-    return rc, shell_rc, failed_plug_in_name
+    return ret_code, shell_rc, failed_plug_in_name
 
 
 def main():
@@ -257,6 +481,7 @@ def main():
     global allow_shell_rc
     global stop_on_plug_in_failure
     global stop_on_non_zero_rc
+    global max_parallel
 
     plug_in_packages_list = return_plug_in_packages_list(
         plug_in_dir_paths, mch_class
@@ -272,6 +497,15 @@ def main():
     global AUTOBOOT_OPENBMC_NICKNAME
     AUTOBOOT_OPENBMC_NICKNAME = os.environ.get("AUTOBOOT_OPENBMC_NICKNAME", "")
 
+    if max_parallel > 1:
+        ret_code, shell_rc, failed_plug_in_name = run_pgms_parallel(
+            plug_in_packages_list, call_point, allow_shell_rc
+        )
+        if ret_code != 0:
+            print_error("At least one plug-in failed.\n")
+            exit(1)
+        return
+
     ret_code = 0
     for plug_in_dir_path in plug_in_packages_list:
         rc, shell_rc, failed_plug_in_name = run_pgm(
@@ -4,20 +4,20 @@ r"""
 CLI FFDC Collector.
 """
 
+import json
+import multiprocessing
 import os
 import sys
+import time
 
 import click
+import yaml
 
 # ---------Set sys.path for cli command execution---------------------------------------
 # Absolute path to openbmc-test-automation/ffdc
 abs_path = os.path.abspath(os.path.dirname(sys.argv[0]))
-full_path = abs_path.split("ffdc")[0]
-sys.path.append(full_path)
-# Walk path and append to sys.path
-for root, dirs, files in os.walk(full_path):
-    for found_dir in dirs:
-        sys.path.append(os.path.join(root, found_dir))
+# ffdc_collector sets up the path for its own lib and plugins directories.
+sys.path.append(abs_path)
 
 from ffdc_collector import ffdc_collector  # NOQA
 
@@ -82,6 +82,39 @@ from ffdc_collector import ffdc_collector  # NOQA
     show_default=True,
     help="Log level (CRITICAL, ERROR, WARNING, INFO, DEBUG)",
 )
+@click.option(
+    "-cp",
+    "--command_parallelism",
+    default=1,
+    show_default=True,
+    help="Max number of independent SSH commands to run at once.",
+)
+@click.option(
+    "-a",
+    "--archive",
+    type=click.Choice(["gz", "zst", "tar"]),
+    help="Store FFDC in a single archive with the given compression.",
+)
+@click.option(
+    "-bt",
+    "--bulk_transfer",
+    type=click.Choice(["none", "tar", "gz"]),
+    default="none",
+    show_default=True,
+    help="Copy files with one remote tar command (gz: compressed).",
+)
+@click.option(
+    "-i",
+    "--inventory",
+    help="YAML list of hosts to collect FFDC from in parallel.",
+)
+@click.option(
+    "-mh",
+    "--max_hosts",
+    default=8,
+    show_default=True,
+    help="Max number of hosts in the inventory to collect from at once.",
+)
 def cli_ffdc(
     remote,
     username,
@@ -96,6 +129,11 @@ def cli_ffdc(
     env_vars,
     econfig,
     log_level,
+    command_parallelism,
+    archive,
+    bulk_transfer,
+    inventory,
+    max_hosts,
 ):
     r"""
     Stand alone CLI to generate and collect FFDC from the selected target.
@@ -105,7 +143,30 @@ def cli_ffdc(
         "\n********** FFDC (First Failure Data Collection) Starts **********"
     )
 
-    if input_options_ok(
+    if inventory:
+        collect_fleet_ffdc(
+            inventory,
+            max_hosts,
+            {
+                "remote": remote,
+                "username": username,
+                "password": password,
+                "port_ssh": port_ssh,
+                "port_https": port_https,
+                "port_ipmi": port_ipmi,
+                "config": config,
+                "location": location,
+                "type": type,
+                "protocol": protocol,
+                "env_vars": env_vars,
+                "econfig": econfig,
+                "log_level": log_level,
+                "command_parallelism": command_parallelism,
+                "archive": archive,
+                "bulk_transfer": bulk_transfer,
+            },
+        )
+    elif input_options_ok(
         remote,
         username,
         password,
@@ -129,10 +190,25 @@ def cli_ffdc(
             env_vars,
             econfig,
             log_level,
+            command_parallelism,
+            archive,
+            bulk_transfer,
         )
         this_ffdc.collect_ffdc()
 
-        if len(os.listdir(this_ffdc.ffdc_dir_path)) == 0:
+        if this_ffdc.ffdc_archive:
+            click.echo(
+                str(
+                    "\n\t"
+                    + str(len(this_ffdc.ffdc_archive.index))
+                    + " files were retrieved from "
+                    + remote
+                )
+            )
+            click.echo(
+                "\tFiles are stored in " + this_ffdc.ffdc_archive.archive_path
+            )
+        elif len(os.listdir(this_ffdc.ffdc_dir_path)) == 0:
             click.echo(
                 "\n\tFFDC Collection from " + remote + " has failed.\n\n"
             )
@@ -151,6 +227,183 @@ def cli_ffdc(
     click.echo("\n********** FFDC Finishes **********\n\n")
 
 
+def collect_host_ffdc(host_parms):
+    r"""
+    Collect FFDC from one inventory host and return a summary dictionary.
+
+    This runs in a worker process.  The host's console output is written to
+    console.log in the host's own directory (host_dir) under the location.
+
+    Description of argument(s):
+    host_parms      Dictionary of cli_ffdc options for the host.
+    """
+
+    remote = host_parms["remote"]
+    location = os.path.join(host_parms["location"], host_parms["host_dir"])
+    summary = {
+        "remote": remote,
+        "status": "FAIL",
+        "elapsed": 0.0,
+        "location": location,
+        "files": 0,
+        "error": "",
+    }
+    start_time = time.time()
+    os.makedirs(location, exist_ok=True)
+    with open(os.path.join(location, "console.log"), "w") as console:
+        sys.stdout = sys.stderr = console
+        try:
+            this_ffdc = ffdc_collector(
+                remote,
+                host_parms["username"],
+                host_parms["password"],
+                host_parms["port_ssh"],
+                host_parms["port_https"],
+                host_parms["port_ipmi"],
+                host_parms["config"],
+                location,
+                host_parms["type"],
+                host_parms["protocol"],
+                host_parms["env_vars"],
+                host_parms["econfig"],
+                host_parms["log_level"],
+                host_parms["command_parallelism"],
+                host_parms["archive"],
+                host_parms["bulk_transfer"],
+            )
+            this_ffdc.collect_ffdc()
+            if this_ffdc.ffdc_archive:
+                summary["location"] = this_ffdc.ffdc_archive.archive_path
+                summary["files"] = len(this_ffdc.ffdc_archive.index)
+            else:
+                summary["location"] = this_ffdc.ffdc_dir_path
+                # Do not count the collector's own log.
+                summary["files"] = len(os.listdir(this_ffdc.ffdc_dir_path)) - 1
+            if summary["files"] > 0:
+                summary["status"] = "PASS"
+            else:
+                summary["error"] = "No FFDC files were collected."
+        except SystemExit:
+            summary["error"] = "FFDC collection aborted. See console.log."
+        except Exception as e:
+            summary["error"] = "%s: %s" % (e.__class__.__name__, e)
+        finally:
+            sys.stdout.flush()
+            sys.stdout = sys.__stdout__
+            sys.stderr = sys.__stderr__
+    summary["elapsed"] = round(time.time() - start_time, 3)
+    return summary
+
+
+def collect_fleet_ffdc(inventory, max_hosts, default_parms):
+    r"""
+    Collect FFDC from every host in the inventory file, max_hosts at a time,
+    and write a JSON summary file to the location.
+
+    The inventory file is a YAML list.  Each entry is either a host name or
+    a dictionary with key "remote" plus any cli_ffdc options (e.g. username,
+    password, type, port_ssh) which differ from the command line values.
+
+    Example:
+        - bmc1
+        - remote: bmc2
+          password: 0penBmc1
+
+    Description of argument(s):
+    inventory       Path of the YAML inventory file.
+    max_hosts       Max number of hosts to collect from at once.
+    default_parms   Dictionary of cli_ffdc options used for every host unless
+                    overridden in the inventory.
+    """
+
+    with open(inventory, "r") as file:
+        host_list = yaml.load(file, Loader=yaml.SafeLoader) or []
+
+    host_parms_list = []
+    for host in host_list:
+        host_parms = dict(default_parms)
+        if isinstance(host, dict):
+            host_parms.update(host)
+        else:
+            host_parms["remote"] = str(host)
+        # Give each host its own directory, even if the same host name is
+        # listed more than once (e.g. with different ports).
+        host_parms["host_dir"] = host_parms["remote"]
+        host_dir_list = [parms["host_dir"] for parms in host_parms_list]
+        if host_parms["host_dir"] in host_dir_list:
+            host_parms["host_dir"] += "_%d" % len(host_parms_list)
+        if input_options_ok(
+            host_parms["remote"],
+            host_parms["username"],
+            host_parms["password"],
+            host_parms["port_ssh"],
+            host_parms["port_https"],
+            host_parms["port_ipmi"],
+            host_parms["config"],
+            host_parms["type"],
+        ):
+            host_parms_list.append(host_parms)
+        else:
+            click.echo("\tSkipping inventory entry: %s" % host)
+
+    total = len(host_parms_list)
+    click.echo(
+        "\n\tCollecting FFDC from %d hosts, %d at a time.\n"
+        % (total, max_hosts)
+    )
+    start_time = time.time()
+    summary_list = []
+    # Each host runs in a fresh process since ffdc_collector keeps plugin
+    # state and logging handlers at module level.
+    with multiprocessing.Pool(
+        max(1, min(int(max_hosts), total or 1)), maxtasksperchild=1
+    ) as pool:
+        for summary in pool.imap_unordered(collect_host_ffdc, host_parms_list):
+            summary_list.append(summary)
+            click.echo(
+                "\t[%*d/%d] %-5s %-30s %8.1fs  %s"
+                % (
+                    len(str(total)),
+                    len(summary_list),
+                    total,
+                    summary["status"],
+                    summary["remote"],
+                    summary["elapsed"],
+                    summary["error"] or summary["location"],
+                )
+            )
+
+    failed_list = [s["remote"] for s in summary_list if s["status"] != "PASS"]
+    fleet_summary = {
+        "inventory": inventory,
+        "elapsed": round(time.time() - start_time, 3),
+        "hosts": len(summary_list),
+        "passed": len(summary_list) - len(failed_list),
+        "failed": failed_list,
+        "host_summary": sorted(summary_list, key=lambda s: s["remote"]),
+    }
+    os.makedirs(default_parms["location"], exist_ok=True)
+    summary_file_path = os.path.join(
+        default_parms["location"],
+        "ffdc_fleet_summary_" + time.strftime("%Y%m%d-%H%M%S") + ".json",
+    )
+    with open(summary_file_path, "w") as fp:
+        json.dump(fleet_summary, fp, indent=4)
+
+    click.echo(
+        "\n\tFFDC collected from %d of %d hosts."
+        % (fleet_summary["passed"], total)
+    )
+    if failed_list:
+        click.echo("\tFailed hosts: " + " ".join(failed_list))
+    click.echo("\tSummary is stored in " + summary_file_path)
+    click.echo(
+        "\tTotal elapsed time "
+        + time.strftime("%H:%M:%S", time.gmtime(fleet_summary["elapsed"]))
+        + "\n\n"
+    )
+
+
 def input_options_ok(
     remote, username, password, port_ssh, port_https, port_ipmi, config, type
 ):
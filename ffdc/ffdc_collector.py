@@ -4,6 +4,7 @@ r"""
 See class prolog below for details.
 """
 
+import importlib
 import json
 import logging
 import os
@@ -18,18 +19,26 @@ import yaml
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(script_dir)
-# Walk path and append to sys.path
-for root, dirs, files in os.walk(script_dir):
-    for dir in dirs:
-        sys.path.append(os.path.join(root, dir))
+# ssh_utility, telnet_utility, etc. are in ./lib
+sys.path.append(os.path.join(script_dir, "lib"))
 
+from ffdc_archive import FFDCArchive  # NOQA
 from ssh_utility import SSHRemoteclient  # NOQA
 from telnet_utility import TelnetRemoteclient  # NOQA
 
+# secret_redactor is shared with the robot libraries in ../lib.  It is
+# optional so that this directory can still be used on its own.
+sys.path.append(os.path.join(script_dir, "..", "lib"))
+try:
+    import secret_redactor
+except ImportError:
+    secret_redactor = None
+
 r"""
 User define plugins python functions.
 
-It will imports files from directory plugins
+Plugin modules are in directory plugins and each is imported the first time
+one of its functions is called from YAML.
 
 plugins
 ├── file1.py
@@ -44,21 +53,40 @@ Example how to define in YAML:
 """
 plugin_dir = __file__.split(__file__.split("/")[-1])[0] + "/plugins"
 sys.path.append(plugin_dir)
-try:
-    for module in os.listdir(plugin_dir):
-        if module == "__init__.py" or module[-3:] != ".py":
-            continue
-        plugin_module = "plugins." + module[:-3]
-        # To access the module plugin.<module name>.<function>
-        # Example: plugin.foo_func.foo_func_yaml()
-        try:
-            plugin = __import__(plugin_module, globals(), locals(), [], 0)
-        except Exception as e:
-            print("PLUGIN: Module import failed: %s" % module)
-            pass
-except FileNotFoundError as e:
-    print("PLUGIN: %s" % e)
-    pass
+
+# Plugin functions already resolved from their YAML plugin_name.
+# Example: {"plugin.foo_func.foo_func_yaml": <function foo_func_yaml>}
+plugin_function_dict = {}
+
+
+def get_plugin_function(plugin_name):
+    r"""
+    Return the function for a YAML plugin_name, importing the plugin module
+    on first use.
+
+    Description of argument(s):
+    plugin_name        plugin.<module>.<function> or
+                       plugin.<module>.<class>.<function>
+    """
+    try:
+        return plugin_function_dict[plugin_name]
+    except KeyError:
+        pass
+
+    name_list = plugin_name.strip().split(".")
+    if len(name_list) < 3 or name_list[0] != "plugin":
+        raise NameError("Invalid plugin name: %s" % plugin_name)
+    try:
+        plugin_func = importlib.import_module("plugins." + name_list[1])
+    except ImportError:
+        print("PLUGIN: Module import failed: %s.py" % name_list[1])
+        raise
+    for name in name_list[2:]:
+        plugin_func = getattr(plugin_func, name)
+
+    plugin_function_dict[plugin_name] = plugin_func
+    return plugin_func
+
 
 r"""
 This is for plugin functions returning data or responses to the caller
@@ -93,7 +121,7 @@ global_plugin_dict = {}
 global_plugin_list = []
 
 # Hold the plugin return named declared if function returned values are list,dict.
-# Refer this name list to look up the plugin dict for eval() args function
+# Refer this name list to look up the plugin dict for plugin function args
 # Example ['version']
 global_plugin_type_list = []
 
@@ -129,6 +157,9 @@ class ffdc_collector:
         env_vars,
         econfig,
         log_level,
+        command_parallelism=1,
+        archive_compression=None,
+        bulk_transfer="none",
     ):
         r"""
         Description of argument(s):
@@ -145,12 +176,22 @@ class ffdc_collector:
         remote_protocol     Protocol to use to collect data
         env_vars            User define CLI env vars '{"key : "value"}'
         econfig             User define env vars YAML file
+        command_parallelism Max number of independent SSH commands to run
+                            at once.  By default 1 (serial)
+        archive_compression Store collected FFDC in a single archive
+                            compressed with "gz", "zst" or "tar" (no
+                            compression).  By default None (separate files)
+        bulk_transfer       Copy files with a single remote tar command
+                            rather than one scp per file: "tar" or "gz"
+                            (compressed).  By default "none" (scp)
 
         """
 
         self.hostname = hostname
         self.username = username
         self.password = password
+        if secret_redactor is not None:
+            secret_redactor.register_secrets(password)
         self.port_ssh = str(port_ssh)
         self.port_https = str(port_https)
         self.port_ipmi = str(port_ipmi)
@@ -167,6 +208,10 @@ class ffdc_collector:
         self.start_time = 0
         self.elapsed_time = ""
         self.logger = None
+        self.command_parallelism = int(command_parallelism)
+        self.archive_compression = archive_compression
+        self.ffdc_archive = None
+        self.bulk_transfer = bulk_transfer
 
         # Set prefix values for scp files and directory.
         # Since the time stamp is at second granularity, these values are set here
@@ -263,6 +308,10 @@ class ffdc_collector:
         )
 
         stdout_handler = logging.StreamHandler(sys.stdout)
+        if secret_redactor is not None:
+            # Keep registered passwords out of collector.log and the console.
+            log_file_handler.addFilter(secret_redactor.redaction_filter())
+            stdout_handler.addFilter(secret_redactor.redaction_filter())
         self.logger.addHandler(log_file_handler)
         self.logger.addHandler(stdout_handler)
 
@@ -414,6 +463,15 @@ class ffdc_collector:
 
             self.logger.info("\n\tFFDC Path: %s " % self.ffdc_dir_path)
             global_plugin_dict["global_log_store_path"] = self.ffdc_dir_path
+            if self.archive_compression:
+                self.ffdc_archive = FFDCArchive(
+                    self.ffdc_dir_path.rstrip("/"),
+                    self.archive_compression,
+                    self.logger,
+                )
+                self.logger.info(
+                    "\tFFDC Archive: %s" % self.ffdc_archive.archive_path
+                )
             self.logger.info("\tSystem Type: %s" % target_type)
             for k, v in config_dict[target_type].items():
                 if (
@@ -444,6 +502,8 @@ class ffdc_collector:
                         % (protocol, self.hostname)
                     )
 
+        self.close_ffdc_archive()
+
         # Close network connection after collecting all files
         self.elapsed_time = time.strftime(
             "%H:%M:%S", time.gmtime(time.time() - self.start_time)
@@ -502,14 +562,8 @@ class ffdc_collector:
                     self.logger.warning(
                         "\t[WARN] Data will be stored in %s." % targ_file
                     )
-                targ_file_with_path = (
-                    self.ffdc_dir_path + self.ffdc_prefix + targ_file
-                )
-                # Creates a new file
-                with open(targ_file_with_path, "w") as fp:
-                    fp.write(result)
-                    fp.close
-                    telnet_files_saved.append(targ_file)
+                self.save_ffdc_data(targ_file, result, command_txt)
+                telnet_files_saved.append(targ_file)
             progress_counter += 1
             self.print_progress(progress_counter)
         self.logger.info("\n\t[Run] Commands execution completed.\t\t [OK]")
@@ -560,40 +614,35 @@ class ffdc_collector:
             else:
                 each_cmd = self.yaml_env_and_plugin_vars_populate(each_cmd)
 
-            if not plugin_call:
-                result = self.run_tool_cmd(each_cmd)
-            if result:
-                try:
-                    file_name = self.get_file_list(
-                        self.ffdc_actions[target_type][sub_type]
-                    )[index]
+            if not plugin_call and self.ffdc_archive:
+                # Stream the command output straight into the archive.
+                targ_file = self.get_execute_targ_file(
+                    target_type, sub_type, index, each_cmd
+                )
+                if targ_file is None:
+                    self.run_tool_cmd(each_cmd)
+                    continue
+                if self.ffdc_archive.add_command_output(
+                    self.ffdc_prefix + targ_file, each_cmd
+                ):
+                    executed_files_saved.append(targ_file)
+            else:
+                start_time = time.time()
+                if not plugin_call:
+                    result = self.run_tool_cmd(each_cmd)
+                if result:
+                    targ_file = self.get_execute_targ_file(
+                        target_type, sub_type, index, each_cmd
+                    )
                     # If file is specified as None.
-                    if file_name == "None":
+                    if targ_file is None:
                         continue
-                    targ_file = self.yaml_env_and_plugin_vars_populate(
-                        file_name
-                    )
-                except IndexError:
-                    targ_file = each_cmd.split("/")[-1]
-                    self.logger.warning(
-                        "\n\t[WARN] Missing filename to store data from %s."
-                        % each_cmd
+                    self.save_ffdc_data(
+                        targ_file,
+                        result,
+                        str(each_cmd),
+                        time.time() - start_time,
                     )
-                    self.logger.warning(
-                        "\t[WARN] Data will be stored in %s." % targ_file
-                    )
-
-                targ_file_with_path = (
-                    self.ffdc_dir_path + self.ffdc_prefix + targ_file
-                )
-
-                # Creates a new file
-                with open(targ_file_with_path, "w") as fp:
-                    if isinstance(result, dict):
-                        fp.write(json.dumps(result))
-                    else:
-                        fp.write(result)
-                    fp.close
                     executed_files_saved.append(targ_file)
 
             progress_counter += 1
@@ -604,6 +653,98 @@ class ffdc_collector:
         for file in executed_files_saved:
             self.logger.info("\n\t\tSuccessfully save file " + file + ".")
 
+    def get_execute_targ_file(self, target_type, sub_type, index, each_cmd):
+        r"""
+        Return the name of the file to store the result of a command in or
+        None if the file is specified as None.
+
+        Description of argument(s):
+        target_type         OS Type of remote host.
+        sub_type            Group type of commands.
+        index               Index of the command in the command list.
+        each_cmd            The command.
+        """
+
+        try:
+            file_name = self.get_file_list(
+                self.ffdc_actions[target_type][sub_type]
+            )[index]
+            # If file is specified as None.
+            if file_name == "None":
+                return None
+            targ_file = self.yaml_env_and_plugin_vars_populate(file_name)
+        except IndexError:
+            targ_file = each_cmd.split("/")[-1]
+            self.logger.warning(
+                "\n\t[WARN] Missing filename to store data from %s." % each_cmd
+            )
+            self.logger.warning(
+                "\t[WARN] Data will be stored in %s." % targ_file
+            )
+        return targ_file
+
+    def save_ffdc_data(self, targ_file, result, command="", elapsed=0.0):
+        r"""
+        Save a command result either in the FFDC archive or in a new file in
+        self.ffdc_dir_path.
+
+        Description of argument(s):
+        targ_file           File name (without prefix) to store the result in.
+        result              String or dictionary (written as JSON) result.
+        command             The command which produced the result.
+        elapsed             Seconds taken by the command.
+        """
+
+        if self.ffdc_archive:
+            self.ffdc_archive.add_data(
+                self.ffdc_prefix + targ_file, result, command, elapsed
+            )
+            return
+
+        targ_file_with_path = self.ffdc_dir_path + self.ffdc_prefix + targ_file
+
+        # Creates a new file
+        with open(targ_file_with_path, "w") as fp:
+            if isinstance(result, dict):
+                fp.write(json.dumps(result))
+            else:
+                fp.write(result)
+
+    def archive_ffdc_files(self, command="", elapsed=0.0):
+        r"""
+        Move the files collected in self.ffdc_dir_path into the FFDC archive.
+
+        collector.log is left in place since it is still being written.
+
+        Description of argument(s):
+        command             The command which produced the files.
+        elapsed             Seconds taken by the command.
+        """
+
+        if not self.ffdc_archive:
+            return
+        for entry in sorted(os.listdir(self.ffdc_dir_path)):
+            if entry == "collector.log":
+                continue
+            self.ffdc_archive.add_path(
+                self.ffdc_dir_path + entry, command=command, elapsed=elapsed
+            )
+
+    def close_ffdc_archive(self):
+        r"""
+        Archive any remaining collected files (e.g. those written directly by
+        plugins) and close the FFDC archive.
+        """
+
+        if not self.ffdc_archive:
+            return
+        self.archive_ffdc_files()
+        self.ffdc_archive.close()
+        self.logger.info(
+            "\n\tFFDC Archive: %s (%d files)"
+            % (self.ffdc_archive.archive_path, len(self.ffdc_archive.index))
+        )
+
     def collect_and_copy_ffdc(
         self, ffdc_actions_for_target_type, form_filename=False
     ):
@@ -704,33 +845,90 @@ class ffdc_collector:
         if not list_of_commands:
             return
 
-        progress_counter = 0
+        command_list = []
         for command in list_of_commands:
             command_txt, command_timeout = self.unpack_command(command)
 
             if form_filename:
                 command_txt = str(command_txt % self.target_type)
 
-            (
+            command_list.append((command_txt, command_timeout))
+
+        if self.command_parallelism > 1:
+            command_batches = self.group_independent_commands(command_list)
+        else:
+            command_batches = [[command] for command in command_list]
+
+        progress_counter = 0
+        for command_batch in command_batches:
+            if len(command_batch) == 1:
+                results = [
+                    self.ssh_remoteclient.execute_command(*command_batch[0])
+                ]
+            else:
+                results = self.ssh_remoteclient.execute_command_list(
+                    command_batch, self.command_parallelism
+                )
+
+            for (command_txt, command_timeout), (
                 cmd_exit_code,
                 err,
                 response,
-            ) = self.ssh_remoteclient.execute_command(
-                command_txt, command_timeout
-            )
-
-            if cmd_exit_code:
-                self.logger.warning(
-                    "\n\t\t[WARN] %s exits with code %s."
-                    % (command_txt, str(cmd_exit_code))
-                )
-                self.logger.warning("\t\t[WARN] %s " % err)
+            ) in zip(command_batch, results):
+                if cmd_exit_code:
+                    self.logger.warning(
+                        "\n\t\t[WARN] %s exits with code %s."
+                        % (command_txt, str(cmd_exit_code))
+                    )
+                    self.logger.warning("\t\t[WARN] %s " % err)
 
-            progress_counter += 1
-            self.print_progress(progress_counter)
+                progress_counter += 1
+                self.print_progress(progress_counter)
 
         self.logger.info("\n\t[Run] Commands execution completed.\t\t [OK]")
 
+    def group_independent_commands(self, command_list):
+        r"""
+        Split the command list into batches of commands which may be run
+        concurrently and return the list of batches.
+
+        Batches preserve the order of command_list.  A command joins the
+        current batch only if it redirects its output to a file and neither
+        it nor any command in the batch refers to a file written by the other.
+        Any other command (e.g. "rm -rf /tmp/*BMC_*") runs in a batch of its
+        own so that it stays ordered with respect to its neighbours.
+
+        Description of argument(s):
+        command_list    List of (command string, timeout) tuples.
+        """
+
+        # Match output redirection targets but not "2>&1" or "2>/dev/null".
+        redirect_regex = r"(?<![0-9&])>>?\s*([^\s&;|>]+)"
+
+        command_batches = []
+        batch_targets = []
+        for command in command_list:
+            targets = re.findall(redirect_regex, command[0])
+            independent = (
+                targets
+                and command_batches
+                and batch_targets
+                and not any(target in command[0] for target in batch_targets)
+                and not any(
+                    target in batch_command[0]
+                    for batch_command in command_batches[-1]
+                    for target in targets
+                )
+            )
+            if independent:
+                command_batches[-1].append(command)
+                batch_targets += targets
+            else:
+                command_batches.append([command])
+                batch_targets = list(targets)
+
+        return command_batches
+
     def group_copy(self, ffdc_actions_for_target_type):
         r"""
         scp group of files (wild card) from remote host.
@@ -768,8 +966,12 @@ class ffdc_collector:
                 # If file does not exist, code take no action.
                 # cmd_exit_code is ignored for this scenario.
                 if response:
-                    scp_result = self.ssh_remoteclient.scp_file_from_remote(
-                        response.split("\n"), self.ffdc_dir_path
+                    start_time = time.time()
+                    scp_result = self.copy_files_from_remote(
+                        response.split("\n")
+                    )
+                    self.archive_ffdc_files(
+                        "scp " + command, time.time() - start_time
                     )
                     if scp_result:
                         self.logger.info(
@@ -787,6 +989,70 @@ class ffdc_collector:
                 % self.hostname
             )
 
+    def tar_files_from_remote(self, file_list, targ_dir_path):
+        r"""
+        Copy files from the remote host with a single remote tar command when
+        bulk transfer is enabled.
+
+        Return a dictionary mapping each remote file to its copy result or
+        None if bulk transfer is disabled or tar is not available on the
+        remote host, in which case the caller copies the files with scp.
+
+        Description of argument(s):
+        file_list           List of (remote file, local name) tuples (see
+                            SSHRemoteclient.tar_files_from_remote).
+        targ_dir_path       The path of the directory to receive the files.
+        """
+
+        if self.bulk_transfer == "none" or not file_list:
+            return None
+
+        start_time = time.time()
+        tar_results = self.ssh_remoteclient.tar_files_from_remote(
+            file_list, targ_dir_path, compress=self.bulk_transfer == "gz"
+        )
+        if tar_results is None:
+            self.logger.info(
+                "\tFalling back to scp for each file from %s." % self.hostname
+            )
+            # Do not try tar again for the rest of this collection.
+            self.bulk_transfer = "none"
+            return None
+        self.archive_ffdc_files(
+            "tar " + " ".join(dict.fromkeys(f for f, _ in file_list)),
+            time.time() - start_time,
+        )
+        return tar_results
+
+    def copy_files_from_remote(self, remote_files):
+        r"""
+        Copy a list of remote files into self.ffdc_dir_path, keeping their
+        names, and return True if all were copied.
+
+        Description of argument(s):
+        remote_files        List of full path file names on the remote host.
+        """
+
+        remote_files = [f for f in remote_files if f]
+        tar_results = self.tar_files_from_remote(
+            [(f, f.split("/")[-1]) for f in remote_files], self.ffdc_dir_path
+        )
+        if tar_results is None:
+            return self.ssh_remoteclient.scp_file_from_remote(
+                remote_files, self.ffdc_dir_path
+            )
+
+        for remote_file, copied in tar_results.items():
+            if not copied:
+                self.logger.info(
+                    "\t\tFail to copy from "
+                    + self.hostname
+                    + ":"
+                    + remote_file
+                    + ".\n"
+                )
+        return all(tar_results.values())
+
     def scp_ffdc(
         self,
         targ_dir_path,
@@ -806,23 +1072,42 @@ class ffdc_collector:
 
         """
 
+        if form_filename:
+            file_list = [
+                str(filename % self.target_type) for filename in file_list
+            ]
+
+        # Fetch all of the files with one remote tar command if requested.
+        tar_results = self.tar_files_from_remote(
+            [
+                (filename, targ_file_prefix + filename.split("/")[-1])
+                for filename in file_list
+            ],
+            targ_dir_path,
+        )
+
         progress_counter = 0
         for filename in file_list:
-            if form_filename:
-                filename = str(filename % self.target_type)
             source_file_path = filename
             targ_file_path = (
                 targ_dir_path + targ_file_prefix + filename.split("/")[-1]
             )
 
-            # If source file name contains wild card, copy filename as is.
-            if "*" in source_file_path:
-                scp_result = self.ssh_remoteclient.scp_file_from_remote(
-                    source_file_path, self.ffdc_dir_path
-                )
+            if tar_results is not None:
+                scp_result = tar_results[source_file_path]
             else:
-                scp_result = self.ssh_remoteclient.scp_file_from_remote(
-                    source_file_path, targ_file_path
+                start_time = time.time()
+                # If source file name contains wild card, copy filename as is.
+                if "*" in source_file_path:
+                    scp_result = self.ssh_remoteclient.scp_file_from_remote(
+                        source_file_path, self.ffdc_dir_path
+                    )
+                else:
+                    scp_result = self.ssh_remoteclient.scp_file_from_remote(
+                        source_file_path, targ_file_path
+                    )
+                self.archive_ffdc_files(
+                    "scp " + source_file_path, time.time() - start_time
                 )
 
             if not quiet:
@@ -907,7 +1192,6 @@ class ffdc_collector:
 
         sys.stdout.write("\r\t" + "+" * progress)
         sys.stdout.flush()
-        time.sleep(0.1)
 
     def verify_redfish(self):
         r"""
@@ -1091,6 +1375,8 @@ class ffdc_collector:
         mask_dict = self.env_dict.copy()
         for k, v in mask_dict.items():
             if k.lower().find("password") != -1:
+                if secret_redactor is not None:
+                    secret_redactor.register_secrets(v)
                 hidden_text = []
                 hidden_text.append(v)
                 password_regex = (
@@ -1100,29 +1386,34 @@ class ffdc_collector:
 
         self.logger.info(json.dumps(mask_dict, indent=8, sort_keys=False))
 
-    def execute_python_eval(self, eval_string):
+    def execute_plugin_function(self, plugin_name, plugin_args):
         r"""
-        Execute qualified python function string using eval.
+        Call the plugin function with the given arguments.
 
         Description of argument(s):
-        eval_string        Execute the python object.
+        plugin_name        Qualified plugin function name.
+        plugin_args        List of argument values.
 
         Example:
-                eval(plugin.foo_func.foo_func(10))
+                plugin.foo_func.foo_func(10)
         """
         try:
             self.logger.info("\tExecuting plugin func()")
-            self.logger.debug("\tCall func: %s" % eval_string)
-            result = eval(eval_string)
+            self.logger.debug(
+                "\tCall func: %s(%s)",
+                plugin_name,
+                ", ".join(repr(arg) for arg in plugin_args),
+            )
+            result = get_plugin_function(plugin_name)(*plugin_args)
             self.logger.info("\treturn: %s" % str(result))
         except (
             ValueError,
-            SyntaxError,
+            ImportError,
             NameError,
             AttributeError,
             TypeError,
         ) as e:
-            self.logger.error("\tERROR: execute_python_eval: %s" % e)
+            self.logger.error("\tERROR: execute_plugin_function: %s" % e)
             # Set the plugin error state.
             plugin_error_dict["exit_on_error"] = True
             self.logger.info("\treturn: PLUGIN_EVAL_ERROR")
@@ -1132,7 +1423,7 @@ class ffdc_collector:
 
     def execute_plugin_block(self, plugin_cmd_list):
         r"""
-        Pack the plugin command to qualifed python string object.
+        Call the plugin function of a YAML plugin block.
 
         Description of argument(s):
         plugin_list_dict      Plugin block read from YAML
@@ -1188,22 +1479,16 @@ class ffdc_collector:
             else:
                 plugin_args = self.yaml_args_populate([])
 
-            # Pack the args arg1, arg2, .... argn into
-            # "arg1","arg2","argn"  string as params for function.
-            parm_args_str = self.yaml_args_string(plugin_args)
-            if parm_args_str:
-                plugin_func = plugin_name + "(" + parm_args_str + ")"
-            else:
-                plugin_func = plugin_name + "()"
+            plugin_args = self.yaml_args_values(plugin_args)
 
             # Execute plugin function.
             if global_plugin_dict:
-                resp = self.execute_python_eval(plugin_func)
+                resp = self.execute_plugin_function(plugin_name, plugin_args)
                 # Update plugin vars dict if there is any.
                 if resp != "PLUGIN_EVAL_ERROR":
                     self.response_args_data(resp)
             else:
-                resp = self.execute_python_eval(plugin_func)
+                resp = self.execute_plugin_function(plugin_name, plugin_args)
         except Exception as e:
             # Set the plugin error state.
             plugin_error_dict["exit_on_error"] = True
@@ -1292,25 +1577,24 @@ class ffdc_collector:
         # clear all the list element for next plugin block execute.
         global_plugin_list.clear()
 
-    def yaml_args_string(self, plugin_args):
+    def yaml_args_values(self, plugin_args):
         r"""
-        Pack the args into string.
+        Return the list of argument values to pass to a plugin function.
+
+        Plugin vars holding a list or dictionary are passed as that object.
 
         plugin_args            arg list ['arg1','arg2,'argn']
         """
-        args_str = ""
+        args_list = []
         for args in plugin_args:
-            if args:
-                if isinstance(args, (int, float)):
-                    args_str += str(args)
-                elif args in global_plugin_type_list:
-                    args_str += str(global_plugin_dict[args])
+            if isinstance(args, str):
+                if args in global_plugin_type_list:
+                    args_list.append(global_plugin_dict[args])
                 else:
-                    args_str += '"' + str(args.strip("\r\n\t")) + '"'
-            # Skip last list element.
-            if args != plugin_args[-1]:
-                args_str += ","
-        return args_str
+                    args_list.append(args.strip("\r\n\t"))
+            else:
+                args_list.append(args)
+        return args_list
 
     def yaml_args_populate(self, yaml_arg_list):
         r"""
@@ -1383,7 +1667,7 @@ class ffdc_collector:
                 if yaml_arg_str in global_plugin_dict:
                     if isinstance(global_plugin_dict[var], (list, dict)):
                         # List data type or dict can't be replaced, use directly
-                        # in eval function call.
+                        # in plugin function call.
                         global_plugin_type_list.append(var)
                     else:
                         yaml_arg_str = yaml_arg_str.replace(
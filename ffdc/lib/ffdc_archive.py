@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+
+import json
+import logging
+import os
+import selectors
+import subprocess
+import tarfile
+import tempfile
+import time
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Command output larger than this is spooled to a temporary file rather than
+# being held in memory before it is added to the archive.
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+
+class FFDCArchive:
+    r"""
+    Class to write collected FFDC into a single compressed tar archive.
+
+    Members are streamed into the archive as they are collected so that
+    neither the whole archive nor any single large output is held in memory.
+    A manifest listing each member's offset and size in the uncompressed tar
+    stream along with the command which produced it and its elapsed time is
+    written as the last archive member and as a <archive>.index.json file.
+    """
+
+    def __init__(self, archive_path, compression="gz", logger=None):
+        r"""
+        Description of argument(s):
+
+        archive_path    Full path of the archive file to create, without
+                        the extension (e.g. /tmp/OPENBMC/bmc1_20230101-1200).
+        compression     "gz", "zst" or "tar" (uncompressed)
+        logger          Logger for command errors (default: root logger)
+        """
+
+        if compression not in ("gz", "zst", "tar"):
+            raise ValueError("Invalid archive compression: %s" % compression)
+        if compression == "zst" and zstandard is None:
+            raise ValueError(
+                "zst archive compression requires the zstandard package"
+            )
+
+        extension = {"gz": ".tar.gz", "zst": ".tar.zst", "tar": ".tar"}
+        self.archive_path = archive_path + extension[compression]
+        self.index_path = self.archive_path + ".index.json"
+        self.compression = compression
+        self.logger = logger or logging.getLogger()
+        self.index = []
+
+        self.raw_file = open(self.archive_path, "wb")
+        if compression == "zst":
+            self.compressed_file = zstandard.ZstdCompressor().stream_writer(
+                self.raw_file
+            )
+            self.tar = tarfile.open(fileobj=self.compressed_file, mode="w|")
+        else:
+            self.compressed_file = None
+            mode = "w|gz" if compression == "gz" else "w|"
+            self.tar = tarfile.open(fileobj=self.raw_file, mode=mode)
+
+    def add_fileobj(self, name, fileobj, size, command="", elapsed=0.0):
+        r"""
+        Add size bytes read from fileobj to the archive as member name.
+
+        Description of argument(s):
+        name            Member name in the archive
+        fileobj         Binary file object positioned at the data
+        size            Number of bytes to read from fileobj
+        command         Command which produced the data, for the manifest
+        elapsed         Seconds taken to produce the data, for the manifest
+        """
+
+        tarinfo = tarfile.TarInfo(name)
+        tarinfo.size = size
+        tarinfo.mtime = int(time.time())
+        tarinfo.mode = 0o644
+        header_offset = self.tar.offset
+        self.tar.addfile(tarinfo, fileobj)
+        # The data ends on the next 512 byte block boundary after the header.
+        blocks = -(-size // tarfile.BLOCKSIZE)
+        self.index.append(
+            {
+                "name": name,
+                "header_offset": header_offset,
+                "offset": self.tar.offset - blocks * tarfile.BLOCKSIZE,
+                "size": size,
+                "command": command,
+                "elapsed": round(elapsed, 6),
+            }
+        )
+
+    def add_data(self, name, data, command="", elapsed=0.0):
+        r"""
+        Add a string, bytes or dictionary (written as JSON) to the archive.
+
+        Description of argument(s):
+        name            Member name in the archive
+        data            Data to add
+        command         Command which produced the data, for the manifest
+        elapsed         Seconds taken to produce the data, for the manifest
+        """
+
+        if isinstance(data, dict):
+            data = json.dumps(data)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        with tempfile.SpooledTemporaryFile(SPOOL_MAX_MEMORY) as spool:
+            spool.write(data)
+            spool.seek(0)
+            self.add_fileobj(name, spool, len(data), command, elapsed)
+
+    def add_command_output(self, name, command, timeout=None):
+        r"""
+        Run a local shell command and stream its stdout into the archive.
+
+        Return True if the command produced output.  Command stderr is logged
+        as it is today for run_tool_cmd.  A command which runs longer than
+        timeout is killed and the output it produced up to then is added.
+
+        Description of argument(s):
+        name            Member name in the archive
+        command         Shell command string to run
+        timeout         Seconds to allow for the command to complete
+                        (default: no limit)
+        """
+
+        start = time.time()
+        with tempfile.SpooledTemporaryFile(
+            SPOOL_MAX_MEMORY
+        ) as spool, tempfile.TemporaryFile() as err_file:
+            process = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=err_file,
+                shell=True,
+            )
+            deadline = None if timeout is None else start + timeout
+            timed_out = False
+            with selectors.DefaultSelector() as selector:
+                selector.register(process.stdout, selectors.EVENT_READ)
+                while True:
+                    if deadline is not None and time.time() >= deadline:
+                        process.kill()
+                        timed_out = True
+                        break
+                    if not selector.select(
+                        None if deadline is None else deadline - time.time()
+                    ):
+                        continue
+                    data = os.read(process.stdout.fileno(), 65536)
+                    if not data:
+                        break
+                    spool.write(data)
+            process.stdout.close()
+            process.wait()
+            err_file.seek(0)
+            err = err_file.read().decode("utf-8", errors="replace")
+            if timed_out:
+                err += "Timed out after %s seconds" % timeout
+            if err:
+                self.logger.error("\n\t\tERROR with %s " % command)
+                self.logger.error("\t\t" + err)
+            size = spool.tell()
+            if not size:
+                return False
+            spool.seek(0)
+            self.add_fileobj(name, spool, size, command, time.time() - start)
+        return True
+
+    def add_path(self, local_path, name=None, command="", elapsed=0.0):
+        r"""
+        Move a local file or directory into the archive.
+
+        The local copy is removed once it has been added.
+
+        Description of argument(s):
+        local_path      Full path of the local file or directory
+        name            Member name in the archive (default: base name)
+        command         Command which produced the data, for the manifest
+        elapsed         Seconds taken to produce the data, for the manifest
+        """
+
+        if name is None:
+            name = os.path.basename(local_path.rstrip("/"))
+        if os.path.isdir(local_path):
+            for entry in sorted(os.listdir(local_path)):
+                self.add_path(
+                    os.path.join(local_path, entry),
+                    name + "/" + entry,
+                    command,
+                    elapsed,
+                )
+            os.rmdir(local_path)
+            return
+        with open(local_path, "rb") as fileobj:
+            self.add_fileobj(
+                name,
+                fileobj,
+                os.fstat(fileobj.fileno()).st_size,
+                command,
+                elapsed,
+            )
+        os.remove(local_path)
+
+    def close(self):
+        r"""
+        Write the manifest and close the archive.
+        """
+
+        index_data = json.dumps(self.index, indent=4).encode("utf-8")
+        with tempfile.SpooledTemporaryFile(SPOOL_MAX_MEMORY) as spool:
+            spool.write(index_data)
+            spool.seek(0)
+            tarinfo = tarfile.TarInfo("ffdc_index.json")
+            tarinfo.size = len(index_data)
+            tarinfo.mtime = int(time.time())
+            tarinfo.mode = 0o644
+            self.tar.addfile(tarinfo, spool)
+        self.tar.close()
+        if self.compressed_file:
+            self.compressed_file.close()
+        self.raw_file.close()
+
+        with open(self.index_path, "w") as fp:
+            fp.write(index_data.decode("utf-8"))
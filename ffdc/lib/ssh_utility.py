@@ -1,8 +1,16 @@
 #!/usr/bin/env python3
 
+import fnmatch
 import logging
+import os
+import posixpath
+import select
+import shlex
+import shutil
 import socket
+import tarfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 from socket import timeout as SocketTimeout
 
 import paramiko
@@ -90,35 +98,47 @@ class SSHRemoteclient:
         """
         Execute command on the remote host.
 
+        Each call opens its own channel on the shared transport so this
+        method may be called from several threads at once.
+
         Description of argument(s):
         command                Command string sent to remote host
+        default_timeout        Seconds to allow for the command to complete
 
         """
 
         empty = ""
         cmd_start = time.time()
         try:
-            stdin, stdout, stderr = self.sshclient.exec_command(
-                command, timeout=default_timeout
+            channel = self.sshclient.get_transport().open_session(
+                timeout=default_timeout
             )
-            start = time.time()
-            while time.time() < start + default_timeout:
-                # Need to do read/write operation to trigger
-                # paramiko exec_command timeout mechanism.
-                xresults = stderr.readlines()
-                results = "".join(xresults)
-                time.sleep(1)
-                if stdout.channel.exit_status_ready():
+            channel.exec_command(command)
+            channel.shutdown_write()
+
+            # Read stdout and stderr as data arrives rather than polling
+            # at a fixed interval.
+            out_chunks = []
+            err_chunks = []
+            while True:
+                if channel.recv_ready():
+                    out_chunks.append(channel.recv(32768))
+                    continue
+                if channel.recv_stderr_ready():
+                    err_chunks.append(channel.recv_stderr(32768))
+                    continue
+                if channel.exit_status_ready():
                     break
-            cmd_exit_code = stdout.channel.recv_exit_status()
+                remaining = cmd_start + default_timeout - time.time()
+                if remaining <= 0:
+                    channel.close()
+                    raise SocketTimeout("Command timed out")
+                select.select([channel], [], [], min(remaining, 1))
+            cmd_exit_code = channel.recv_exit_status()
+            channel.close()
 
-            # Convert list of string to one string
-            err = ""
-            out = ""
-            for item in results:
-                err += item
-            for item in stdout.readlines():
-                out += item
+            err = b"".join(err_chunks).decode("utf-8", errors="replace")
+            out = b"".join(out_chunks).decode("utf-8", errors="replace")
 
             return cmd_exit_code, err, out
 
@@ -143,6 +163,29 @@ class SSHRemoteclient:
             )
             return 0, empty, empty
 
+    def execute_command_list(self, command_list, max_workers=1):
+        r"""
+        Execute a list of commands on the remote host concurrently and
+        return a list of (exit code, stderr, stdout) tuples in the same
+        order as command_list.
+
+        The commands run on separate channels over the single SSH
+        transport.  The caller is responsible for ensuring that the
+        commands do not depend on one another.
+
+        Description of argument(s):
+        command_list           List of (command string, timeout) tuples
+        max_workers            Maximum number of commands to run at once
+        """
+
+        with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as pool:
+            return list(
+                pool.map(
+                    lambda command: self.execute_command(*command),
+                    command_list,
+                )
+            )
+
     def scp_connection(self):
         r"""
         Create a scp connection for file transfer.
@@ -168,6 +211,168 @@ class SSHRemoteclient:
                 "\tCollected data will need to be manually offloaded."
             )
 
+    def tar_files_from_remote(self, file_list, local_dir, compress=False):
+        r"""
+        Copy files from the remote host with a single remote tar command
+        whose output is unpacked locally as it arrives.
+
+        Return a dictionary mapping each remote file to True if it was
+        copied or False if it was not, or None if tar is not available on
+        the remote host (in which case the caller should fall back to scp).
+
+        Description of argument(s):
+        file_list              List of (remote file, local name) tuples.
+                               The remote file is a full path which may
+                               contain wild cards.  Non wild card files are
+                               stored in local_dir as local name.  Files
+                               matched by wild cards keep their remote
+                               file names.
+        local_dir              Local directory to store the files in
+        compress               Compress the tar stream with gzip if True
+        """
+
+        sources = []
+        for remote_file, local_name in file_list:
+            pattern = posixpath.normpath(remote_file).lstrip("/")
+            sources.append((remote_file, pattern, local_name))
+        results = {remote_file: False for remote_file, _ in file_list}
+        if not sources:
+            return results
+
+        # Wild cards are left unquoted so the remote shell expands them,
+        # as scp does.
+        paths = " ".join(
+            remote_file if "*" in remote_file else shlex.quote(remote_file)
+            for remote_file in results
+        )
+        command = (
+            "command -v tar >/dev/null 2>&1 || exit 127; tar -ch%sf - %s"
+            % ("z" if compress else "", paths)
+        )
+
+        cmd_start = time.time()
+        channel = None
+        try:
+            channel = self.sshclient.get_transport().open_session(timeout=60)
+            channel.settimeout(60)
+            channel.exec_command(command)
+            channel.shutdown_write()
+            stream = channel.makefile("rb")
+            try:
+                tar = tarfile.open(
+                    fileobj=stream, mode="r|gz" if compress else "r|"
+                )
+            except tarfile.ReadError:
+                tar = None
+            if tar is not None:
+                extracted = {}
+                for member in tar:
+                    self.extract_tar_member(
+                        tar, member, sources, results, local_dir, extracted
+                    )
+                tar.close()
+            # Drain anything left so that the exit status is available.
+            while stream.read(32768):
+                pass
+            cmd_exit_code = channel.recv_exit_status()
+            err = b""
+            while channel.recv_stderr_ready():
+                err += channel.recv_stderr(32768)
+            # Drop GNU tar's notice about stripping the leading "/".
+            err = b"".join(
+                line
+                for line in err.splitlines(True)
+                if b"Removing leading" not in line
+            )
+            if cmd_exit_code == 127 and tar is None:
+                logging.info("\n\ttar is not available on %s." % self.hostname)
+                return None
+            if err:
+                logging.error(
+                    "\n\tERROR: tar from remotehost %s: %s"
+                    % (self.hostname, err.decode("utf-8", errors="replace"))
+                )
+        except (
+            paramiko.SSHException,
+            paramiko.ChannelException,
+            SocketTimeout,
+            tarfile.TarError,
+            EOFError,
+        ) as e:
+            # Files which were not unpacked before the error are reported
+            # as failed.
+            logging.error(
+                "\n\tERROR: Fail tar from remotehost %s %s %s"
+                % (self.hostname, e.__class__, e)
+            )
+            logging.error(
+                "\tElapsed Time %s"
+                % time.strftime(
+                    "%H:%M:%S", time.gmtime(time.time() - cmd_start)
+                )
+            )
+        finally:
+            if channel:
+                channel.close()
+
+        return results
+
+    @staticmethod
+    def extract_tar_member(
+        tar, member, sources, results, local_dir, extracted
+    ):
+        r"""
+        Extract a tar member into local_dir under the local name of each
+        requested remote file it belongs to and mark those files as copied.
+
+        Description of argument(s):
+        tar                    Open tarfile object being read as a stream
+        member                 The TarInfo of the member
+        sources                List of (remote file, pattern, local name)
+                               tuples as built by tar_files_from_remote
+        results                Dictionary of remote file copy results
+        local_dir              Local directory to store the files in
+        extracted              Dictionary of member names already extracted
+                               and their local paths (used for hard links,
+                               which tar emits for files requested twice)
+        """
+
+        name = posixpath.normpath(member.name).lstrip("/")
+        parts = name.split("/")
+        if ".." in parts:
+            return
+        if not (member.isdir() or member.isfile() or member.islnk()):
+            return
+        for remote_file, pattern, local_name in sources:
+            depth = pattern.count("/") + 1
+            top = "/".join(parts[:depth])
+            if "*" in pattern:
+                if not fnmatch.fnmatchcase(top, pattern):
+                    continue
+                local_name = parts[depth - 1]
+            elif top != pattern:
+                continue
+            local_path = os.path.join(local_dir, local_name, *parts[depth:])
+            if member.isdir():
+                os.makedirs(local_path, exist_ok=True)
+            else:
+                os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                if member.islnk():
+                    link_name = posixpath.normpath(member.linkname)
+                    source_path = extracted.get(link_name.lstrip("/"))
+                    if source_path is None:
+                        continue
+                    if source_path != local_path:
+                        shutil.copyfile(source_path, local_path)
+                elif name in extracted:
+                    if extracted[name] != local_path:
+                        shutil.copyfile(extracted[name], local_path)
+                else:
+                    with open(local_path, "wb") as fp:
+                        shutil.copyfileobj(tar.extractfile(member), fp)
+                extracted.setdefault(name, local_path)
+            results[remote_file] = True
+
     def scp_file_from_remote(self, remote_file, local_file):
         r"""
         scp file in remote system to local with date-prefixed filename.
@@ -6,6 +6,7 @@ BMC redfish utility functions.
 
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 import gen_print as gp
 from robot.libraries.BuiltIn import BuiltIn
@@ -252,7 +253,11 @@ class bmc_redfish_utils(object):
         return list(sorted(self.__pending_enumeration))
 
     def enumerate_request(
-        self, resource_path, return_json=1, include_dead_resources=False
+        self,
+        resource_path,
+        return_json=1,
+        include_dead_resources=False,
+        max_workers=1,
     ):
         r"""
         Perform a GET enumerate request and return available resource paths.
@@ -265,11 +270,20 @@ class bmc_redfish_utils(object):
                                     dictionary.
         include_dead_resources      Check and return a list of dead/broken URI
                                     resources.
+        max_workers                 The maximum number of GET requests to have
+                                    in flight at once.  Each level of the
+                                    resource tree is fetched in parallel by up
+                                    to this many threads.  The default value of
+                                    1 fetches the resources serially.  Keep
+                                    this below the BMC's session/connection
+                                    limit.  The result is the same regardless
+                                    of this value.
         """
 
         gp.qprint_executing(style=gp.func_line_style_short)
 
         return_json = int(return_json)
+        max_workers = int(max_workers)
 
         # Set quiet variable to keep subordinate get() calls quiet.
         quiet = 1
@@ -292,25 +306,28 @@ class bmc_redfish_utils(object):
         resources_to_be_enumerated = (resource_path,)
 
         while resources_to_be_enumerated:
-            for resource in resources_to_be_enumerated:
-                # JsonSchemas, SessionService or URLs containing # are not
-                # required in enumeration.
-                # Example: '/redfish/v1/JsonSchemas/' and sub resources.
-                #          '/redfish/v1/SessionService'
-                #          '/redfish/v1/Managers/${MANAGER_ID}#/Oem'
-                if (
+            # JsonSchemas, SessionService or URLs containing # are not
+            # required in enumeration.
+            # Example: '/redfish/v1/JsonSchemas/' and sub resources.
+            #          '/redfish/v1/SessionService'
+            #          '/redfish/v1/Managers/${MANAGER_ID}#/Oem'
+            resources = [
+                resource
+                for resource in resources_to_be_enumerated
+                if not (
                     ("JsonSchemas" in resource)
                     or ("SessionService" in resource)
                     or ("PostCodes" in resource)
                     or ("Registries" in resource)
                     or ("Journal" in resource)
                     or ("#" in resource)
-                ):
-                    continue
-
-                self._rest_response_ = self._redfish_.get(
-                    resource, valid_status_codes=[200, 404, 405, 500]
                 )
+            ]
+
+            # The responses are processed in the order of the resources list so
+            # that the result does not depend on the number of workers.
+            responses = self.get_resource_list(resources, max_workers)
+            for resource, self._rest_response_ in zip(resources, responses):
                 # Enumeration is done for available resources ignoring the
                 # ones for which response is not obtained.
                 if self._rest_response_.status != 200:
@@ -356,6 +373,35 @@ class bmc_redfish_utils(object):
             else:
                 return self.__result
 
+    def get_resource_list(self, resource_list, max_workers=1):
+        r"""
+        Perform a GET request for each resource in the list and return the
+        responses in the same order as resource_list.
+
+        Description of argument(s):
+        resource_list   A list of URI resource absolute paths (e.g.
+                        ["/redfish/v1/Chassis", "/redfish/v1/Managers"]).
+        max_workers     The maximum number of GET requests to have in flight
+                        at once.  If this is 1, the requests are performed
+                        serially and lazily (i.e. as the caller iterates over
+                        the result).
+        """
+
+        def get_resource(resource):
+            # Set quiet variable to keep subordinate get() calls quiet.  This
+            # must be set here since worker thread stacks do not include the
+            # caller's frame.
+            quiet = 1
+            return self._redfish_.get(
+                resource, valid_status_codes=[200, 404, 405, 500]
+            )
+
+        if int(max_workers) <= 1:
+            return map(get_resource, resource_list)
+
+        with ThreadPoolExecutor(max_workers=int(max_workers)) as executor:
+            return list(executor.map(get_resource, resource_list))
+
     def walk_nested_dict(self, data, url=""):
         r"""
         Parse through the nested dictionary and get the resource id paths.
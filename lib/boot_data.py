@@ -9,6 +9,7 @@ import glob
 import json
 import os
 import tempfile
+import time
 
 from robot.libraries.BuiltIn import BuiltIn
 from tally_sheet import *
@@ -256,6 +257,30 @@ class boot_results:
         self.__boot_results.inc_row_field(boot_type, boot_status.lower())
         self.__boot_results.calc()
 
+    def add_results(self, results):
+        r"""
+        Add the given pass/fail counts to our boot_results_table and then call the calc method once.  This is
+        much faster than calling update once per boot when reloading the results of many boots.
+
+        Description of argument(s):
+        results                     A dictionary whose keys are boot types and whose values are [pass count,
+                                    fail count] lists.  A row is added for any boot type which is not
+                                    already in the table.
+        """
+
+        for boot_type, (pass_count, fail_count) in results.items():
+            try:
+                self.__boot_results.inc_row_field(
+                    boot_type, "pass", pass_count
+                )
+            except KeyError:
+                self.__boot_results.add_row(boot_type)
+                self.__boot_results.inc_row_field(
+                    boot_type, "pass", pass_count
+                )
+            self.__boot_results.inc_row_field(boot_type, "fail", fail_count)
+        self.__boot_results.calc()
+
     def sprint_report(self, header_footer="\n"):
         r"""
         String-print the formatted boot_resuls_table and return them.
@@ -349,6 +374,336 @@ def cleanup_boot_results_file():
             gc.cmd_fnc("rm -f " + file_path)
 
 
+class boot_results_journal:
+    r"""
+    This class defines an append-only journal of boot results from which a boot_results object and a
+    boot_history list can be reconstructed.
+
+    The journal is a JSON Lines file.  Each boot is recorded by appending one line such as the following:
+
+    {"time": 1700000000.0, "boot_type": "OBMC Reboot (off)", "status": "PASS", "start_message": "#(CDT) ..."}
+
+    Each line is flushed as it is written so that it survives a crash of this program.  fsync (which
+    protects against a crash of the system) is batched: it is done every fsync_interval records, once a
+    record is fsync_max_delay seconds old, on compaction and on close.  A partial last line (as left by a
+    crash mid-write) is discarded when the journal is loaded.
+
+    Compaction rewrites the journal (via a temporary file and a rename) with the results of all but the
+    newest keep_records boots folded into a leading snapshot line:
+
+    {"snapshot": {"results": {"OBMC Reboot (off)": [10, 1], ...}, "boot_history": [...], "end_time": ...,
+                  "boot_pass": 0, "boot_fail": 0}}
+
+    A new journal starts with an empty snapshot line which records the initial boot_pass and boot_fail values
+    so that a later load (e.g. by a second call of the program in the same run, when the callers' boot_pass
+    and boot_fail values already include the journaled boots) does not count those boots twice.
+    """
+
+    def __init__(
+        self,
+        file_path,
+        fsync_interval=10,
+        fsync_max_delay=60.0,
+        keep_records=10000,
+    ):
+        r"""
+        Initialize the boot_results_journal object.
+
+        Description of argument(s):
+        file_path                   The path to the journal file (e.g. as returned by
+                                    create_boot_results_file_path).
+        fsync_interval              The number of records which may be written before fsync is called.
+        fsync_max_delay             The maximum number of seconds that a written record may go without
+                                    fsync being called.
+        keep_records                The number of boot records which compaction keeps.  Older records are
+                                    folded into the snapshot and are therefore no longer available to
+                                    get_results for a time window.
+        """
+
+        self.file_path = file_path
+        self.fsync_interval = fsync_interval
+        self.fsync_max_delay = fsync_max_delay
+        self.keep_records = keep_records
+        # The snapshot results and the compact (time, boot_type, status) tuple of each boot record.
+        self.__snapshot_results = {}
+        self.__snapshot_end_time = 0.0
+        self.__boot_pass = 0
+        self.__boot_fail = 0
+        self.__records = []
+        self.__boot_history = []
+        self.__max_boot_history = 10
+        self.__file = None
+        self.__unsynced_count = 0
+        self.__first_unsynced_time = 0.0
+
+    def load(self, boot_table, boot_pass=0, boot_fail=0, max_boot_history=10):
+        r"""
+        Read the journal (if it exists) and return a boot_results object and a boot_history list
+        reconstructed from it.
+
+        Description of argument(s):
+        boot_table                  Boot table object (see boot_results class).
+        boot_pass                   An initial boot_pass value (see boot_results class).  This is only used
+                                    if the journal does not exist yet.  Otherwise, the value recorded in
+                                    the journal when it was created is used.
+        boot_fail                   An initial boot_fail value (see boot_results class).  See boot_pass.
+        max_boot_history            The max number of entries to be kept in the boot_history list.
+        """
+
+        self.close()
+        self.__snapshot_results = {}
+        self.__snapshot_end_time = 0.0
+        self.__boot_pass = int(boot_pass)
+        self.__boot_fail = int(boot_fail)
+        self.__records = []
+        self.__boot_history = []
+        self.__max_boot_history = max_boot_history
+        good_length = 0
+        if os.path.exists(self.file_path):
+            with open(self.file_path, "rb") as file:
+                for line in file:
+                    if not line.endswith(b"\n"):
+                        # A partial line left by a crash.
+                        break
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    good_length += len(line)
+                    if "snapshot" in entry:
+                        snapshot = entry["snapshot"]
+                        self.__snapshot_results = snapshot["results"]
+                        self.__snapshot_end_time = snapshot["end_time"]
+                        self.__boot_history = snapshot["boot_history"]
+                        self.__boot_pass = snapshot.get(
+                            "boot_pass", self.__boot_pass
+                        )
+                        self.__boot_fail = snapshot.get(
+                            "boot_fail", self.__boot_fail
+                        )
+                        continue
+                    self.__records.append(
+                        (entry["time"], entry["boot_type"], entry["status"])
+                    )
+                    update_boot_history(
+                        self.__boot_history,
+                        entry["start_message"],
+                        max_boot_history,
+                    )
+            if good_length != os.path.getsize(self.file_path):
+                gp.qprint_timen(
+                    "Discarding a partial record at the end of "
+                    + self.file_path
+                    + "."
+                )
+                os.truncate(self.file_path, good_length)
+        else:
+            # Record the initial boot_pass and boot_fail values.
+            self.compact(force=True)
+
+        boot_results_obj = boot_results(
+            boot_table, self.__boot_pass, self.__boot_fail
+        )
+        boot_results_obj.add_results(self.get_results())
+        return boot_results_obj, list(self.__boot_history)
+
+    def append(self, boot_type, boot_status, boot_start_message=""):
+        r"""
+        Append a record of a boot to the journal.
+
+        Description of argument(s):
+        boot_type                   The type of boot test just done (e.g. "REST Power On").
+        boot_status                 The status of the boot just done (i.e. "PASS" or "FAIL").
+        boot_start_message          The boot's start message (see update_boot_history).
+        """
+
+        record_time = time.time()
+        if self.__file is None:
+            self.__file = open(self.file_path, "a")
+        self.__file.write(
+            json.dumps(
+                {
+                    "time": round(record_time, 3),
+                    "boot_type": boot_type,
+                    "status": boot_status.upper(),
+                    "start_message": boot_start_message,
+                }
+            )
+            + "\n"
+        )
+        self.__file.flush()
+        self.__records.append(
+            (round(record_time, 3), boot_type, boot_status.upper())
+        )
+        update_boot_history(
+            self.__boot_history, boot_start_message, self.__max_boot_history
+        )
+        if self.__unsynced_count == 0:
+            self.__first_unsynced_time = record_time
+        self.__unsynced_count += 1
+        if (
+            self.__unsynced_count >= self.fsync_interval
+            or record_time - self.__first_unsynced_time >= self.fsync_max_delay
+        ):
+            self.sync()
+
+    def sync(self):
+        r"""
+        fsync any records written since the last fsync.
+        """
+
+        if self.__file is not None and self.__unsynced_count:
+            os.fsync(self.__file.fileno())
+        self.__unsynced_count = 0
+
+    def close(self):
+        r"""
+        fsync and close the journal file.
+        """
+
+        self.sync()
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+    def compact(self, force=False):
+        r"""
+        Rewrite the journal with all but the newest keep_records boot records folded into the snapshot.
+        Unless force is True, this is only done once there are more than twice keep_records records.
+
+        Description of argument(s):
+        force                       Compact regardless of the number of records.
+        """
+
+        if not force and len(self.__records) <= 2 * self.keep_records:
+            return
+        self.close()
+        split_index = max(0, len(self.__records) - self.keep_records)
+        folded_records = self.__records[:split_index]
+        kept_records = self.__records[split_index:]
+        snapshot_results = self.__fold_records(
+            folded_records, dict(self.__snapshot_results)
+        )
+        if folded_records:
+            snapshot_end_time = folded_records[-1][0]
+        else:
+            snapshot_end_time = self.__snapshot_end_time
+
+        # The start messages are not held in memory so the snapshot's boot_history is built from the folded
+        # lines and the kept lines are copied from the current journal.
+        snapshot_boot_history = []
+        lines = []
+        if os.path.exists(self.file_path):
+            with open(self.file_path, "r") as file:
+                for line in file:
+                    if line.startswith('{"snapshot"'):
+                        snapshot_boot_history = json.loads(line)["snapshot"][
+                            "boot_history"
+                        ]
+                    else:
+                        lines.append(line)
+        for line in lines[:split_index]:
+            update_boot_history(
+                snapshot_boot_history,
+                json.loads(line)["start_message"],
+                self.__max_boot_history,
+            )
+
+        temp_file_path = self.file_path + ".tmp"
+        with open(temp_file_path, "w") as file:
+            file.write(
+                json.dumps(
+                    {
+                        "snapshot": {
+                            "results": snapshot_results,
+                            "boot_history": snapshot_boot_history,
+                            "end_time": snapshot_end_time,
+                            "boot_pass": self.__boot_pass,
+                            "boot_fail": self.__boot_fail,
+                        }
+                    }
+                )
+                + "\n"
+            )
+            file.writelines(lines[split_index:])
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_file_path, self.file_path)
+        dir_fd = os.open(os.path.dirname(self.file_path) or ".", os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+        self.__snapshot_results = snapshot_results
+        self.__snapshot_end_time = snapshot_end_time
+        self.__records = kept_records
+
+    def get_results(self, start_time=None, end_time=None, boot_type=None):
+        r"""
+        Return a dictionary whose keys are boot types and whose values are [pass count, fail count] lists.
+
+        If start_time or end_time is specified, only the boot records in that time window which have not
+        been folded into the snapshot by compaction are counted.  Otherwise, the snapshot results are
+        included.
+
+        Description of argument(s):
+        start_time                  Only count boots recorded at or after this epoch time.
+        end_time                    Only count boots recorded before this epoch time.
+        boot_type                   Only count boots of this type (e.g. "REST Power On").
+        """
+
+        if start_time is None and end_time is None:
+            results = {
+                key: list(value)
+                for key, value in self.__snapshot_results.items()
+            }
+            records = self.__records
+        else:
+            results = {}
+            start_time = start_time or 0.0
+            end_time = end_time or float("inf")
+            records = [
+                record
+                for record in self.__records
+                if start_time <= record[0] < end_time
+            ]
+        if boot_type is not None:
+            results = {
+                key: value
+                for key, value in results.items()
+                if key == boot_type
+            }
+            records = [record for record in records if record[1] == boot_type]
+        return self.__fold_records(records, results)
+
+    def get_total_pass_fail(
+        self, start_time=None, end_time=None, boot_type=None
+    ):
+        r"""
+        Return the total pass and fail counts.  See get_results for a description of the arguments.
+        """
+
+        results = self.get_results(start_time, end_time, boot_type)
+        return (
+            sum(value[0] for value in results.values()),
+            sum(value[1] for value in results.values()),
+        )
+
+    def __fold_records(self, records, results):
+        r"""
+        Add the pass/fail counts of the records to the results dictionary and return it.
+        """
+
+        for record_time, boot_type, boot_status in records:
+            counts = results.setdefault(boot_type, [0, 0])
+            if boot_status == "PASS":
+                counts[0] += 1
+            else:
+                counts[1] += 1
+        return results
+
+
 def update_boot_history(boot_history, boot_start_message, max_boot_history=10):
     r"""
     Update the boot_history list by appending the boot_start_message and by removing all but the last n
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+
+r"""
+This module provides the boot_phase_timer class which records how long each phase of a boot test (e.g. the
+boot method, waiting for the end state, each plug-in call point, FFDC and error log cleanup) takes and
+exports the records as CSV, JSON Lines and a Prometheus textfile.
+"""
+
+import array
+import contextlib
+import json
+import os
+import time
+
+import gen_misc as gm
+import gen_print as gp
+
+# The phases recorded by obmc_boot_test in the order in which they occur.  These are the CSV columns.  A
+# phase which does not occur in a given boot (e.g. post_reboot_plug_ins for a boot which does not reboot the
+# BMC) is left blank.
+boot_phase_names = [
+    "pre_boot_plug_ins",
+    "boot_method",
+    "bmc_reboot_wait",
+    "post_reboot_plug_ins",
+    "state_change_wait",
+    "end_state_wait",
+    "post_boot_plug_ins",
+    "post_test_case_plug_ins",
+    "ffdc_check_plug_ins",
+    "ffdc",
+    "errlog_cleanup",
+    "stop_check_plug_ins",
+]
+
+# The percentiles reported in the Prometheus textfile and by sprint_report.
+boot_phase_percentiles = [50, 90, 95, 99]
+
+
+def percentile(sorted_values, percent):
+    r"""
+    Return the given percentile of the sorted values using the nearest-rank method (0.0 if there are no
+    values).
+
+    Description of argument(s):
+    sorted_values                   A sorted list of numbers.
+    percent                         The percentile (e.g. 95).
+    """
+
+    if not sorted_values:
+        return 0.0
+    rank = -(-len(sorted_values) * percent // 100)
+    return sorted_values[max(0, int(rank) - 1)]
+
+
+class boot_phase_timer:
+    r"""
+    This class records the elapsed time of each phase of each boot test.
+
+    Only a compact record is kept in memory for each boot: the boot number, type and status, its start time,
+    its total elapsed time and a tuple of phase times aligned with boot_phase_names.  The elapsed times of
+    each phase are also kept in a float array so that percentiles can be calculated across thousands of
+    boots.  Each record is appended to the CSV and JSON Lines files as soon as the boot ends and the
+    Prometheus textfile is rewritten (via a rename so that a collector never reads a partial file).
+
+    Example use:
+
+    timer = boot_phase_timer(dir_path="/tmp/timing/", file_prefix="bmc1")
+    timer.start_boot(1, "OBMC Reboot (off)")
+    with timer.phase("boot_method"):
+        ...
+    timer.end_boot("PASS")
+    """
+
+    def __init__(self, dir_path="", file_prefix="obmc_boot_test"):
+        r"""
+        Initialize the boot_phase_timer object.
+
+        Description of argument(s):
+        dir_path                    The directory to which the CSV, JSON Lines and Prometheus files are to be
+                                    written.  If this is blank, the records are only kept in memory.
+        file_prefix                 The prefix of the file names (e.g. the BMC nickname).  The files are named
+                                    <file_prefix>.boot_timing.csv, <file_prefix>.boot_timing.jsonl and
+                                    <file_prefix>.boot_timing.prom.
+        """
+
+        self.__dir_path = dir_path
+        if dir_path != "":
+            dir_path = gm.add_trailing_slash(dir_path)
+            if not os.path.isdir(dir_path):
+                os.makedirs(dir_path)
+            file_path_prefix = dir_path + file_prefix + ".boot_timing"
+            self.csv_file_path = file_path_prefix + ".csv"
+            self.jsonl_file_path = file_path_prefix + ".jsonl"
+            self.prom_file_path = file_path_prefix + ".prom"
+        else:
+            self.csv_file_path = ""
+            self.jsonl_file_path = ""
+            self.prom_file_path = ""
+
+        self.records = []
+        self.__phase_times = {
+            name: array.array("d") for name in boot_phase_names
+        }
+        self.__total_times = array.array("d")
+        self.__status_counts = {}
+        self.__boot = None
+
+    def start_boot(self, boot_count, boot_type):
+        r"""
+        Start recording a boot.  Any boot which was started but not ended is discarded.
+
+        Description of argument(s):
+        boot_count                  The boot number.
+        boot_type                   The type of the boot (e.g. "REST Power On").
+        """
+
+        self.__boot = {
+            "boot_count": boot_count,
+            "boot_type": boot_type,
+            "start_time": time.time(),
+            "phases": {},
+        }
+
+    def add_phase_time(self, phase_name, elapsed_time):
+        r"""
+        Add the elapsed time to the given phase of the current boot.  A phase which occurs more than once in a
+        boot is recorded as the sum of its elapsed times.
+
+        Description of argument(s):
+        phase_name                  The name of the phase (e.g. "boot_method").
+        elapsed_time                The elapsed time in seconds.
+        """
+
+        if self.__boot is None:
+            return
+        phases = self.__boot["phases"]
+        phases[phase_name] = phases.get(phase_name, 0.0) + elapsed_time
+
+    @contextlib.contextmanager
+    def phase(self, phase_name):
+        r"""
+        Return a context manager which records the elapsed time of the enclosed code as the given phase.  The
+        time is recorded even if the code raises an exception (e.g. a robot failure).
+
+        Description of argument(s):
+        phase_name                  The name of the phase (e.g. "boot_method").
+        """
+
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            self.add_phase_time(phase_name, time.time() - start_time)
+
+    def end_boot(self, boot_status):
+        r"""
+        Finish recording the current boot, add it to the records and export it.  Return the record.
+
+        Description of argument(s):
+        boot_status                 The status of the boot (e.g. "PASS" or "FAIL").
+        """
+
+        if self.__boot is None:
+            return None
+        boot = self.__boot
+        self.__boot = None
+        total_time = time.time() - boot["start_time"]
+        phases = boot["phases"]
+        record = (
+            boot["boot_count"],
+            boot["boot_type"],
+            boot_status,
+            boot["start_time"],
+            total_time,
+            tuple(phases.get(name) for name in boot_phase_names),
+        )
+        self.records.append(record)
+        self.__total_times.append(total_time)
+        for name, elapsed_time in phases.items():
+            if name not in self.__phase_times:
+                self.__phase_times[name] = array.array("d")
+            self.__phase_times[name].append(elapsed_time)
+        self.__status_counts[boot_status] = (
+            self.__status_counts.get(boot_status, 0) + 1
+        )
+
+        if self.__dir_path != "":
+            self.__write_csv(record)
+            self.__write_jsonl(boot, boot_status, total_time)
+            self.__write_prom(phases, total_time)
+
+        return record
+
+    def get_phase_stats(self, phase_name="total"):
+        r"""
+        Return a dictionary containing the count, sum, min, max and percentiles (e.g. "p95") of the elapsed
+        times of the given phase across all recorded boots.
+
+        Description of argument(s):
+        phase_name                  The name of the phase or "total" for the boots' total elapsed times.
+        """
+
+        if phase_name == "total":
+            values = sorted(self.__total_times)
+        else:
+            values = sorted(self.__phase_times.get(phase_name, []))
+        stats = {
+            "count": len(values),
+            "sum": sum(values),
+            "min": values[0] if values else 0.0,
+            "max": values[-1] if values else 0.0,
+        }
+        for percent in boot_phase_percentiles:
+            stats["p" + str(percent)] = percentile(values, percent)
+        return stats
+
+    def sprint_report(self):
+        r"""
+        Return a report showing the elapsed time statistics of each phase.
+        """
+
+        buffer = "%-25s %7s %10s %10s %10s %10s %10s\n" % (
+            "phase",
+            "count",
+            "p50",
+            "p90",
+            "p95",
+            "p99",
+            "max",
+        )
+        for phase_name in list(self.__phase_times) + ["total"]:
+            stats = self.get_phase_stats(phase_name)
+            if not stats["count"]:
+                continue
+            buffer += "%-25s %7d %10.2f %10.2f %10.2f %10.2f %10.2f\n" % (
+                phase_name,
+                stats["count"],
+                stats["p50"],
+                stats["p90"],
+                stats["p95"],
+                stats["p99"],
+                stats["max"],
+            )
+        return buffer
+
+    def print_report(self, quiet=None):
+        r"""
+        Print the report returned by sprint_report.
+
+        Description of argument(s):
+        quiet                       Only print if this value is 0.  This function will search upward in the
+                                    stack to get the default value.
+        """
+
+        if not self.records:
+            return
+        quiet = int(gm.dft(quiet, gp.get_stack_var("quiet", 0)))
+        gp.qprintn()
+        gp.qprint_timen("Boot phase elapsed times (seconds):")
+        gp.qprint(self.sprint_report())
+
+    def __write_csv(self, record):
+        r"""
+        Append the record to the CSV file, writing a header line first if the file is new.
+        """
+
+        (
+            boot_count,
+            boot_type,
+            boot_status,
+            start_time,
+            total_time,
+            phase_times,
+        ) = record
+        new_file = not os.path.exists(self.csv_file_path)
+        fields = [
+            str(boot_count),
+            '"' + boot_type.replace('"', '""') + '"',
+            boot_status,
+            "%.3f" % start_time,
+            "%.3f" % total_time,
+        ] + ["" if x is None else "%.3f" % x for x in phase_times]
+        with open(self.csv_file_path, "a") as file:
+            if new_file:
+                file.write(
+                    ",".join(
+                        [
+                            "boot_count",
+                            "boot_type",
+                            "status",
+                            "start_time",
+                            "total",
+                        ]
+                        + boot_phase_names
+                    )
+                    + "\n"
+                )
+            file.write(",".join(fields) + "\n")
+
+    def __write_jsonl(self, boot, boot_status, total_time):
+        r"""
+        Append the boot to the JSON Lines file.
+        """
+
+        line = json.dumps(
+            {
+                "boot_count": boot["boot_count"],
+                "boot_type": boot["boot_type"],
+                "status": boot_status,
+                "start_time": round(boot["start_time"], 3),
+                "total": round(total_time, 3),
+                "phases": {
+                    name: round(elapsed_time, 3)
+                    for name, elapsed_time in boot["phases"].items()
+                },
+            }
+        )
+        with open(self.jsonl_file_path, "a") as file:
+            file.write(line + "\n")
+
+    def __write_prom(self, last_phases, last_total_time):
+        r"""
+        Rewrite the Prometheus textfile with the current statistics.
+        """
+
+        lines = [
+            "# HELP obmc_boot_test_boots_total Boots done by status.",
+            "# TYPE obmc_boot_test_boots_total counter",
+        ]
+        for boot_status, count in sorted(self.__status_counts.items()):
+            lines.append(
+                'obmc_boot_test_boots_total{status="%s"} %d'
+                % (boot_status, count)
+            )
+        lines += [
+            "# HELP obmc_boot_test_phase_seconds Elapsed time of each boot"
+            + " phase.",
+            "# TYPE obmc_boot_test_phase_seconds summary",
+        ]
+        for phase_name in list(self.__phase_times) + ["total"]:
+            stats = self.get_phase_stats(phase_name)
+            if not stats["count"]:
+                continue
+            for percent in boot_phase_percentiles:
+                lines.append(
+                    'obmc_boot_test_phase_seconds{phase="%s",quantile="%s"}'
+                    " %.3f"
+                    % (phase_name, percent / 100, stats["p" + str(percent)])
+                )
+            lines.append(
+                'obmc_boot_test_phase_seconds_sum{phase="%s"} %.3f'
+                % (phase_name, stats["sum"])
+            )
+            lines.append(
+                'obmc_boot_test_phase_seconds_count{phase="%s"} %d'
+                % (phase_name, stats["count"])
+            )
+        lines += [
+            "# HELP obmc_boot_test_last_boot_phase_seconds Elapsed time of"
+            + " each phase of the last boot.",
+            "# TYPE obmc_boot_test_last_boot_phase_seconds gauge",
+        ]
+        for phase_name, elapsed_time in list(last_phases.items()) + [
+            ("total", last_total_time)
+        ]:
+            lines.append(
+                'obmc_boot_test_last_boot_phase_seconds{phase="%s"} %.3f'
+                % (phase_name, elapsed_time)
+            )
+        temp_file_path = self.prom_file_path + ".tmp"
+        with open(temp_file_path, "w") as file:
+            file.write("\n".join(lines) + "\n")
+        os.rename(temp_file_path, self.prom_file_path)
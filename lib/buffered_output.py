@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+
+r"""
+See buffered_output_sink class prolog below for details.
+"""
+
+import sys
+import threading
+import time
+
+try:
+    from robot.api import logger
+except ImportError:
+    logger = None
+
+
+class buffered_output_sink(object):
+    r"""
+    buffered_output_sink collects printed fragments in memory and writes them from a background thread so
+    that the printing thread does not pay for a write and flush per fragment.
+
+    Fragments are written in the order in which they were received, with consecutive fragments for the same
+    stream combined into a single write.  Buffered output is written when:
+    - No new fragment has arrived for idle_timeout seconds.
+    - The oldest buffered fragment is max_delay seconds old.
+    - The buffered output reaches max_buffer_size characters.  Writers block until the background thread
+      has taken the buffered output so that memory use is bounded.
+    - A stderr fragment (e.g. an error message) arrives.  The write call returns only once it and all prior
+      fragments have been written.
+    - flush or close is called.
+
+    Example use:
+
+    sink = buffered_output_sink()
+    sink.write("Hi.\n")
+    sink.close()
+    """
+
+    def __init__(
+        self,
+        idle_timeout=0.1,
+        max_delay=1.0,
+        max_buffer_size=1048576,
+        robot_console=False,
+    ):
+        r"""
+        Initialize the buffered_output_sink object and start its writer thread.
+
+        Description of argument(s):
+        idle_timeout                The number of seconds without a new fragment after which buffered
+                                    output is written.
+        max_delay                   The maximum number of seconds that a fragment may be buffered.
+        max_buffer_size             The maximum number of characters to buffer.
+        robot_console               Write to the console as robot's log_to_console does rather than to
+                                    sys.stdout/sys.stderr.
+        """
+        self.idle_timeout = float(idle_timeout)
+        self.max_delay = float(max_delay)
+        self.max_buffer_size = int(max_buffer_size)
+        self.robot_console = robot_console and logger is not None
+        self.__lock = threading.Lock()
+        self.__condition = threading.Condition(self.__lock)
+        # A list of [stream, list of fragments] lists in the order received.
+        self.__fragments = []
+        self.__size = 0
+        self.__first_time = 0.0
+        self.__last_time = 0.0
+        self.__flush_requested = False
+        self.__writing = False
+        self.__closed = False
+        self.__fragment_count = 0
+        self.__character_count = 0
+        self.__write_count = 0
+        self.__thread = threading.Thread(target=self.__write_loop)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def write(self, buffer, stream="stdout"):
+        r"""
+        Buffer the string for writing to the given stream.
+
+        Description of argument(s):
+        buffer                      The string to be written.
+        stream                      Either "stdout" or "stderr".
+        """
+        # This is the hot path so the lock is used directly rather than via the (python-coded) condition.
+        with self.__lock:
+            while self.__size >= self.max_buffer_size and not self.__closed:
+                self.__condition.wait()
+            if self.__closed:
+                self.__write_stream(stream, buffer)
+                return
+            fragments = self.__fragments
+            self.__last_time = time.time()
+            if not fragments:
+                self.__first_time = self.__last_time
+                fragments.append([stream, [buffer]])
+                # The writer thread only needs waking when there is new output for it or the buffer is
+                # full.  Otherwise, it notices new fragments when its idle timeout expires.
+                self.__condition.notify()
+            elif fragments[-1][0] == stream:
+                fragments[-1][1].append(buffer)
+            else:
+                fragments.append([stream, [buffer]])
+            self.__size += len(buffer)
+            self.__fragment_count += 1
+            if self.__size >= self.max_buffer_size:
+                self.__condition.notify()
+        if stream == "stderr":
+            self.flush()
+
+    def flush(self):
+        r"""
+        Wait until all buffered output has been written.
+        """
+        if threading.current_thread() is self.__thread:
+            return
+        with self.__condition:
+            self.__flush_requested = True
+            self.__condition.notify_all()
+            while (
+                self.__fragments or self.__writing
+            ) and self.__thread.is_alive():
+                self.__condition.wait(0.5)
+            if not self.__fragments:
+                self.__flush_requested = False
+
+    def get_stats(self):
+        r"""
+        Return a dictionary containing the number of fragments received and the number of characters and
+        writes written.
+        """
+        return {
+            "fragments": self.__fragment_count,
+            "characters": self.__character_count,
+            "writes": self.__write_count,
+        }
+
+    def close(self):
+        r"""
+        Write all buffered output and stop the writer thread.  Any later writes are done immediately.
+        """
+        self.flush()
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
+        if threading.current_thread() is not self.__thread:
+            self.__thread.join()
+
+    def __write_stream(self, stream, buffer):
+        r"""
+        Write the buffer to the stream and flush it.
+        """
+        self.__write_count += 1
+        self.__character_count += len(buffer)
+        if self.robot_console:
+            logger.console(buffer, newline=False, stream=stream)
+            return
+        file_obj = sys.stdout if stream == "stdout" else sys.stderr
+        file_obj.write(buffer)
+        file_obj.flush()
+
+    def __write_loop(self):
+        r"""
+        Write the buffered output as described in the class prolog until close is called.
+        """
+        while True:
+            with self.__condition:
+                while not self.__fragments and not self.__closed:
+                    self.__condition.wait()
+                if not self.__fragments:
+                    return
+                while not (
+                    self.__closed
+                    or self.__flush_requested
+                    or self.__size >= self.max_buffer_size
+                ):
+                    timeout = (
+                        min(
+                            self.__last_time + self.idle_timeout,
+                            self.__first_time + self.max_delay,
+                        )
+                        - time.time()
+                    )
+                    if timeout <= 0:
+                        break
+                    self.__condition.wait(timeout)
+                batch = self.__fragments
+                self.__fragments = []
+                self.__size = 0
+                self.__flush_requested = False
+                self.__writing = True
+                # Wake any writers blocked on a full buffer.
+                self.__condition.notify_all()
+            try:
+                for stream, fragments in batch:
+                    self.__write_stream(stream, "".join(fragments))
+            except Exception:
+                # A broken stream (e.g. a closed pipe) must not leave flush waiting forever.
+                pass
+            finally:
+                with self.__condition:
+                    self.__writing = False
+                    self.__condition.notify_all()
@@ -5,6 +5,8 @@ This module provides utilities for code updates.
 """
 
 import collections
+import hashlib
+import mmap
 import os
 import re
 import sys
@@ -12,6 +14,7 @@ import tarfile
 import time
 
 from robot.libraries.BuiltIn import BuiltIn
+from robot.utils import timestr_to_secs
 
 robot_pgm_dir_path = os.path.dirname(__file__) + os.sep
 repo_data_path = re.sub("/lib", "/data", robot_pgm_dir_path)
@@ -21,6 +24,219 @@ import bmc_ssh_utils as bsu  # NOQA
 import gen_print as gp  # NOQA
 import gen_robot_keyword as keyword  # NOQA
 import variables as var  # NOQA
+from redfish_event_stream import redfish_event_stream  # NOQA
+
+# This environment variable directs the activation wait functions to re-read
+# the activation state as soon as the BMC sends a Redfish event rather than
+# only when the polling interval expires.
+ACTIVATION_EVENT_DRIVEN = int(
+    os.environ.get("ACTIVATION_EVENT_DRIVEN", 0)
+) or int(BuiltIn().get_variable_value("${ACTIVATION_EVENT_DRIVEN}", default=0))
+
+# The Redfish TaskState values of a task which has finished.
+redfish_task_done_states = ["Completed", "Exception", "Killed", "Cancelled"]
+
+
+class activation_tracker(object):
+    r"""
+    activation_tracker follows the progress of a firmware activation (e.g. the
+    d-bus Activation property of a software object or the TaskState of a
+    Redfish task) until it reaches a desired state and records how long each
+    phase (i.e. each distinct state) took.
+
+    The state is polled with adaptive backoff: the first poll follows
+    min_interval seconds after the start and each poll which finds no change
+    multiplies the interval by backoff_factor up to max_interval.  Any change
+    (including a change in progress percentage) resets the interval to
+    min_interval.  If an event stream is given, a Redfish event also triggers
+    an immediate poll.
+
+    Example use:
+
+    tracker = activation_tracker(lambda: read_dbus_activation(version_id))
+    state = tracker.wait(lambda state: state[0] != var.ACTIVATING, 600)
+    gp.print_vars(tracker.phase_times)
+    """
+
+    def __init__(
+        self,
+        read_state,
+        min_interval=1.0,
+        max_interval=10.0,
+        backoff_factor=2.0,
+        event_stream=None,
+    ):
+        r"""
+        Initialize the activation_tracker object.
+
+        Description of argument(s):
+        read_state                  A function which returns the current
+                                    state as a (phase, progress) tuple or None
+                                    if the state could not be read.
+        min_interval                The minimum number of seconds between
+                                    polls.
+        max_interval                The maximum number of seconds between
+                                    polls.
+        backoff_factor              The factor by which the interval grows
+                                    after each poll which finds no change.
+        event_stream                A started redfish_event_stream object (or
+                                    None) whose events trigger a poll.
+        """
+
+        self.read_state = read_state
+        self.min_interval = float(min_interval)
+        self.max_interval = float(max_interval)
+        self.backoff_factor = float(backoff_factor)
+        self.event_stream = event_stream
+        # The number of seconds spent in each phase in the order in which the
+        # phases were first seen.
+        self.phase_times = collections.OrderedDict()
+        self.poll_count = 0
+        self.read_error_count = 0
+        self.elapsed_time = 0.0
+
+    def wait(self, done, timeout, max_read_errors=None):
+        r"""
+        Poll the state until done(state) returns True and return that state.
+        If the timeout expires first, return the last state read (or None).
+
+        Description of argument(s):
+        done                        A function which is passed a state tuple
+                                    and returns True when the wait is over.
+        timeout                     The maximum number of seconds to wait.
+        max_read_errors             The maximum number of consecutive read
+                                    errors to tolerate.  Exceeding it fails
+                                    the robot test.  None means no limit.
+        """
+
+        start_time = time.time()
+        end_time = start_time + float(timeout)
+        phase_start_time = start_time
+        interval = self.min_interval
+        consecutive_read_errors = 0
+        last_state = None
+        state = None
+        while True:
+            state = self.read_state()
+            self.poll_count += 1
+            now = time.time()
+            if state is None:
+                self.read_error_count += 1
+                consecutive_read_errors += 1
+                if (
+                    max_read_errors is not None
+                    and consecutive_read_errors > max_read_errors
+                ):
+                    BuiltIn().fail(
+                        "Read errors exceeds threshold:\n "
+                        + gp.sprint_vars(
+                            consecutive_read_errors, max_read_errors
+                        )
+                    )
+                state = last_state
+            else:
+                consecutive_read_errors = 0
+                if last_state is None or state != last_state:
+                    interval = self.min_interval
+                else:
+                    interval = min(
+                        interval * self.backoff_factor, self.max_interval
+                    )
+                if last_state is not None and state[0] != last_state[0]:
+                    self.__add_phase_time(
+                        last_state[0], now - phase_start_time
+                    )
+                    phase_start_time = now
+                last_state = state
+                if done(state):
+                    break
+            remaining_time = end_time - now
+            if remaining_time <= 0:
+                break
+            if self.event_stream is not None and self.event_stream.connected:
+                self.event_stream.wait_for_event(min(interval, remaining_time))
+            else:
+                time.sleep(min(interval, remaining_time))
+
+        now = time.time()
+        if last_state is not None:
+            self.__add_phase_time(last_state[0], now - phase_start_time)
+        self.elapsed_time = now - start_time
+        return state
+
+    def __add_phase_time(self, phase, elapsed_time):
+        r"""
+        Add the elapsed time to the given phase.
+        """
+
+        self.phase_times[phase] = (
+            self.phase_times.get(phase, 0.0) + elapsed_time
+        )
+
+
+def start_activation_event_stream(event_driven=None):
+    r"""
+    Start and return a redfish_event_stream for the BMC if event_driven is
+    set.  Otherwise, return None.
+
+    Description of argument(s):
+    event_driven                    Indicates whether an event stream should
+                                    be started.  Defaults to
+                                    ACTIVATION_EVENT_DRIVEN.
+    """
+
+    if event_driven is None:
+        event_driven = ACTIVATION_EVENT_DRIVEN
+    if not int(event_driven):
+        return None
+    event_stream = redfish_event_stream(
+        BuiltIn().get_variable_value("${OPENBMC_HOST}"),
+        BuiltIn().get_variable_value("${OPENBMC_USERNAME}"),
+        BuiltIn().get_variable_value("${OPENBMC_PASSWORD}"),
+        https_port=BuiltIn().get_variable_value("${HTTPS_PORT}") or 443,
+    )
+    event_stream.start()
+    return event_stream
+
+
+def read_dbus_activation(version_id):
+    r"""
+    Return the activation state of the software object as an (Activation,
+    Progress) tuple or None if it could not be read.
+
+    Description of argument(s):
+    version_id                      The version ID of the software object.
+    """
+
+    status, software_state = keyword.run_key(
+        "Read Properties  " + var.SOFTWARE_VERSION_URI + str(version_id),
+        ignore=1,
+    )
+    if status == "FAIL":
+        return None
+    return software_state["Activation"], software_state.get("Progress")
+
+
+def read_redfish_task(task_uri):
+    r"""
+    Return the state of the Redfish task as a (TaskState, PercentComplete,
+    TaskStatus) tuple or None if it could not be read.
+
+    Description of argument(s):
+    task_uri                        The URI of the task (e.g.
+                                    "/redfish/v1/TaskService/Tasks/0").
+    """
+
+    status, task = keyword.run_key(
+        "Redfish.Get Properties  " + task_uri, ignore=1
+    )
+    if status == "FAIL":
+        return None
+    return (
+        task["TaskState"],
+        task.get("PercentComplete"),
+        task.get("TaskStatus"),
+    )
 
 
 def get_bmc_firmware(image_type, sw_dict):
@@ -115,7 +331,9 @@ def delete_all_pnor_images():
         )
 
 
-def wait_for_activation_state_change(version_id, initial_state):
+def wait_for_activation_state_change(
+    version_id, initial_state, timeout="10 minutes", event_driven=None
+):
     r"""
     Wait for the current activation state of ${version_id} to
     change from the state provided by the calling function.
@@ -124,35 +342,75 @@ def wait_for_activation_state_change(version_id, initial_state):
     version_id                      The version ID whose state change we are
                                     waiting for.
     initial_state                   The activation state we want to wait for.
+    timeout                         The maximum amount of time to wait.  This
+                                    value may be expressed in Robot
+                                    Framework's time format (e.g. 1 minute, 2
+                                    min 3 s, 4.5).
+    event_driven                    Indicates whether a Redfish event should
+                                    trigger an immediate read of the
+                                    activation state.  Defaults to
+                                    ACTIVATION_EVENT_DRIVEN.
+
+    The activation state is polled with adaptive backoff (see
+    activation_tracker) rather than every 10 seconds.  A dictionary of the
+    number of seconds spent in each activation state is returned.
     """
 
     keyword.run_key_u("Open Connection And Log In")
-    retry = 0
-    num_read_errors = 0
-    read_fail_threshold = 1
-    while retry < 60:
-        status, software_state = keyword.run_key(
-            "Read Properties  " + var.SOFTWARE_VERSION_URI + str(version_id),
-            ignore=1,
+    event_stream = start_activation_event_stream(event_driven)
+    tracker = activation_tracker(
+        lambda: read_dbus_activation(version_id), event_stream=event_stream
+    )
+    try:
+        tracker.wait(
+            lambda state: state[0] != initial_state,
+            timestr_to_secs(timeout),
+            max_read_errors=1,
         )
-        if status == "FAIL":
-            num_read_errors += 1
-            if num_read_errors > read_fail_threshold:
-                message = "Read errors exceeds threshold:\n " + gp.sprint_vars(
-                    num_read_errors, read_fail_threshold
-                )
-                BuiltIn().fail(message)
-            time.sleep(10)
-            continue
+    finally:
+        if event_stream is not None:
+            event_stream.stop()
+    gp.qprint_var(tracker.phase_times)
+    return tracker.phase_times
 
-        current_state = (software_state)["Activation"]
-        if initial_state == current_state:
-            time.sleep(10)
-            retry += 1
-            num_read_errors = 0
-        else:
-            return
-    return
+
+def wait_for_redfish_task(task_uri, timeout="5 minutes", event_driven=None):
+    r"""
+    Wait for the Redfish task to finish (i.e. reach one of the
+    redfish_task_done_states) and return its final properties.  Fail if it
+    does not finish within the timeout.
+
+    Description of argument(s):
+    task_uri                        The URI of the task (e.g.
+                                    "/redfish/v1/TaskService/Tasks/0").
+    timeout                         The maximum amount of time to wait.  This
+                                    value may be expressed in Robot
+                                    Framework's time format (e.g. 1 minute, 2
+                                    min 3 s, 4.5).
+    event_driven                    Indicates whether a Redfish event should
+                                    trigger an immediate read of the task.
+                                    Defaults to ACTIVATION_EVENT_DRIVEN.
+    """
+
+    event_stream = start_activation_event_stream(event_driven)
+    tracker = activation_tracker(
+        lambda: read_redfish_task(task_uri), event_stream=event_stream
+    )
+    try:
+        state = tracker.wait(
+            lambda state: state[0] in redfish_task_done_states,
+            timestr_to_secs(timeout),
+        )
+    finally:
+        if event_stream is not None:
+            event_stream.stop()
+    gp.qprint_var(tracker.phase_times)
+    if state is None or state[0] not in redfish_task_done_states:
+        BuiltIn().fail(
+            "Task " + task_uri + " did not finish within " + str(timeout) + "."
+        )
+    _, task = keyword.run_key("Redfish.Get Properties  " + task_uri)
+    return task
 
 
 def get_latest_file(dir_path):
@@ -174,6 +432,34 @@ def get_latest_file(dir_path):
     return stdout.split(" ")[-1]
 
 
+def get_manifest_tar(tar_file_path):
+    r"""
+    Read the MANIFEST inside the tarball and return its key/value pairs as a
+    dictionary (e.g. {"purpose": "...", "version": "...", ...}).
+
+    Only the tar headers up to the MANIFEST member and the MANIFEST itself are
+    read.  Nothing is extracted to disk.  An empty dictionary is returned if
+    the tarball has no MANIFEST.
+
+    Description of argument(s):
+    tar_file_path                   The path to the image tarball.
+    """
+
+    manifest = collections.OrderedDict()
+    with tarfile.open(tar_file_path) as tar:
+        for member in tar:
+            BuiltIn().log_to_console(member.name)
+            if os.path.normpath(member.name) != "MANIFEST":
+                continue
+            content = tar.extractfile(member).read()
+            for line in content.decode("utf-8", "ignore").split("\n"):
+                key, sep, value = line.partition("=")
+                if sep:
+                    manifest[key.strip()] = value.strip()
+            break
+    return manifest
+
+
 def get_version_tar(tar_file_path):
     r"""
     Read the image version from the MANIFEST inside the tarball.
@@ -183,23 +469,260 @@ def get_version_tar(tar_file_path):
                                     version inside the MANIFEST.
     """
 
-    version = ""
-    tar = tarfile.open(tar_file_path)
-    for member in tar.getmembers():
-        BuiltIn().log_to_console(member.name)
-        if member.name != "MANIFEST":
-            continue
-        f = tar.extractfile(member)
-        content = f.read()
-        if content.find(b"version=") == -1:
-            # This tar member does not contain the version.
-            continue
-        content = content.decode("utf-8", "ignore").split("\n")
-        content = [x for x in content if "version=" in x]
-        version = content[0].split("=")[-1]
-        break
-    tar.close()
-    return version
+    return get_manifest_tar(tar_file_path).get("version", "")
+
+
+class image_upload_stream(object):
+    r"""
+    image_upload_stream is a file-like object which supplies an image file to
+    an HTTP request body (e.g. the data argument of Upload Image To BMC) from
+    a memory-mapped file, so that memory use stays flat regardless of the
+    image size.
+
+    As the image is read (i.e. sent), its SHA-256 checksum is computed, a
+    progress function is called and the throughput is measured.
+
+    Example use:
+
+    stream = image_upload_stream("/tmp/obmc-phosphor-image.static.mtd.tar")
+    requests.post(url, data=stream, ...)
+    stream.close()
+    print(stream.sprint_stats())
+    """
+
+    def __init__(self, file_path, progress=None, expected_sha256=None):
+        r"""
+        Initialize the image_upload_stream object.
+
+        Description of argument(s):
+        file_path                   The path to the image file.
+        progress                    A function to be called with the number of
+                                    bytes sent so far and the total number of
+                                    bytes after each read.
+        expected_sha256             The expected SHA-256 checksum of the image
+                                    as a hex string.  If specified, close
+                                    fails when the checksum of the data sent
+                                    differs.
+        """
+
+        self.file_path = file_path
+        self.progress = progress
+        self.expected_sha256 = expected_sha256
+        self.__file = open(file_path, "rb")
+        self.total_bytes = os.fstat(self.__file.fileno()).st_size
+        if self.total_bytes:
+            self.__mmap = mmap.mmap(
+                self.__file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                self.__mmap.madvise(mmap.MADV_SEQUENTIAL)
+        else:
+            # An empty file cannot be memory-mapped.
+            self.__mmap = b""
+        self.__position = 0
+        # The offset up to which pages already sent have been released.
+        self.__released_position = 0
+        self.__sha256 = hashlib.sha256()
+        self.start_time = None
+        self.end_time = None
+
+    def __len__(self):
+        r"""
+        Return the size of the image so that the request has a Content-Length
+        header.
+        """
+
+        return self.total_bytes
+
+    def __repr__(self):
+        return (
+            "image_upload_stream("
+            + repr(self.file_path)
+            + ", "
+            + str(self.total_bytes)
+            + " bytes)"
+        )
+
+    def read(self, size=-1):
+        r"""
+        Return the next chunk of the image (or b"" once it has all been read).
+
+        Description of argument(s):
+        size                        The maximum number of bytes to return.  A
+                                    negative value means the rest of the
+                                    image.
+        """
+
+        if self.start_time is None:
+            self.start_time = time.time()
+        if size is None or size < 0:
+            size = self.total_bytes - self.__position
+        chunk = self.__mmap[self.__position : self.__position + size]
+        if not chunk:
+            return b""
+        self.__position += len(chunk)
+        self.__sha256.update(chunk)
+        if (
+            hasattr(mmap, "MADV_DONTNEED")
+            and self.__position - self.__released_position >= 16777216
+        ):
+            # Pages which have been sent are released so that the resident
+            # size of the process does not grow with the size of the image.
+            release_size = (
+                (self.__position - self.__released_position)
+                // mmap.PAGESIZE
+                * mmap.PAGESIZE
+            )
+            self.__mmap.madvise(
+                mmap.MADV_DONTNEED, self.__released_position, release_size
+            )
+            self.__released_position += release_size
+        if self.__position >= self.total_bytes:
+            self.end_time = time.time()
+        if self.progress is not None:
+            self.progress(self.__position, self.total_bytes)
+        return chunk
+
+    def get_sha256(self):
+        r"""
+        Return the SHA-256 checksum (as a hex string) of the data read so far.
+        """
+
+        return self.__sha256.hexdigest()
+
+    def get_stats(self):
+        r"""
+        Return a dictionary containing the number of bytes sent, the elapsed
+        time, the throughput in MiB per second and the SHA-256 checksum.
+        """
+
+        if self.start_time is None:
+            elapsed_time = 0.0
+        else:
+            elapsed_time = (self.end_time or time.time()) - self.start_time
+        stats = collections.OrderedDict()
+        stats["bytes_sent"] = self.__position
+        stats["total_bytes"] = self.total_bytes
+        stats["elapsed_time"] = round(elapsed_time, 3)
+        stats["mib_per_second"] = (
+            round(self.__position / elapsed_time / 1048576, 2)
+            if elapsed_time
+            else 0.0
+        )
+        stats["sha256"] = self.get_sha256()
+        return stats
+
+    def sprint_stats(self):
+        r"""
+        Return a one line summary of the stats returned by get_stats.
+        """
+
+        stats = self.get_stats()
+        return (
+            "Uploaded %d of %d bytes in %.2f seconds (%.2f MiB/s), sha256 %s."
+            % (
+                stats["bytes_sent"],
+                stats["total_bytes"],
+                stats["elapsed_time"],
+                stats["mib_per_second"],
+                stats["sha256"],
+            )
+        )
+
+    def close(self):
+        r"""
+        Release the memory map and the file.
+        """
+
+        if self.__file.closed:
+            return
+        if self.total_bytes:
+            self.__mmap.close()
+        self.__file.close()
+
+    def verify(self):
+        r"""
+        Fail if the entire image was not sent or if its checksum differs from
+        expected_sha256.
+        """
+
+        if self.__position != self.total_bytes:
+            BuiltIn().fail(
+                "Only "
+                + str(self.__position)
+                + " of "
+                + str(self.total_bytes)
+                + " bytes of "
+                + self.file_path
+                + " were sent."
+            )
+        if (
+            self.expected_sha256
+            and self.get_sha256() != self.expected_sha256.lower()
+        ):
+            BuiltIn().fail(
+                "The checksum of the data sent differs from the expected"
+                " checksum:\n"
+                + gp.sprint_varx("sha256", self.get_sha256())
+                + gp.sprint_varx("expected_sha256", self.expected_sha256)
+            )
+
+
+def open_image_upload_stream(
+    image_file_path, expected_sha256=None, quiet=None
+):
+    r"""
+    Return an image_upload_stream object for the image file.  Unless quiet is
+    set, its progress is printed at every 10 percent.
+
+    Description of argument(s):
+    image_file_path                 The path to the image file.
+    expected_sha256                 See image_upload_stream for details.
+    quiet                           Indicates whether progress should be
+                                    printed.  Defaults to the global ${QUIET}.
+    """
+
+    quiet = int(gp.get_var_value(quiet, 0))
+    # The last percentage printed.
+    last_percent = [-10]
+
+    def print_progress(bytes_sent, total_bytes):
+        percent = bytes_sent * 100 // total_bytes
+        if percent >= last_percent[0] + 10:
+            last_percent[0] = percent - percent % 10
+            gp.print_timen(
+                "Uploaded "
+                + str(last_percent[0])
+                + "% of "
+                + os.path.basename(image_file_path)
+                + "."
+            )
+
+    return image_upload_stream(
+        image_file_path,
+        progress=None if quiet else print_progress,
+        expected_sha256=expected_sha256,
+    )
+
+
+def close_image_upload_stream(stream, verify=True):
+    r"""
+    Close the image_upload_stream object, print its upload statistics and (if
+    verify is set) fail if the entire image was not sent or its checksum is
+    not as expected.
+
+    Description of argument(s):
+    stream                          The image_upload_stream object returned
+                                    by open_image_upload_stream.
+    verify                          Indicates whether the stream should be
+                                    verified.
+    """
+
+    stream.close()
+    gp.qprint_timen(stream.sprint_stats())
+    if int(verify):
+        stream.verify()
+    return stream.get_stats()
 
 
 def get_image_version(file_path):
@@ -282,22 +805,21 @@ def verify_image_upload(image_version, timeout=3):
         or image_purpose == var.VERSION_PURPOSE_HOST
     ):
         uri = var.SOFTWARE_VERSION_URI + image_version_id
-        ret_values = ""
-        for itr in range(timeout * 2):
-            status, ret_values = keyword.run_key(
-                "Read Attribute  " + uri + "  Activation"
-            )
-
-            if (
-                (ret_values == var.READY)
-                or (ret_values == var.INVALID)
-                or (ret_values == var.ACTIVE)
-            ):
-                return True, image_version_id
-            else:
-                time.sleep(30)
+        done_states = [var.READY, var.INVALID, var.ACTIVE]
+        tracker = activation_tracker(
+            lambda: (
+                keyword.run_key("Read Attribute  " + uri + "  Activation")[1],
+            ),
+            max_interval=30,
+        )
+        state = tracker.wait(
+            lambda state: state[0] in done_states, float(timeout) * 60
+        )
+        ret_values = state[0]
+        if ret_values in done_states:
+            return True, image_version_id
 
-        # If we exit the for loop, the timeout has been reached
+        # The timeout has been reached.
         gp.print_var(ret_values)
         return False, None
     else:
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+
+r"""
+This module provides the dump_offloader class (see its prolog below) which copies dump files from the BMC to
+the local system over SFTP.
+"""
+
+import collections
+import errno
+import hashlib
+import os
+import shlex
+import threading
+import time
+
+import paramiko
+
+# The number of bytes read from the remote file or from a partial local file at a time.
+offload_block_size = 1048576
+
+
+class dump_offloader(object):
+    r"""
+    dump_offloader copies files (e.g. BMC dumps) from a remote system to a local directory over SFTP.
+
+    - Several files are copied concurrently, each worker thread having its own SSH connection so that the
+      copies are not serialized on a single TCP connection.
+    - Each file is read with SFTP prefetch (i.e. many read requests are kept in flight) so that throughput is
+      not bounded by the network round trip time.
+    - Each file is copied to <target file path>.part and renamed once it is complete and verified.  A copy
+      which fails (e.g. because the connection dropped) is retried, resuming at the end of the partial file.
+      A partial file left by an earlier run is resumed the same way.  A copy which stalls (i.e. no data
+      arrives for read_timeout seconds) fails and is retried the same way.  SSH keepalives are sent so that a
+      connection which dies silently is detected.
+    - The size of each copied file is checked against the remote file's size.  If verify_checksum is set, the
+      remote file's SHA-256 checksum is computed by sha256sum on the remote system while the copy is in
+      progress and is compared with the checksum of the local file.  A file whose checksum differs is copied
+      again from the start.
+    - The throughput of each copy is recorded.
+
+    Example use:
+
+    offloader = dump_offloader(openbmc_host, openbmc_username, openbmc_password)
+    results = offloader.offload(dump_file_paths, "/tmp/ffdc/", "bmc1_")
+    """
+
+    def __init__(
+        self,
+        host,
+        username,
+        password,
+        port=22,
+        max_parallel=4,
+        max_attempts=3,
+        verify_checksum=True,
+        connect_timeout=25,
+        read_timeout=60,
+        keepalive_interval=15,
+    ):
+        r"""
+        Initialize the dump_offloader object.
+
+        Description of argument(s):
+        host                        The host name or IP address of the remote system.
+        username                    The username to login with.
+        password                    The password to login with.
+        port                        The SSH port of the remote system.
+        max_parallel                The maximum number of files to copy concurrently.
+        max_attempts                The maximum number of attempts to copy each file.
+        verify_checksum             Indicates whether the SHA-256 checksum of each copied file should be
+                                    verified.  If the remote system has no sha256sum command, only the size
+                                    is verified.
+        connect_timeout             The number of seconds to allow for connecting and logging in.
+        read_timeout                The number of seconds to wait for data from the remote system before
+                                    failing the copy attempt.
+        keepalive_interval          The number of seconds between SSH keepalive messages.
+        """
+        self.host = host
+        self.username = username
+        self.password = password
+        self.port = int(port or 22)
+        self.max_parallel = max(1, int(max_parallel))
+        self.max_attempts = max(1, int(max_attempts))
+        self.verify_checksum = int(verify_checksum)
+        self.connect_timeout = float(connect_timeout)
+        self.read_timeout = float(read_timeout)
+        self.keepalive_interval = int(keepalive_interval)
+
+    def __connect(self):
+        r"""
+        Create, login and return a new SSH client.
+        """
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(
+            self.host,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            timeout=self.connect_timeout,
+            banner_timeout=self.connect_timeout,
+            auth_timeout=self.connect_timeout,
+            allow_agent=False,
+            look_for_keys=False,
+        )
+        client.get_transport().set_keepalive(self.keepalive_interval)
+        return client
+
+    @staticmethod
+    def __hash_file(file_path, sha256):
+        r"""
+        Add the contents of the local file to the sha256 object.
+        """
+        with open(file_path, "rb") as file:
+            while True:
+                buffer = file.read(offload_block_size)
+                if not buffer:
+                    break
+                sha256.update(buffer)
+
+    def __copy_file(self, client, sftp, result):
+        r"""
+        Copy one remote file as described in the class prolog, updating the result dictionary.
+        """
+        remote_file_path = result["remote_file_path"]
+        targ_file_path = result["targ_file_path"]
+        part_file_path = targ_file_path + ".part"
+        remote_size = sftp.stat(remote_file_path).st_size
+        result["size"] = remote_size
+
+        if (
+            os.path.isfile(targ_file_path)
+            and os.path.getsize(targ_file_path) == remote_size
+            and not os.path.exists(part_file_path)
+        ):
+            # The file was copied by an earlier run.
+            result["status"] = "PASS"
+            return
+
+        checksum_channel = None
+        if self.verify_checksum:
+            # The remote checksum is computed while the file is copied so that it costs no extra time.
+            checksum_channel = client.get_transport().open_session(
+                timeout=self.connect_timeout
+            )
+            checksum_channel.settimeout(self.read_timeout)
+            checksum_channel.exec_command(
+                "sha256sum " + shlex.quote(remote_file_path)
+            )
+
+        offset = 0
+        if os.path.isfile(part_file_path):
+            offset = os.path.getsize(part_file_path)
+            if offset > remote_size:
+                offset = 0
+        sha256 = hashlib.sha256()
+        if offset:
+            self.__hash_file(part_file_path, sha256)
+            result["resumed_from"] = offset
+
+        start_time = time.time()
+        position = offset
+        with sftp.open(remote_file_path, "rb") as remote_file, open(
+            part_file_path, "ab" if offset else "wb"
+        ) as local_file:
+            remote_file.seek(offset)
+            remote_file.prefetch(remote_size)
+            while position < remote_size:
+                buffer = remote_file.read(
+                    min(offload_block_size, remote_size - position)
+                )
+                if not buffer:
+                    break
+                local_file.write(buffer)
+                sha256.update(buffer)
+                position += len(buffer)
+                result["bytes_copied"] += len(buffer)
+        result["elapsed_time"] += time.time() - start_time
+
+        if position != remote_size:
+            raise ValueError(
+                "Copied "
+                + str(position)
+                + " of "
+                + str(remote_size)
+                + " bytes of "
+                + remote_file_path
+                + "."
+            )
+        result["sha256"] = sha256.hexdigest()
+
+        if checksum_channel is not None:
+            stdout = checksum_channel.makefile("r").read()
+            if isinstance(stdout, bytes):
+                stdout = stdout.decode("utf-8", errors="replace")
+            rc = checksum_channel.recv_exit_status()
+            checksum_channel.close()
+            if rc == 0 and stdout.strip():
+                remote_sha256 = stdout.split()[0]
+                if remote_sha256 != result["sha256"]:
+                    # The partial file cannot be trusted so the next attempt starts over.
+                    os.remove(part_file_path)
+                    raise ValueError(
+                        "The checksum of the copy of "
+                        + remote_file_path
+                        + " ("
+                        + result["sha256"]
+                        + ") differs from the remote checksum ("
+                        + remote_sha256
+                        + ")."
+                    )
+                result["checksum_verified"] = True
+
+        os.rename(part_file_path, targ_file_path)
+        result["status"] = "PASS"
+
+    def __work(self, results, next_index, lock):
+        r"""
+        Copy files from the results list until there are none left.  This is run by each worker thread.
+        """
+        client = None
+        sftp = None
+        try:
+            while True:
+                with lock:
+                    index = next_index[0]
+                    next_index[0] += 1
+                if index >= len(results):
+                    return
+                result = results[index]
+                while result["status"] != "PASS":
+                    if result["attempts"] >= self.max_attempts:
+                        result["status"] = "FAIL"
+                        break
+                    result["attempts"] += 1
+                    try:
+                        if client is None:
+                            client = self.__connect()
+                            sftp = client.open_sftp()
+                            # A stalled read raises socket.timeout so that the copy is retried.
+                            sftp.get_channel().settimeout(self.read_timeout)
+                        self.__copy_file(client, sftp, result)
+                        result["error"] = ""
+                    except Exception as exception:
+                        result["error"] = str(exception)
+                        if getattr(exception, "errno", None) == errno.ENOENT:
+                            # The remote file does not exist so there is no point in retrying.
+                            result["status"] = "FAIL"
+                            break
+                        # The connection may be unusable so a new one is made for the next attempt.
+                        if client is not None:
+                            client.close()
+                        client = None
+                        sftp = None
+        finally:
+            if client is not None:
+                client.close()
+
+    def offload(self, remote_file_paths, targ_dir_path, targ_file_prefix=""):
+        r"""
+        Copy the remote files to the target directory and return a list of result dictionaries (one per file,
+        in the order given).
+
+        Example result entry:
+
+        [remote_file_path]:       /var/lib/phosphor-debug-collector/dumps/1/obmcdump_1_1508255216.tar.xz
+        [targ_file_path]:         /tmp/ffdc/bmc1_obmcdump_1_1508255216.tar.xz
+        [status]:                 PASS
+        [error]:
+        [attempts]:               1
+        [size]:                   52428800
+        [resumed_from]:           0
+        [bytes_copied]:           52428800
+        [elapsed_time]:           4.215
+        [mib_per_second]:         11.86
+        [sha256]:                 9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08
+        [checksum_verified]:      True
+
+        Description of argument(s):
+        remote_file_paths           A list of the paths of the files on the remote system.
+        targ_dir_path               The path of the directory to receive the files.
+        targ_file_prefix            A prefix to be prepended to each target file's name.
+        """
+        if not os.path.isdir(targ_dir_path):
+            os.makedirs(targ_dir_path)
+        results = []
+        for remote_file_path in remote_file_paths:
+            result = collections.OrderedDict()
+            result["remote_file_path"] = remote_file_path
+            result["targ_file_path"] = os.path.join(
+                targ_dir_path,
+                targ_file_prefix + os.path.basename(remote_file_path),
+            )
+            result["status"] = ""
+            result["error"] = ""
+            result["attempts"] = 0
+            result["size"] = 0
+            result["resumed_from"] = 0
+            result["bytes_copied"] = 0
+            result["elapsed_time"] = 0.0
+            result["mib_per_second"] = 0.0
+            result["sha256"] = ""
+            result["checksum_verified"] = False
+            results.append(result)
+
+        lock = threading.Lock()
+        next_index = [0]
+        threads = [
+            threading.Thread(
+                target=self.__work, args=(results, next_index, lock)
+            )
+            for _ in range(min(self.max_parallel, len(results)))
+        ]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for result in results:
+            result["elapsed_time"] = round(result["elapsed_time"], 3)
+            if result["elapsed_time"]:
+                result["mib_per_second"] = round(
+                    result["bytes_copied"] / result["elapsed_time"] / 1048576,
+                    2,
+                )
+        return results
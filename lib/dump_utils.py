@@ -9,9 +9,9 @@ import os
 import sys
 
 import bmc_ssh_utils as bsu
+import dump_offload
 import gen_misc as gm
 import gen_print as gp
-import gen_robot_keyword as grk
 from robot.libraries.BuiltIn import BuiltIn
 
 base_path = (
@@ -21,6 +21,13 @@ base_path = (
 sys.path.append(base_path + "data/")
 import variables as var  # NOQA
 
+# The maximum number of dumps which scp_dumps copies concurrently.
+DUMP_OFFLOAD_MAX_PARALLEL = int(
+    os.environ.get("DUMP_OFFLOAD_MAX_PARALLEL", 0)
+) or int(
+    BuiltIn().get_variable_value("${DUMP_OFFLOAD_MAX_PARALLEL}", default=4)
+)
+
 
 def get_dump_dict(quiet=None):
     r"""
@@ -98,11 +105,23 @@ def valid_dump(dump_id, dump_dict=None, quiet=None):
         BuiltIn().fail(gp.sprint_error(message))
 
 
-def scp_dumps(targ_dir_path, targ_file_prefix="", dump_dict=None, quiet=None):
+def scp_dumps(
+    targ_dir_path,
+    targ_file_prefix="",
+    dump_dict=None,
+    quiet=None,
+    max_parallel=None,
+    verify_checksum=1,
+):
     r"""
-    SCP all dumps from the BMC to the indicated directory on the local system
+    Copy all dumps from the BMC to the indicated directory on the local system
     and return a list of the new files.
 
+    The dumps are copied concurrently over SFTP.  Partially copied dumps are
+    resumed and each copy's size and checksum are verified.  See the
+    dump_offloader class for details.  A dump which cannot be copied is
+    reported but is not included in the returned list.
+
     Description of argument(s):
     targ_dir_path                   The path of the directory to receive the
                                     dump files.
@@ -114,23 +133,57 @@ def scp_dumps(targ_dir_path, targ_file_prefix="", dump_dict=None, quiet=None):
                                     the caller's behalf.
     quiet                           If quiet is set to 1, this function will
                                     NOT write status messages to stdout.
+    max_parallel                    The maximum number of dumps to copy
+                                    concurrently.  Defaults to
+                                    DUMP_OFFLOAD_MAX_PARALLEL.
+    verify_checksum                 Indicates whether the SHA-256 checksum of
+                                    each copied dump should be verified.
     """
 
+    quiet = int(gp.get_var_value(quiet, 0))
     targ_dir_path = gm.add_trailing_slash(targ_dir_path)
 
     if dump_dict is None:
         dump_list = get_dump_dict(quiet=quiet)
-
-    status, ret_values = grk.run_key("Open Connection for SCP", quiet=quiet)
+    elif isinstance(dump_dict, dict):
+        dump_list = list(dump_dict.values())
+    else:
+        dump_list = dump_dict
+    dump_list = [file_path for file_path in dump_list if file_path]
+    if not dump_list:
+        return []
+
+    if max_parallel is None:
+        max_parallel = DUMP_OFFLOAD_MAX_PARALLEL
+    offloader = dump_offload.dump_offloader(
+        BuiltIn().get_variable_value("${OPENBMC_HOST}"),
+        BuiltIn().get_variable_value("${OPENBMC_USERNAME}"),
+        BuiltIn().get_variable_value("${OPENBMC_PASSWORD}"),
+        port=BuiltIn().get_variable_value("${SSH_PORT}", default=22),
+        max_parallel=max_parallel,
+        verify_checksum=verify_checksum,
+    )
+    results = offloader.offload(dump_list, targ_dir_path, targ_file_prefix)
 
     dump_file_list = []
-    for file_path in dump_list:
-        targ_file_path = (
-            targ_dir_path + targ_file_prefix + os.path.basename(file_path)
-        )
-        status, ret_values = grk.run_key(
-            "scp.Get File  " + file_path + "  " + targ_file_path, quiet=quiet
-        )
-        dump_file_list.append(targ_file_path)
+    for result in results:
+        if result["status"] == "PASS":
+            dump_file_list.append(result["targ_file_path"])
+            gp.qprint_timen(
+                "Copied "
+                + result["remote_file_path"]
+                + " ("
+                + str(result["bytes_copied"])
+                + " bytes in "
+                + str(result["elapsed_time"])
+                + " seconds, "
+                + str(result["mib_per_second"])
+                + " MiB/s)."
+            )
+        else:
+            gp.print_error(
+                "Failed to copy " + result["remote_file_path"] + ".\n"
+            )
+            gp.print_var(result)
 
     return dump_file_list
@@ -6,12 +6,15 @@ This module provides command execution functions such as cmd_fnc and cmd_fnc_u.
 
 import collections
 import inspect
+import locale
 import os
 import re
+import selectors
 import signal
 import subprocess
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import func_args as fa
 import gen_misc as gm
@@ -76,45 +79,15 @@ def cmd_fnc(
         else:
             return 0, ""
 
-    if return_stderr:
-        err_buf = ""
-        stderr = subprocess.PIPE
-    else:
-        stderr = subprocess.STDOUT
-
-    sub_proc = subprocess.Popen(
-        cmd_buf,
-        bufsize=1,
-        shell=True,
-        universal_newlines=True,
-        executable="/bin/bash",
-        stdout=subprocess.PIPE,
-        stderr=stderr,
+    # Print each line of output as it arrives.
+    line_callback = (
+        (lambda line, stream: gp.gp_print(line)) if print_output else None
+    )
+    shell_rc, out_buf, err_buf, timed_out, child_pid = run_process(
+        cmd_buf, return_stderr=return_stderr, line_callback=line_callback
     )
-    out_buf = ""
-    if return_stderr:
-        for line in sub_proc.stderr:
-            try:
-                err_buf += line
-            except TypeError:
-                line = line.decode("utf-8")
-                err_buf += line
-            if not print_output:
-                continue
-            gp.gp_print(line)
-    for line in sub_proc.stdout:
-        try:
-            out_buf += line
-        except TypeError:
-            line = line.decode("utf-8")
-            out_buf += line
-        if not print_output:
-            continue
-        gp.gp_print(line)
     if print_output and not robot_env:
         sys.stdout.flush()
-    sub_proc.communicate()
-    shell_rc = sub_proc.returncode
     if shell_rc != 0:
         err_msg = "The prior shell command failed.\n"
         err_msg += gp.sprint_var(shell_rc, gp.hexa())
@@ -250,28 +223,189 @@ def parse_command_string(command_string):
     return command_string_dict
 
 
-# Save the original SIGALRM handler for later restoration by shell_cmd.
-original_sigalrm_handler = signal.getsignal(signal.SIGALRM)
+# The result of run_process.  rc is the shell return code (negative if the process was killed by a
+# signal), stdout and stderr are the output strings, timed_out indicates whether the process was killed
+# because it exceeded its time_out and pid is the process ID of the shell.
+process_result = collections.namedtuple(
+    "process_result", "rc stdout stderr timed_out pid"
+)
+
+# The number of seconds to allow for the output pipes to close after a timed-out command's process group
+# has been killed.
+kill_drain_time = 5
+
+
+def kill_process_group(pid, sig=signal.SIGKILL):
+    r"""
+    Send the signal to the process group led by pid, ignoring the error if it no longer exists.
+    """
+
+    try:
+        os.killpg(pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+def decode_output(data):
+    r"""
+    Decode process output bytes as subprocess does with universal_newlines (i.e. "\r\n" and "\r" become
+    "\n").
+    """
+
+    text = data.decode(locale.getpreferredencoding(False), errors="replace")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def run_process(
+    command_string, time_out=None, return_stderr=0, line_callback=None
+):
+    r"""
+    Run the given command string in a bash shell and return a process_result (see above).
+
+    Unlike a time-out implemented with SIGALRM, the time-out here applies only to this call so this function
+    may be used from any thread and by many threads at once.  When a time_out is given, the command runs in
+    its own session (and so its own process group) so that, on time-out, the shell and everything it started
+    are killed.  Otherwise, it stays in the caller's session and process group.
+
+    Description of argument(s):
+    command_string                  The command string to be run in a shell (e.g. "ls /tmp").
+    time_out                        A time-out value expressed in seconds.  If the command string has not
+                                    finished executing within <time_out> seconds, its process group will be
+                                    killed.
+    return_stderr                   If return_stderr is set, stdout and stderr are collected separately.
+                                    Otherwise, stderr is included in stdout and the stderr result is "".
+    line_callback                   A function to be called, on the calling thread, with each line of output
+                                    as it arrives and the name of the stream ("stdout" or "stderr") it came
+                                    from (e.g. lambda line, stream: gp.gp_print(line, stream)).
+    """
+
+    sub_proc = subprocess.Popen(
+        command_string,
+        shell=True,
+        executable="/bin/bash",
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE if return_stderr else subprocess.STDOUT,
+        start_new_session=bool(time_out),
+    )
+    streams = {sub_proc.stdout: "stdout"}
+    if return_stderr:
+        streams[sub_proc.stderr] = "stderr"
+    output = {"stdout": [], "stderr": []}
+    partial_lines = {"stdout": b"", "stderr": b""}
+    timed_out = False
+    end_time = time.time() + float(time_out) if time_out else None
+    try:
+        with selectors.DefaultSelector() as selector:
+            for file_obj in streams:
+                selector.register(file_obj, selectors.EVENT_READ)
+            while selector.get_map():
+                timeout = None
+                if end_time is not None:
+                    timeout = max(0, end_time - time.time())
+                events = selector.select(timeout)
+                if not events and end_time is not None:
+                    if timed_out:
+                        # Something outside the process group holds the pipes open.  Stop waiting.
+                        break
+                    timed_out = True
+                    kill_process_group(sub_proc.pid)
+                    end_time = time.time() + kill_drain_time
+                    continue
+                for key, mask in events:
+                    stream = streams[key.fileobj]
+                    data = os.read(key.fd, 65536)
+                    if data:
+                        output[stream].append(data)
+                    else:
+                        selector.unregister(key.fileobj)
+                    if line_callback is None:
+                        continue
+                    buffer = partial_lines[stream] + data
+                    if data:
+                        lines = buffer.split(b"\n")
+                        partial_lines[stream] = lines.pop()
+                        lines = [line + b"\n" for line in lines]
+                    else:
+                        # End of stream.  Pass along any final unterminated line.
+                        lines = [buffer] if buffer else []
+                        partial_lines[stream] = b""
+                    for line in lines:
+                        line_callback(decode_output(line), stream)
+    except BaseException:
+        # E.g. KeyboardInterrupt.  Don't leave the command running.
+        if time_out:
+            kill_process_group(sub_proc.pid)
+        else:
+            sub_proc.kill()
+        sub_proc.wait()
+        raise
+    finally:
+        for file_obj in streams:
+            file_obj.close()
+    rc = sub_proc.wait()
+
+    return process_result(
+        rc,
+        decode_output(b"".join(output["stdout"])),
+        decode_output(b"".join(output["stderr"])),
+        timed_out,
+        sub_proc.pid,
+    )
 
 
-def shell_cmd_timed_out(signal_number, frame):
+def run_many(
+    command_list, max_parallel=8, time_out=None, return_stderr=0, quiet=None
+):
     r"""
-    Handle an alarm signal generated during the shell_cmd function.
+    Run the given command strings concurrently, at most max_parallel at a time, and return a list of tuples
+    consisting of the shell return code and the output (and stderr if return_stderr is set), in the same
+    order as command_list.
+
+    Example:
+
+    results = run_many(["ping -c 1 host1", "ping -c 1 host2"], max_parallel=2, time_out=10)
+    for shell_rc, output in results:
+        ...
+
+    Description of argument(s):
+    command_list                    A list of command strings to be run in a shell.
+    max_parallel                    The maximum number of commands to run at once.
+    time_out                        A time-out value expressed in seconds that applies to each command (see
+                                    run_process).
+    return_stderr                   See shell_cmd prolog for details.
+    quiet                           If set to 0, this function will print "Issuing: <cmd string>" for each
+                                    command.  When the quiet argument is set to None, this function will
+                                    assign a default value by searching upward in the stack for the quiet
+                                    variable value.  If no such value is found, quiet is set to 0.
     """
 
-    gp.dprint_executing()
-    global command_timed_out
-    command_timed_out = True
-    # Get subprocess pid from shell_cmd's call stack.
-    sub_proc = gp.get_stack_var("sub_proc", 0)
-    pid = sub_proc.pid
-    gp.dprint_var(pid)
-    # Terminate the child process group.
-    os.killpg(pid, signal.SIGKILL)
-    # Restore the original SIGALRM handler.
-    signal.signal(signal.SIGALRM, original_sigalrm_handler)
+    quiet = int(gm.dft(quiet, gp.get_stack_var("quiet", 0)))
+    for command_string in command_list:
+        err_msg = gv.valid_value(command_string)
+        if err_msg:
+            raise ValueError(err_msg)
+        # Print here, on the calling thread, rather than from the worker threads.
+        gp.qprint_issuing(command_string)
+
+    with ThreadPoolExecutor(max_workers=max(1, int(max_parallel))) as executor:
+        result_list = list(
+            executor.map(
+                lambda command_string: run_process(
+                    command_string, time_out, return_stderr
+                ),
+                command_list,
+            )
+        )
 
-    return
+    return [
+        (
+            (result.rc, result.stdout, result.stderr)
+            if return_stderr
+            else (result.rc, result.stdout)
+        )
+        for result in result_list
+    ]
 
 
 def shell_cmd(
@@ -360,16 +494,8 @@ def shell_cmd(
     # Convert each list entry to a signed value.
     valid_rcs = [gm.to_signed(x) for x in valid_rcs]
 
-    stderr = subprocess.PIPE if return_stderr else subprocess.STDOUT
-
-    # Write all output to func_out_history_buf rather than directly to stdout.  This allows us to decide
-    # what to print after all attempts to run the command string have been made.  func_out_history_buf will
-    # contain the complete history from the current invocation of this function.
-    global command_timed_out
-    command_timed_out = False
-    func_out_history_buf = ""
-    for attempt_num in range(1, max_attempts + 1):
-        sub_proc = subprocess.Popen(
+    if fork:
+        return subprocess.Popen(
             command_string,
             bufsize=1,
             shell=True,
@@ -377,23 +503,21 @@ def shell_cmd(
             executable="/bin/bash",
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
-            stderr=stderr,
+            stderr=subprocess.PIPE if return_stderr else subprocess.STDOUT,
         )
-        if fork:
-            return sub_proc
 
-        if time_out:
-            command_timed_out = False
-            # Designate a SIGALRM handling function and set alarm.
-            signal.signal(signal.SIGALRM, shell_cmd_timed_out)
-            signal.alarm(time_out)
-        try:
-            stdout_buf, stderr_buf = sub_proc.communicate()
-        except IOError:
-            command_timed_out = True
-        # Restore the original SIGALRM handler and clear the alarm.
-        signal.signal(signal.SIGALRM, original_sigalrm_handler)
-        signal.alarm(0)
+    # Write all output to func_out_history_buf rather than directly to stdout.  This allows us to decide
+    # what to print after all attempts to run the command string have been made.  func_out_history_buf will
+    # contain the complete history from the current invocation of this function.
+    func_out_history_buf = ""
+    for attempt_num in range(1, max_attempts + 1):
+        (
+            shell_rc,
+            stdout_buf,
+            stderr_buf,
+            command_timed_out,
+            child_pid,
+        ) = run_process(command_string, time_out, return_stderr)
 
         # Output from this loop iteration is written to func_out_buf for later processing.  This can include
         # stdout, stderr and our own error messages.
@@ -402,7 +526,6 @@ def shell_cmd(
             if return_stderr:
                 func_out_buf += stderr_buf
             func_out_buf += stdout_buf
-        shell_rc = sub_proc.returncode
         if shell_rc in valid_rcs:
             # Check output for text indicating there is an error.
             if error_regexes and re.match("|".join(error_regexes), stdout_buf):
@@ -412,7 +535,7 @@ def shell_cmd(
         err_msg = "The prior shell command failed.\n"
         err_msg += gp.sprint_var(attempt_num)
         err_msg += gp.sprint_vars(command_string, command_timed_out, time_out)
-        err_msg += gp.sprint_varx("child_pid", sub_proc.pid)
+        err_msg += gp.sprint_varx("child_pid", child_pid)
         err_msg += gp.sprint_vars(shell_rc, valid_rcs, fmt=gp.hexa())
         if error_regexes:
             err_msg += gp.sprint_vars(error_regexes)
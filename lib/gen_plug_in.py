@@ -206,3 +206,31 @@ def return_plug_in_packages_list(plug_in_dir_paths, mch_class="obmc"):
     )
 
     return plug_in_packages_list
+
+
+def return_plug_in_run_after_list(plug_in_dir_path):
+    r"""
+    Return a list of the names of the plug-ins which the given plug-in must run after.
+
+    The programmer declares such ordering by putting a file named "run_after" into the plug-in package
+    directory.  The file contains plug-in names separated by white space.  Lines beginning with "#" are
+    comments.  The ordering only matters when call point programs are run concurrently (see the max_parallel
+    parm of process_plug_in_packages.py).  Names of plug-ins that are not being run are ignored.
+
+    Description of arguments:
+    plug_in_dir_path                The normalized plug in package directory path (e.g. as returned by
+                                    validate_plug_in_package).
+    """
+
+    run_after_file_path = plug_in_dir_path + "run_after"
+    if not os.path.exists(run_after_file_path):
+        return []
+
+    run_after_list = []
+    with open(run_after_file_path, "r") as file:
+        for line in file:
+            if line.lstrip().startswith("#"):
+                continue
+            run_after_list.extend(line.split())
+
+    return run_after_list
@@ -5,6 +5,7 @@ This module provides many print functions such as sprint_var, sprint_time, sprin
 """
 
 import argparse
+import atexit
 import copy
 import grp
 import inspect
@@ -39,6 +40,7 @@ except ImportError:
     robot_env = 0
 
 import gen_arg as ga
+import secret_redactor as sr
 
 # Setting these variables for use both inside this module and by programs importing this module.
 pgm_file_path = sys.argv[0]
@@ -224,11 +226,6 @@ def get_arg_name(var, arg_num=1, stack_frame_ix=1):
 
     # The user can set environment variable "GET_ARG_NAME_DEBUG" to get debug output from this function.
     local_debug = int(os.environ.get("GET_ARG_NAME_DEBUG", 0))
-    # In addition to GET_ARG_NAME_DEBUG, the user can set environment variable "GET_ARG_NAME_SHOW_SOURCE" to
-    # have this function include source code in the debug output.
-    local_debug_show_source = int(
-        os.environ.get("GET_ARG_NAME_SHOW_SOURCE", 0)
-    )
 
     if stack_frame_ix < 1:
         print_error(
@@ -252,18 +249,11 @@ def get_arg_name(var, arg_num=1, stack_frame_ix=1):
         print("")
         print_call_stack(debug_indent, 2)
 
-    work_around_inspect_stack_cwd_failure()
     for count in range(0, 2):
         try:
-            (
-                frame,
-                filename,
-                cur_line_no,
-                function_name,
-                lines,
-                index,
-            ) = inspect.stack()[stack_frame_ix]
-        except IndexError:
+            frame = sys._getframe(stack_frame_ix)
+        except ValueError:
+            work_around_inspect_stack_cwd_failure()
             print_error(
                 "Programmer error - The caller has asked for"
                 + ' information about the stack frame at index "'
@@ -275,7 +265,7 @@ def get_arg_name(var, arg_num=1, stack_frame_ix=1):
                 + " of range.\n"
             )
             return
-        if filename != "<string>":
+        if frame.f_code.co_filename != "<string>":
             break
         # filename of "<string>" may mean that the function in question was defined dynamically and
         # therefore its code stack is inaccessible.  This may happen with functions like "rqprint_var".  In
@@ -287,6 +277,73 @@ def get_arg_name(var, arg_num=1, stack_frame_ix=1):
 
     real_called_func_name = sprint_func_name(stack_frame_ix)
 
+    cur_line_no = frame.f_lineno
+    function_name = frame.f_code.co_name
+    # Parsing the calling line is expensive so the results are cached by call site.
+    cache_key = (frame.f_code, cur_line_no, real_called_func_name)
+    call_site = call_site_cache.get(cache_key)
+    if call_site is None or local_debug:
+        call_site = parse_call_site(
+            frame, cur_line_no, function_name, real_called_func_name
+        )
+        if call_site is None:
+            return
+        call_site_cache[cache_key] = call_site
+        if len(call_site_cache) > call_site_cache_size:
+            call_site_cache.popitem(last=False)
+    else:
+        call_site_cache.move_to_end(cache_key)
+    lvalues, called_func_name, args_list = call_site
+
+    if arg_num < 0:
+        if abs(arg_num) > len(lvalues):
+            argument = lvalues.copy()
+        else:
+            argument = lvalues[arg_num]
+    elif arg_num == 0:
+        argument = called_func_name
+    else:
+        if arg_num > len(args_list):
+            argument = list(args_list)
+        else:
+            argument = args_list[arg_num - 1]
+
+    if local_debug:
+        print_varx("args_list", args_list, indent=debug_indent)
+        print_varx("argument", argument, indent=debug_indent)
+        print_dashes(0, 120)
+
+    return argument
+
+
+# call_site_cache maps (code object, line number, called function name) to the parsed call site info
+# returned by parse_call_site.  It is used as an LRU cache by get_arg_name.
+call_site_cache = collections.OrderedDict()
+call_site_cache_size = 1024
+
+
+def parse_call_site(frame, cur_line_no, function_name, real_called_func_name):
+    r"""
+    Parse the source code of the line in frame which calls the real_called_func_name function and return a
+    tuple consisting of the lvalues dictionary, the called function name as coded and the list of argument
+    names.  Return None if the calling line cannot be found.
+
+    Description of argument(s):
+    frame                           The stack frame of the caller of real_called_func_name.
+    cur_line_no                     The line number currently being executed in frame.
+    function_name                   The name of the function to which frame belongs.
+    real_called_func_name           The real name of the called function (i.e. not an alias).
+    """
+
+    local_debug = int(os.environ.get("GET_ARG_NAME_DEBUG", 0))
+    # In addition to GET_ARG_NAME_DEBUG, the user can set environment variable "GET_ARG_NAME_SHOW_SOURCE" to
+    # have this function include source code in the debug output.
+    local_debug_show_source = int(
+        os.environ.get("GET_ARG_NAME_SHOW_SOURCE", 0)
+    )
+    debug_indent = 2
+
+    work_around_inspect_stack_cwd_failure()
     module = inspect.getmodule(frame)
 
     # Though one would expect inspect.getsourcelines(frame) to get all module source lines if the frame is
@@ -299,13 +356,13 @@ def get_arg_name(var, arg_num=1, stack_frame_ix=1):
         line_ix = cur_line_no - source_line_num
 
     if local_debug:
-        print("\n  Variables retrieved from inspect.stack() function:")
+        print("\n  Variables retrieved from the stack frame:")
         print_varx("frame", frame, indent=debug_indent + 2)
-        print_varx("filename", filename, indent=debug_indent + 2)
+        print_varx(
+            "filename", frame.f_code.co_filename, indent=debug_indent + 2
+        )
         print_varx("cur_line_no", cur_line_no, indent=debug_indent + 2)
         print_varx("function_name", function_name, indent=debug_indent + 2)
-        print_varx("lines", lines, indent=debug_indent + 2)
-        print_varx("index", index, indent=debug_indent + 2)
         print_varx("source_line_num", source_line_num, indent=debug_indent)
         print_varx("line_ix", line_ix, indent=debug_indent)
         if local_debug_show_source:
@@ -367,7 +424,7 @@ def get_arg_name(var, arg_num=1, stack_frame_ix=1):
             + real_called_func_name
             + '".\n'
         )
-        return
+        return None
 
     # Search forward through the source lines looking for a line whose indentation is the same or less than
     # the start line.  The end of our composite line should be the line preceding that line.
@@ -470,25 +527,7 @@ def get_arg_name(var, arg_num=1, stack_frame_ix=1):
     # Trim whitespace from each list entry.
     args_list = [arg.strip() for arg in args_list]
 
-    if arg_num < 0:
-        if abs(arg_num) > len(lvalues):
-            argument = lvalues
-        else:
-            argument = lvalues[arg_num]
-    elif arg_num == 0:
-        argument = called_func_name
-    else:
-        if arg_num > len(args_list):
-            argument = args_list
-        else:
-            argument = args_list[arg_num - 1]
-
-    if local_debug:
-        print_varx("args_list", args_list, indent=debug_indent)
-        print_varx("argument", argument, indent=debug_indent)
-        print_dashes(0, 120)
-
-    return argument
+    return lvalues, called_func_name, args_list
 
 
 def sprint_time(buffer=""):
@@ -1751,6 +1790,79 @@ def sprintn(buffer=""):
     return buffer
 
 
+# output_sink is the buffered_output_sink object used by gp_print when output buffering has been enabled
+# (see enable_output_buffering).
+output_sink = None
+
+
+def enable_output_buffering(
+    idle_timeout=0.1, max_delay=1.0, max_buffer_size=1048576
+):
+    r"""
+    Have gp_print hand its output to a background writer thread rather than writing and flushing each
+    fragment itself.  This reduces the cost of printing for programs which print a great deal.
+
+    Output is written in order within a fraction of a second, immediately for stderr output (e.g. error
+    messages) and at exit.  Output written directly to sys.stdout (rather than via this module's print
+    functions) may appear ahead of buffered output unless flush_output is called first.
+
+    Buffering may also be enabled by setting the GEN_PRINT_BUFFERED_OUTPUT environment variable.
+
+    Description of argument(s):
+    idle_timeout                    See the buffered_output_sink class prolog for details.
+    max_delay                       See the buffered_output_sink class prolog for details.
+    max_buffer_size                 See the buffered_output_sink class prolog for details.
+    """
+
+    global output_sink
+
+    if output_sink is not None:
+        return
+    import buffered_output
+
+    output_sink = buffered_output.buffered_output_sink(
+        idle_timeout, max_delay, max_buffer_size, robot_console=robot_env
+    )
+    atexit.register(flush_output)
+    # Make sure that buffered output appears ahead of the traceback for an uncaught exception.
+    prior_excepthook = sys.excepthook
+
+    def excepthook(*args):
+        flush_output()
+        prior_excepthook(*args)
+
+    sys.excepthook = excepthook
+
+
+def disable_output_buffering():
+    r"""
+    Write any buffered output, stop output buffering and return the output sink's statistics (i.e. the
+    number of fragments, characters and writes).
+    """
+
+    global output_sink
+
+    if output_sink is None:
+        return {}
+    sink = output_sink
+    output_sink = None
+    sink.close()
+    return sink.get_stats()
+
+
+def flush_output():
+    r"""
+    Wait until any output buffered by gp_print has been written.
+    """
+
+    if output_sink is not None:
+        output_sink.flush()
+
+
+if int(os.environ.get("GEN_PRINT_BUFFERED_OUTPUT", 0)):
+    enable_output_buffering()
+
+
 def gp_print(buffer, stream="stdout"):
     r"""
     Print the buffer using either sys.stdout.write or BuiltIn().log_to_console depending on whether we are
@@ -1763,7 +1875,9 @@ def gp_print(buffer, stream="stdout"):
     stream                          Either "stdout" or "stderr".
     """
 
-    if robot_env:
+    if output_sink is not None:
+        output_sink.write(buffer, stream)
+    elif robot_env:
         BuiltIn().log_to_console(buffer, stream=stream, no_newline=True)
     else:
         if stream == "stdout":
@@ -1892,23 +2006,22 @@ def get_stack_var(var_name, default="", init_stack_ix=2):
                                     function calling this function, etc.
     """
 
-    work_around_inspect_stack_cwd_failure()
     default = get_var_value(var_name=var_name, default=default)
-    return next(
-        (
-            frame[0].f_locals[var_name]
-            for frame in inspect.stack()[init_stack_ix:]
-            if var_name in frame[0].f_locals
-        ),
-        default,
-    )
+    # Walk the frames directly rather than via inspect.stack() which reads source context for every frame.
+    try:
+        frame = sys._getframe(init_stack_ix)
+    except ValueError:
+        return default
+    while frame is not None:
+        if var_name in frame.f_locals:
+            return frame.f_locals[var_name]
+        frame = frame.f_back
+    return default
 
 
 # hidden_text is a list of passwords which are to be replaced with asterisks by print functions defined in
-# this module.
+# this module.  The replacing is done by the redactor shared with other modules (see secret_redactor.py).
 hidden_text = []
-# password_regex is created based on the contents of hidden_text.
-password_regex = ""
 
 
 def register_passwords(*args):
@@ -1924,20 +2037,16 @@ def register_passwords(*args):
     """
 
     global hidden_text
-    global password_regex
 
     for password in args:
         if password == "":
-            break
+            continue
         if password in hidden_text:
-            break
+            continue
 
         # Place the password into the hidden_text list.
         hidden_text.append(password)
-        # Create a corresponding password regular expression.  Escape regex special characters too.
-        password_regex = (
-            "(" + "|".join([re.escape(x) for x in hidden_text]) + ")"
-        )
+    sr.register_secrets(*hidden_text)
 
 
 def replace_passwords(buffer):
@@ -1949,16 +2058,10 @@ def replace_passwords(buffer):
     buffer                          The string to be returned but with passwords replaced.
     """
 
-    global password_regex
-
     if int(os.environ.get("DEBUG_SHOW_PASSWORDS", "0")):
         return buffer
 
-    if password_regex == "":
-        # No passwords to replace.
-        return buffer
-
-    return re.sub(password_regex, "********", buffer)
+    return sr.redact(buffer)
 
 
 def create_print_wrapper_funcs(
@@ -54,6 +54,7 @@ def rprocess_plug_in_packages(
     quiet=None,
     debug=None,
     return_history=False,
+    max_parallel=None,
 ):
     r"""
     Call the external process_plug_in_packages.py to process the plug-in packages.  Return the following:
@@ -98,6 +99,9 @@ def rprocess_plug_in_packages(
 
     history:
       history[0]:                   #(CDT) 2018/10/30 12:25:49 - Running OBMC_Sample/cp_post_stack
+    max_parallel                    The maximum number of call point programs to run concurrently.  See the
+                                    help text of process_plug_in_packages.py for details.  This will default
+                                    to the PLUG_IN_MAX_PARALLEL environment variable or to 1.
     """
 
     rc = 0
@@ -144,6 +148,8 @@ def rprocess_plug_in_packages(
         + " "
         + plug_in_dir_paths
     )
+    if max_parallel is not None:
+        sub_cmd_buf += " --max_parallel=" + str(max_parallel)
     if quiet:
         cmd_buf = sub_cmd_buf + " > " + temp_file_path + " 2>&1"
     else:
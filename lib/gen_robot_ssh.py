@@ -20,11 +20,17 @@ except ImportError:
 
 import func_timer as ft
 import gen_print as gp
+import ssh_connection_pool as sshcp
 
 func_timer = ft.func_timer_class()
 
 sshlib = SSHLibrary()
 
+# Setting SSH_CONNECTION_POOL directs execute_ssh_command to run commands on persistent pooled connections
+# rather than on SSHLibrary connections.  See ssh_connection_pool.py for details.
+if int(BuiltIn().get_variable_value("${SSH_CONNECTION_POOL}", default=0)):
+    sshcp.enable_ssh_connection_pool()
+
 
 def sprint_connection(connection, indent=0):
     r"""
@@ -149,6 +155,83 @@ def login_ssh(login_args={}, max_login_attempts=5):
     raise (except_value)
 
 
+def execute_pooled_ssh_command(
+    cmd_buf, open_connection_args={}, login_args={}, time_out=None
+):
+    r"""
+    Run the given command on a connection from the shared SSH connection pool and return the stdout, stderr
+    and the return code.
+
+    As with execute_ssh_command's SSHLibrary connections, a failure to connect, to login or to reach the
+    target is returned as a return code of 1 with the error text in stderr while any other error (e.g. a
+    time-out) is raised.
+
+    Description of arguments:
+    cmd_buf                         The command string to be run in an SSH session.
+    open_connection_args            See execute_ssh_command for details.  The 'host' and 'port' entries are
+                                    used.
+    login_args                      See execute_ssh_command for details.  The 'username' and 'password'
+                                    entries are used.
+    time_out                        The amount of time to allow for the execution of cmd_buf.  A value of
+                                    None means that there is no limit to how long the command may take.
+    """
+
+    try:
+        stdout, stderr, rc = sshcp.shared_pool.execute_command(
+            cmd_buf,
+            open_connection_args["host"],
+            login_args["username"],
+            login_args["password"],
+            port=open_connection_args.get("port", 22),
+            time_out=time_out,
+        )
+    except (paramiko.SSHException, socket.error, EOFError):
+        except_type, except_value, except_traceback = sys.exc_info()
+        gp.lprint_var(except_type)
+        gp.lprint_varx("except_value", str(except_value))
+        return "", str(except_value), 1
+    BuiltIn().log_to_console(stdout)
+
+    return stdout, stderr, rc
+
+
+def check_ssh_command_results(
+    stdout, stderr, rc, print_out=0, print_err=0, ignore_err=1
+):
+    r"""
+    Print the results of an SSH command and fail if it returned a non-zero return code, as directed by the
+    caller.
+
+    Description of arguments:
+    stdout                          The stdout of the SSH command.
+    stderr                          The stderr of the SSH command.
+    rc                              The return code of the SSH command.
+    print_out                       See execute_ssh_command for details.
+    print_err                       See execute_ssh_command for details.
+    ignore_err                      See execute_ssh_command for details.
+    """
+
+    if rc != 0 and print_err:
+        gp.print_var(rc, gp.hexa())
+        if not print_out:
+            gp.print_var(stderr)
+            gp.print_var(stdout)
+
+    if print_out:
+        gp.printn(stderr + stdout)
+
+    if not ignore_err:
+        message = gp.sprint_error(
+            "The prior SSH"
+            + " command returned a non-zero return"
+            + " code:\n"
+            + gp.sprint_var(rc, gp.hexa())
+            + stderr
+            + "\n"
+        )
+        BuiltIn().should_be_equal(rc, 0, message)
+
+
 def execute_ssh_command(
     cmd_buf,
     open_connection_args={},
@@ -210,6 +293,19 @@ def execute_ssh_command(
     if test_mode:
         return "", "", 0
 
+    if (
+        sshcp.shared_pool is not None
+        and not fork
+        and open_connection_args["alias"] != "device_connection"
+    ):
+        stdout, stderr, rc = execute_pooled_ssh_command(
+            cmd_buf, open_connection_args, login_args, time_out
+        )
+        check_ssh_command_results(
+            stdout, stderr, rc, print_out, print_err, ignore_err
+        )
+        return stdout, stderr, rc
+
     global sshlib
 
     max_exec_cmd_attempts = 2
@@ -339,25 +435,9 @@ def execute_ssh_command(
     if fork:
         return
 
-    if rc != 0 and print_err:
-        gp.print_var(rc, gp.hexa())
-        if not print_out:
-            gp.print_var(stderr)
-            gp.print_var(stdout)
-
-    if print_out:
-        gp.printn(stderr + stdout)
-
-    if not ignore_err:
-        message = gp.sprint_error(
-            "The prior SSH"
-            + " command returned a non-zero return"
-            + " code:\n"
-            + gp.sprint_var(rc, gp.hexa())
-            + stderr
-            + "\n"
-        )
-        BuiltIn().should_be_equal(rc, 0, message)
+    check_ssh_command_results(
+        stdout, stderr, rc, print_out, print_err, ignore_err
+    )
 
     if open_connection_args["alias"] == "device_connection":
         return stdout
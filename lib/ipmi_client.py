@@ -5,9 +5,11 @@ A python companion file for ipmi_client.robot.
 """
 
 import collections
+import os
 
 import gen_cmd as gc
 import gen_print as gp
+import ipmi_lanplus as il
 from robot.libraries.BuiltIn import BuiltIn
 
 # Set default values for required IPMI options.
@@ -33,6 +35,10 @@ ipmi_option_name_map = {
     "H": "host",
 }
 
+# Set by ipmi_setup, which is run before the first ipmitool command string is
+# created rather than at import time.
+ipmi_setup_done = False
+
 
 def create_ipmi_ext_command_string(command, **options):
     r"""
@@ -64,6 +70,9 @@ def create_ipmi_ext_command_string(command, **options):
                                     using default values.
     """
 
+    if not ipmi_setup_done:
+        ipmi_setup()
+
     new_options = collections.OrderedDict()
     for option in ipmi_required_options:
         # This is to prevent boot table "-N 10" vs user input timeout.
@@ -136,12 +145,11 @@ def ipmi_setup():
     Perform all required setup for running iptmitool commands.
     """
 
+    global ipmi_setup_done
+    ipmi_setup_done = True
     verify_ipmi_user_parm_accepted()
 
 
-ipmi_setup()
-
-
 def process_ipmi_user_options(command):
     r"""
     Return the buffer with any ipmi_user_options prepended.
@@ -156,3 +164,113 @@ def process_ipmi_user_options(command):
     if ipmi_user_options == "":
         return command
     return ipmi_user_options + " " + command
+
+
+def native_ipmi_options(command, **options):
+    r"""
+    Return a dictionary of ipmi_lanplus session arguments (host, username,
+    password, etc.) for running the command with the native IPMI client or
+    None if the command should be run with ipmitool.
+
+    The native client is used when the IPMI_NATIVE_CLIENT environment or
+    robot variable is set, the command is one that ipmi_lanplus supports
+    (e.g. "raw ...", "power status", "chassis status") and no ipmitool
+    options other than the required ones (e.g. "C", "P") are given.
+
+    Description of argument(s):
+    command                         The ipmitool command (e.g. 'power status').
+    options                         Any ipmitool options (see
+                                    create_ipmi_ext_command_string).
+    """
+
+    if not (
+        int(os.environ.get("IPMI_NATIVE_CLIENT", 0))
+        or int(
+            BuiltIn().get_variable_value("${IPMI_NATIVE_CLIENT}", default=0)
+        )
+    ):
+        return None
+    if il.parse_ipmi_command(command) is None:
+        return None
+    return native_session_options(**options)
+
+
+def native_session_options(**options):
+    r"""
+    Return a dictionary of ipmi_lanplus session arguments (host, username,
+    password, etc.) built from the given ipmitool options and the default
+    values or None if the options can only be honored by ipmitool.
+
+    Description of argument(s):
+    options                         Any ipmitool options (see
+                                    create_ipmi_ext_command_string).
+    """
+
+    values = {}
+    for option, name in ipmi_option_name_map.items():
+        values[name] = options.pop(option, globals()["ipmi_" + name])
+    if options or values["interface"] != "lanplus":
+        return None
+    if int(values["cipher_suite"]) not in il.cipher_suites:
+        return None
+    del values["interface"]
+    return values
+
+
+def native_ipmi_supported(command, **options):
+    r"""
+    Return True if the command will be run with the native IPMI client (see
+    native_ipmi_options).
+    """
+
+    return native_ipmi_options(command, **options) is not None
+
+
+def execute_native_ipmi_command(
+    command, print_output=1, ignore_err=0, **options
+):
+    r"""
+    Run the command with the native IPMI client and return the return code,
+    stdout and stderr that ipmitool would have produced.
+
+    Description of argument(s):
+    command                         The ipmitool command (e.g. 'power status').
+    print_output                    If this is set, this function will print
+                                    the stdout/stderr generated by the
+                                    command.
+    ignore_err                      Ignore error means that a failure
+                                    encountered by running the command will
+                                    not cause the test to fail.
+    options                         Any ipmitool options (see
+                                    create_ipmi_ext_command_string).
+    """
+
+    native_options = native_ipmi_options(command, **options)
+    gp.qprint_issuing("ipmitool " + command + "  (native lanplus session)")
+    stdout, stderr, rc = il.run_ipmi_command(command, **native_options)
+    if print_output:
+        gp.gp_print(stderr + stdout)
+    if rc and not ignore_err:
+        BuiltIn().fail("The prior IPMI command failed.\n" + stderr)
+    return rc, stdout, stderr
+
+
+def run_native_ipmi_command(command, **options):
+    r"""
+    Run the command with the native IPMI client and return the return code
+    and the combined stderr/stdout (i.e. like robot's "Run And Return RC and
+    Output" does for ipmitool).
+
+    Description of argument(s):
+    command                         The ipmitool command (e.g. 'power status').
+    options                         Any ipmitool options (see
+                                    create_ipmi_ext_command_string).
+    """
+
+    rc, stdout, stderr = execute_native_ipmi_command(
+        command, print_output=0, ignore_err=1, **options
+    )
+    output = stderr + stdout
+    if output.endswith("\n"):
+        output = output[:-1]
+    return rc, output
@@ -0,0 +1,891 @@
+#!/usr/bin/env python3
+
+r"""
+This module provides an in-process IPMI v2.0 RMCP+ ("lanplus") client (see the ipmi_lanplus_session class
+prolog below) along with run_ipmi_command, which runs a subset of ipmitool commands on a shared, persistent
+session and returns ipmitool-compatible output.
+"""
+
+import hashlib
+import hmac
+import os
+import select
+import socket
+import struct
+import threading
+import time
+
+try:
+    from cryptography.hazmat.primitives.ciphers import (
+        Cipher,
+        algorithms,
+        modes,
+    )
+except ImportError:
+    Cipher = None
+
+rmcp_header = b"\x06\x00\xff\x07"
+
+# RMCP+ payload types.
+payload_ipmi = 0x00
+payload_open_session_request = 0x10
+payload_open_session_response = 0x11
+payload_rakp1 = 0x12
+payload_rakp2 = 0x13
+payload_rakp3 = 0x14
+payload_rakp4 = 0x15
+
+# Map cipher suite IDs to their (authentication, integrity, confidentiality) algorithm numbers.
+cipher_suites = {
+    1: (1, 0, 0),
+    2: (1, 1, 0),
+    3: (1, 1, 1),
+    15: (3, 0, 0),
+    16: (3, 4, 0),
+    17: (3, 4, 1),
+}
+
+# Map authentication/integrity algorithm numbers to (hash function, integrity check value length).
+auth_algorithms = {1: (hashlib.sha1, 12), 3: (hashlib.sha256, 16)}
+integrity_algorithms = {1: (hashlib.sha1, 12), 4: (hashlib.sha256, 16)}
+
+# The completion code descriptions used by ipmitool.
+completion_codes = {
+    0x00: "Command completed normally",
+    0xC0: "Node busy",
+    0xC1: "Invalid command",
+    0xC2: "Invalid command on LUN",
+    0xC3: "Timeout",
+    0xC4: "Out of space",
+    0xC5: "Reservation cancelled or invalid",
+    0xC6: "Request data truncated",
+    0xC7: "Request data length invalid",
+    0xC8: "Request data field length limit exceeded",
+    0xC9: "Parameter out of range",
+    0xCA: "Cannot return number of requested data bytes",
+    0xCB: "Requested sensor, data, or record not found",
+    0xCC: "Invalid data field in request",
+    0xCD: "Command illegal for specified sensor or record type",
+    0xCE: "Command response could not be provided",
+    0xCF: "Cannot execute duplicated request",
+    0xD0: "SDR Repository in update mode",
+    0xD1: "Device firmware in update mode",
+    0xD2: "BMC initialization in progress",
+    0xD3: "Destination unavailable",
+    0xD4: "Insufficient privilege level",
+    0xD5: "Command not supported in present state",
+    0xD6: "Cannot execute command, command disabled",
+    0xFF: "Unspecified error",
+}
+
+rakp_status_codes = {
+    0x01: "Insufficient resources to create a session",
+    0x02: "Invalid session ID",
+    0x03: "Invalid payload type",
+    0x04: "Invalid authentication algorithm",
+    0x05: "Invalid integrity algorithm",
+    0x06: "No matching authentication payload",
+    0x07: "No matching integrity payload",
+    0x08: "Inactive session ID",
+    0x09: "Invalid role",
+    0x0A: "Unauthorized role or privilege level requested",
+    0x0B: "Insufficient resources to create a session at the requested role",
+    0x0C: "Invalid name length",
+    0x0D: "Unauthorized name",
+    0x0E: "Unauthorized GUID",
+    0x0F: "Invalid integrity check value",
+    0x10: "Invalid confidentiality algorithm",
+    0x11: "No cipher suite match with proposed security algorithms",
+    0x12: "Illegal or unrecognized parameter",
+}
+
+
+def completion_code_text(completion_code):
+    r"""
+    Return the ipmitool description of the given completion code.
+    """
+    return completion_codes.get(
+        completion_code, "Unknown (0x%02X)" % completion_code
+    )
+
+
+def checksum(data):
+    r"""
+    Return the IPMI two's complement checksum of data.
+    """
+    return -sum(data) & 0xFF
+
+
+class ipmi_lanplus_session(object):
+    r"""
+    ipmi_lanplus_session keeps an authenticated IPMI v2.0 RMCP+ session open with a BMC so that each command
+    does not pay for the Open Session/RAKP handshake which every ipmitool -I lanplus invocation performs.
+
+    Requests are sent with distinct requester sequence numbers so that several may be outstanding at once
+    (see raw_command_list).  A session which stops responding is closed and is re-established on the next
+    request.  BMCs close sessions which have been idle for a while (typically 60 seconds) so, when the
+    session has been idle for more than keepalive_interval seconds, a Get Device ID request is sent to check
+    it before the caller's requests are sent and the session is re-established if it goes unanswered.
+
+    Cipher suites 1, 2, 3, 15, 16 and 17 are supported.  Suites which use AES-CBC-128 confidentiality (3 and
+    17) require the cryptography package.
+
+    Example use:
+
+    session = ipmi_lanplus_session(openbmc_host, ipmi_username, ipmi_password)
+    completion_code, data = session.raw_command(0x06, 0x01)
+    session.close()
+    """
+
+    def __init__(
+        self,
+        host,
+        username,
+        password,
+        port=623,
+        cipher_suite=17,
+        timeout=3,
+        retries=3,
+        privilege_level=4,
+        keepalive_interval=30,
+    ):
+        r"""
+        Initialize the ipmi_lanplus_session object.
+
+        Description of argument(s):
+        host                        The host name or IP address of the BMC.
+        username                    The IPMI username.
+        password                    The IPMI password.
+        port                        The BMC's RMCP port.
+        cipher_suite                The IPMI cipher suite ID (e.g. 3 or 17).
+        timeout                     The number of seconds to wait for each response before resending a
+                                    request.
+        retries                     The number of times to resend a request which has not been answered.
+        privilege_level             The session privilege level (4 = administrator).
+        keepalive_interval          The number of seconds that the session may be idle before it is checked
+                                    with a Get Device ID request.
+        """
+        cipher_suite = int(cipher_suite)
+        if cipher_suite not in cipher_suites:
+            raise ValueError("Unsupported cipher suite: %s" % cipher_suite)
+        self.host = str(host)
+        self.username = str(username).encode("utf-8")
+        self.password = str(password).encode("utf-8")
+        self.port = int(port)
+        self.cipher_suite = cipher_suite
+        (
+            self.__auth_alg,
+            self.__integrity_alg,
+            self.__confidentiality_alg,
+        ) = cipher_suites[cipher_suite]
+        if self.__confidentiality_alg and Cipher is None:
+            raise ValueError(
+                "Cipher suite %s requires the cryptography package"
+                % cipher_suite
+            )
+        self.timeout = float(timeout)
+        self.retries = int(retries)
+        self.privilege_level = int(privilege_level)
+        self.keepalive_interval = float(keepalive_interval)
+        self.active = False
+        self.__lock = threading.RLock()
+        self.__socket = None
+        self.__console_session_id = 0
+        self.__bmc_session_id = 0
+        self.__session_seq = 0
+        self.__rq_seq = 0
+        self.__message_tag = 0
+        self.__k1 = b""
+        self.__k2 = b""
+        self.__last_response_time = 0.0
+
+    def __send(self, payload_type, payload):
+        r"""
+        Send an RMCP+ packet with the given payload, applying the session's confidentiality and integrity
+        algorithms once the session is active.
+        """
+        session_id = 0
+        session_seq = 0
+        if self.active:
+            session_id = self.__bmc_session_id
+            self.__session_seq = (self.__session_seq + 1) & 0xFFFFFFFF or 1
+            session_seq = self.__session_seq
+            if self.__confidentiality_alg:
+                payload_type |= 0x80
+                payload = self.__encrypt(payload)
+            if self.__integrity_alg:
+                payload_type |= 0x40
+        packet = (
+            struct.pack(
+                "<BBIIH",
+                0x06,
+                payload_type,
+                session_id,
+                session_seq,
+                len(payload),
+            )
+            + payload
+        )
+        if payload_type & 0x40:
+            # Pad so that the integrity protected data ends on a 4 byte boundary.
+            pad_length = (4 - (len(packet) + 2) % 4) % 4
+            packet += b"\xff" * pad_length + bytes([pad_length, 0x07])
+            hash_func, icv_length = integrity_algorithms[self.__integrity_alg]
+            packet += hmac.new(self.__k1, packet, hash_func).digest()[
+                :icv_length
+            ]
+        self.__socket.send(rmcp_header + packet)
+
+    def __send_v15(self, message):
+        r"""
+        Send a pre-session IPMI v1.5 packet with the given IPMI message.
+        """
+        self.__socket.send(
+            rmcp_header + struct.pack("<BIIB", 0, 0, 0, len(message)) + message
+        )
+
+    def __receive(self, timeout):
+        r"""
+        Return a (payload type, payload) tuple for the next valid packet received within timeout seconds or
+        None.
+        """
+        end_time = time.time() + max(timeout, 0)
+        while True:
+            remaining = end_time - time.time()
+            if remaining <= 0:
+                return None
+            readable, _, _ = select.select([self.__socket], [], [], remaining)
+            if not readable:
+                return None
+            try:
+                packet = self.__socket.recv(65535)
+            except socket.error:
+                return None
+            if len(packet) < 14 or packet[:4] != rmcp_header:
+                continue
+            if packet[4] == 0x00:
+                # IPMI v1.5 session header (pre-session response).
+                length = packet[13]
+                return payload_ipmi, packet[14 : 14 + length]
+            if packet[4] != 0x06 or len(packet) < 16:
+                continue
+            payload_type = packet[5]
+            (payload_length,) = struct.unpack("<H", packet[14:16])
+            payload = packet[16 : 16 + payload_length]
+            if payload_type & 0x40:
+                if not self.__integrity_alg:
+                    continue
+                hash_func, icv_length = integrity_algorithms[
+                    self.__integrity_alg
+                ]
+                expected = hmac.new(
+                    self.__k1, packet[4:-icv_length], hash_func
+                ).digest()[:icv_length]
+                if not hmac.compare_digest(expected, packet[-icv_length:]):
+                    continue
+            if payload_type & 0x80:
+                try:
+                    payload = self.__decrypt(payload)
+                except ValueError:
+                    continue
+            return payload_type & 0x3F, payload
+
+    def __encrypt(self, payload):
+        r"""
+        Return the payload encrypted with AES-CBC-128 in the RMCP+ format.
+        """
+        pad_length = (16 - (len(payload) + 1) % 16) % 16
+        payload += bytes(range(1, pad_length + 1)) + bytes([pad_length])
+        iv = os.urandom(16)
+        encryptor = Cipher(
+            algorithms.AES(self.__k2[:16]), modes.CBC(iv)
+        ).encryptor()
+        return iv + encryptor.update(payload) + encryptor.finalize()
+
+    def __decrypt(self, payload):
+        r"""
+        Return the decrypted RMCP+ AES-CBC-128 payload.
+        """
+        if len(payload) < 32 or len(payload) % 16:
+            raise ValueError("Invalid encrypted payload length")
+        decryptor = Cipher(
+            algorithms.AES(self.__k2[:16]), modes.CBC(payload[:16])
+        ).decryptor()
+        data = decryptor.update(payload[16:]) + decryptor.finalize()
+        pad_length = data[-1]
+        if pad_length > 15:
+            raise ValueError("Invalid confidentiality pad length")
+        return data[: -(pad_length + 1)]
+
+    def __next_rq_seq(self, pending=()):
+        r"""
+        Return the next 6 bit requester sequence number which is not in pending.
+        """
+        while True:
+            self.__rq_seq = (self.__rq_seq + 1) % 64
+            if self.__rq_seq not in pending:
+                return self.__rq_seq
+
+    @staticmethod
+    def __ipmi_message(netfn, cmd, data, rq_seq, lun=0):
+        r"""
+        Return an IPMI LAN request message.
+        """
+        header = bytes([0x20, (netfn << 2) | (lun & 0x3)])
+        body = bytes([0x81, rq_seq << 2, cmd]) + bytes(data)
+        return (
+            header + bytes([checksum(header)]) + body + bytes([checksum(body)])
+        )
+
+    def __handshake(self, payload_type, payload, response_type):
+        r"""
+        Send a session setup request and return its response payload.
+        """
+        for attempt in range(self.retries + 1):
+            self.__send(payload_type, payload)
+            end_time = time.time() + self.timeout
+            while True:
+                response = self.__receive(end_time - time.time())
+                if response is None:
+                    break
+                if (
+                    response[0] == response_type
+                    and response[1][:1] == payload[:1]
+                ):
+                    return response[1]
+        raise socket.timeout(
+            "No response from %s:%s during IPMI session setup"
+            % (self.host, self.port)
+        )
+
+    def __raise_on_status(self, step, status_code):
+        r"""
+        Raise an error if a session setup status code is not 0.
+        """
+        if status_code:
+            raise ValueError(
+                "IPMI %s failed for %s: %s"
+                % (
+                    step,
+                    self.host,
+                    rakp_status_codes.get(
+                        status_code, "Unknown (0x%02X)" % status_code
+                    ),
+                )
+            )
+
+    def open(self):
+        r"""
+        Establish the RMCP+ session (Open Session, RAKP 1-4 and Set Session Privilege Level).
+        """
+        self.__close()
+        address_info = socket.getaddrinfo(
+            self.host, self.port, 0, socket.SOCK_DGRAM
+        )[0]
+        self.__socket = socket.socket(address_info[0], socket.SOCK_DGRAM)
+        self.__socket.connect(address_info[4])
+        self.__session_seq = 0
+
+        # Get Channel Authentication Capabilities (IPMI v2.0 extended data, administrator level).  Some BMCs
+        # expect this before a session is opened.
+        rq_seq = self.__next_rq_seq()
+        self.__send_v15(self.__ipmi_message(0x06, 0x38, b"\x8e\x04", rq_seq))
+        self.__receive(self.timeout)
+
+        self.__message_tag = (self.__message_tag + 1) & 0xFF
+        tag = self.__message_tag
+        self.__console_session_id = struct.unpack("<I", os.urandom(4))[0] | 1
+        response = self.__handshake(
+            payload_open_session_request,
+            bytes([tag, 0, 0, 0])
+            + struct.pack("<I", self.__console_session_id)
+            + bytes([0, 0, 0, 8, self.__auth_alg, 0, 0, 0])
+            + bytes([1, 0, 0, 8, self.__integrity_alg, 0, 0, 0])
+            + bytes([2, 0, 0, 8, self.__confidentiality_alg, 0, 0, 0]),
+            payload_open_session_response,
+        )
+        self.__raise_on_status("Open Session", response[1])
+        (self.__bmc_session_id,) = struct.unpack("<I", response[8:12])
+
+        hash_func, icv_length = auth_algorithms[self.__auth_alg]
+        # Name-only lookup at the requested privilege level.
+        role = 0x10 | self.privilege_level
+        console_random = os.urandom(16)
+        response = self.__handshake(
+            payload_rakp1,
+            bytes([tag, 0, 0, 0])
+            + struct.pack("<I", self.__bmc_session_id)
+            + console_random
+            + bytes([role, 0, 0, len(self.username)])
+            + self.username,
+            payload_rakp2,
+        )
+        self.__raise_on_status("RAKP 2", response[1])
+        bmc_random = response[8:24]
+        bmc_guid = response[24:40]
+        user_key = self.password[:20].ljust(20, b"\x00")
+        name_data = bytes([role, len(self.username)]) + self.username
+        expected = hmac.new(
+            user_key,
+            struct.pack(
+                "<II", self.__console_session_id, self.__bmc_session_id
+            )
+            + console_random
+            + bmc_random
+            + bmc_guid
+            + name_data,
+            hash_func,
+        ).digest()
+        if not hmac.compare_digest(expected, response[40:]):
+            raise ValueError(
+                "IPMI RAKP 2 failed for %s: invalid password" % self.host
+            )
+
+        sik = hmac.new(
+            user_key, console_random + bmc_random + name_data, hash_func
+        ).digest()
+        self.__k1 = hmac.new(sik, b"\x01" * 20, hash_func).digest()
+        self.__k2 = hmac.new(sik, b"\x02" * 20, hash_func).digest()
+
+        response = self.__handshake(
+            payload_rakp3,
+            bytes([tag, 0, 0, 0])
+            + struct.pack("<I", self.__bmc_session_id)
+            + hmac.new(
+                user_key,
+                bmc_random
+                + struct.pack("<I", self.__console_session_id)
+                + name_data,
+                hash_func,
+            ).digest(),
+            payload_rakp4,
+        )
+        self.__raise_on_status("RAKP 4", response[1])
+        expected = hmac.new(
+            sik,
+            console_random
+            + struct.pack("<I", self.__bmc_session_id)
+            + bmc_guid,
+            hash_func,
+        ).digest()[:icv_length]
+        if not hmac.compare_digest(expected, response[8 : 8 + icv_length]):
+            raise ValueError(
+                "IPMI RAKP 4 failed for %s: invalid integrity check value"
+                % self.host
+            )
+
+        self.active = True
+        completion_code, data, latency = self.__run(
+            [(0x06, 0x3B, [self.privilege_level])]
+        )[0]
+        if completion_code != 0:
+            self.__close()
+            raise ValueError(
+                "IPMI Set Session Privilege Level failed for %s: %s"
+                % (
+                    self.host,
+                    (
+                        "No response"
+                        if completion_code is None
+                        else completion_code_text(completion_code)
+                    ),
+                )
+            )
+
+    def close(self):
+        r"""
+        Close the session.
+        """
+        with self.__lock:
+            self.__close()
+
+    def __close(self):
+        r"""
+        Close the session.  The caller must hold the lock.
+        """
+        if self.active:
+            try:
+                self.__run(
+                    [(0x06, 0x3C, struct.pack("<I", self.__bmc_session_id))],
+                    retries=0,
+                )
+            except socket.error:
+                pass
+        self.active = False
+        if self.__socket is not None:
+            self.__socket.close()
+            self.__socket = None
+
+    def __run(self, request_list, window=16, retries=None):
+        r"""
+        Send the requests on the open session, at most window at a time, and return a list of
+        (completion code, response data, latency) tuples.  The completion code is None for a request which
+        was never answered.
+        """
+        if retries is None:
+            retries = self.retries
+        results = [(None, b"", 0.0)] * len(request_list)
+        # Outstanding requests keyed by requester sequence number.  Each value is a list of [index, netfn,
+        # cmd, message, first send time, last send time, attempts].
+        pending = {}
+        next_index = 0
+        while next_index < len(request_list) or pending:
+            while next_index < len(request_list) and len(pending) < min(
+                window, 63
+            ):
+                request = request_list[next_index]
+                netfn, cmd, data = request[:3]
+                lun = request[3] if len(request) > 3 else 0
+                rq_seq = self.__next_rq_seq(pending)
+                message = self.__ipmi_message(netfn, cmd, data, rq_seq, lun)
+                send_time = time.time()
+                self.__send(payload_ipmi, message)
+                pending[rq_seq] = [
+                    next_index,
+                    netfn,
+                    cmd,
+                    message,
+                    send_time,
+                    send_time,
+                    1,
+                ]
+                next_index += 1
+
+            oldest = min(entry[5] for entry in pending.values())
+            response = self.__receive(oldest + self.timeout - time.time())
+            if response is not None and response[0] == payload_ipmi:
+                message = response[1]
+                if len(message) >= 8:
+                    rq_seq = message[4] >> 2
+                    entry = pending.get(rq_seq)
+                    if (
+                        entry is not None
+                        and message[1] >> 2 == entry[1] | 1
+                        and message[5] == entry[2]
+                    ):
+                        del pending[rq_seq]
+                        self.__last_response_time = time.time()
+                        results[entry[0]] = (
+                            message[6],
+                            bytes(message[7:-1]),
+                            time.time() - entry[4],
+                        )
+                continue
+
+            # Resend or give up on any requests which have timed out.
+            now = time.time()
+            for rq_seq, entry in list(pending.items()):
+                if now - entry[5] < self.timeout:
+                    continue
+                if entry[6] > retries:
+                    del pending[rq_seq]
+                    continue
+                entry[5] = now
+                entry[6] += 1
+                self.__send(payload_ipmi, entry[3])
+        return results
+
+    def raw_command_list(self, request_list, window=16):
+        r"""
+        Send a list of raw requests on the session, with up to window requests outstanding at once, and
+        return a list of (completion code, response data, latency) tuples in the same order.
+
+        The completion code is None for a request which was never answered.  When that happens, the
+        session is closed so that it will be re-established for the next request.
+
+        With a window greater than 1, the BMC may run the requests in any order, and a request whose
+        response is lost is resent and so may be run twice.  Callers should only pipeline requests which
+        are read-only or otherwise idempotent.
+
+        Description of argument(s):
+        request_list                A list of (netfn, cmd, data) or (netfn, cmd, data, lun) tuples where
+                                    data is a bytes-like object or a list of integers.
+        window                      The maximum number of requests to have outstanding at once.
+        """
+        with self.__lock:
+            if (
+                self.active
+                and time.time() - self.__last_response_time
+                > self.keepalive_interval
+            ):
+                # The BMC may have closed the idle session.
+                try:
+                    completion_code = self.__run(
+                        [(0x06, 0x01, b"")], retries=0
+                    )[0][0]
+                except socket.error:
+                    completion_code = None
+                if completion_code is None:
+                    self.active = False
+                    self.__close()
+            if not self.active:
+                self.open()
+            try:
+                results = self.__run(request_list, window)
+            except socket.error:
+                self.__close()
+                raise
+            if any(result[0] is None for result in results):
+                # The BMC has stopped responding (e.g. it is rebooting) so
+                # do not wait for a Close Session response.
+                self.active = False
+                self.__close()
+            return results
+
+    def raw_command(self, netfn, cmd, data=b"", lun=0):
+        r"""
+        Send one raw request on the session and return a (completion code, response data) tuple.
+
+        Description of argument(s):
+        netfn                       The network function (e.g. 0x06).
+        cmd                         The command (e.g. 0x01).
+        data                        The request data bytes.
+        lun                         The responder LUN.
+        """
+        completion_code, data, latency = self.raw_command_list(
+            [(netfn, cmd, data, lun)]
+        )[0]
+        return completion_code, data
+
+
+# Sessions shared by run_ipmi_command keyed by (host, port, username, password, cipher suite).
+sessions = {}
+sessions_lock = threading.Lock()
+
+
+def get_session(
+    host, username, password, port=623, cipher_suite=17, timeout=3
+):
+    r"""
+    Return the shared ipmi_lanplus_session for the given parameters, creating it if necessary.
+
+    See the ipmi_lanplus_session class for a description of the arguments.
+    """
+    key = (
+        str(host),
+        int(port),
+        str(username),
+        str(password),
+        int(cipher_suite),
+    )
+    with sessions_lock:
+        session = sessions.get(key)
+        if session is None:
+            session = ipmi_lanplus_session(
+                host,
+                username,
+                password,
+                port=port,
+                cipher_suite=cipher_suite,
+                timeout=timeout,
+            )
+            sessions[key] = session
+        session.timeout = float(timeout)
+    return session
+
+
+def close_sessions():
+    r"""
+    Close all shared sessions (e.g. prior to a deliberate BMC reboot).
+    """
+    with sessions_lock:
+        session_list = list(sessions.values())
+        sessions.clear()
+    for session in session_list:
+        try:
+            session.close()
+        except socket.error:
+            pass
+
+
+def format_raw_response(data):
+    r"""
+    Return response data formatted as ipmitool raw prints it (e.g. " 00 01 02").
+    """
+    lines = []
+    for index in range(0, len(data), 16):
+        lines.append(
+            "".join(" %02x" % byte for byte in data[index : index + 16])
+        )
+    return "\n".join(lines) + "\n"
+
+
+def format_chassis_status(data):
+    r"""
+    Return Get Chassis Status response data formatted as ipmitool "chassis status" prints it.
+    """
+    restore_policy = ["always-off", "previous", "always-on", "unknown"][
+        (data[0] & 0x60) >> 5
+    ]
+    last_event = " ".join(
+        text
+        for bit, text in [
+            (0x1, "ac-failed"),
+            (0x2, "overload"),
+            (0x4, "interlock"),
+            (0x8, "fault"),
+            (0x10, "command"),
+        ]
+        if data[1] & bit
+    )
+    line_list = [
+        ("System Power", "on" if data[0] & 0x1 else "off"),
+        ("Power Overload", "true" if data[0] & 0x2 else "false"),
+        ("Power Interlock", "active" if data[0] & 0x4 else "inactive"),
+        ("Main Power Fault", "true" if data[0] & 0x8 else "false"),
+        ("Power Control Fault", "true" if data[0] & 0x10 else "false"),
+        ("Power Restore Policy", restore_policy),
+        ("Last Power Event", last_event),
+        ("Chassis Intrusion", "active" if data[2] & 0x1 else "inactive"),
+        ("Front-Panel Lockout", "active" if data[2] & 0x2 else "inactive"),
+        ("Drive Fault", "true" if data[2] & 0x4 else "false"),
+        ("Cooling/Fan Fault", "true" if data[2] & 0x8 else "false"),
+    ]
+    if len(data) > 3:
+        if data[3] == 0:
+            line_list.append(("Front Panel Control", "none"))
+        else:
+            for bit, name in [
+                (0x80, "Sleep Button Disable"),
+                (0x40, "Diag Button Disable"),
+                (0x20, "Reset Button Disable"),
+                (0x10, "Power Button Disable"),
+            ]:
+                line_list.append(
+                    (name, "allowed" if data[3] & bit else "not allowed")
+                )
+            for bit, name in [
+                (0x08, "Sleep Button Disabled"),
+                (0x04, "Diag Button Disabled"),
+                (0x02, "Reset Button Disabled"),
+                (0x01, "Power Button Disabled"),
+            ]:
+                line_list.append((name, "true" if data[3] & bit else "false"))
+    return "".join("%-26s: %s\n" % line for line in line_list)
+
+
+# Map the supported ipmitool power commands to their Chassis Control data byte and ipmitool output.
+power_controls = {
+    "off": (0, "Down/Off"),
+    "on": (1, "Up/On"),
+    "cycle": (2, "Cycle"),
+    "reset": (3, "Reset"),
+    "diag": (4, "Diag"),
+    "soft": (5, "Soft"),
+}
+
+
+def parse_ipmi_command(command):
+    r"""
+    Return a (netfn, cmd, data, formatter) tuple for an ipmitool command string which run_ipmi_command
+    supports natively or None if it is not supported.
+
+    The formatter is a function which takes the response data and returns ipmitool's stdout for the command.
+
+    Description of argument(s):
+    command                         An ipmitool command string (e.g. "raw 0x06 0x01" or "power status").
+    """
+    words = command.split()
+    if not words:
+        return None
+    if words[0] == "raw" and len(words) >= 3:
+        try:
+            values = [int(word, 0) for word in words[1:]]
+        except ValueError:
+            return None
+        if any(value < 0 or value > 0xFF for value in values):
+            return None
+        return values[0], values[1], values[2:], format_raw_response
+    if words == ["power", "status"]:
+        return (
+            0x00,
+            0x01,
+            [],
+            lambda data: "Chassis Power is %s\n"
+            % ("on" if data[0] & 0x1 else "off"),
+        )
+    if len(words) == 2 and words[0] == "power" and words[1] in power_controls:
+        control, text = power_controls[words[1]]
+        return (
+            0x00,
+            0x02,
+            [control],
+            lambda data: "Chassis Power Control: %s\n" % text,
+        )
+    if words == ["chassis", "status"]:
+        return 0x00, 0x01, [], format_chassis_status
+    if words[:2] == ["mc", "reset"] and words[2:] in (["warm"], ["cold"]):
+        return (
+            0x06,
+            0x02 if words[2] == "cold" else 0x03,
+            [],
+            lambda data: "Sent %s reset command to MC\n" % words[2],
+        )
+    return None
+
+
+def run_ipmi_command(
+    command, host, username, password, port=623, cipher_suite=17, timeout=3
+):
+    r"""
+    Run a supported ipmitool command on a shared persistent session and return the stdout, stderr and
+    return code that ipmitool would have produced.
+
+    Raise ValueError if the command is not supported (see parse_ipmi_command).
+
+    Description of argument(s):
+    command                         An ipmitool command string (e.g. "raw 0x06 0x01").
+    host                            The host name or IP address of the BMC.
+    username                        The IPMI username.
+    password                        The IPMI password.
+    port                            The BMC's RMCP port.
+    cipher_suite                    The IPMI cipher suite ID.
+    timeout                         The number of seconds to wait for each response.
+    """
+    parsed_command = parse_ipmi_command(command)
+    if parsed_command is None:
+        raise ValueError("Unsupported native IPMI command: %s" % command)
+    netfn, cmd, data, formatter = parsed_command
+    session = get_session(
+        host, username, password, port, cipher_suite, timeout
+    )
+    try:
+        completion_code, response_data = session.raw_command(netfn, cmd, data)
+    except (ValueError, socket.error) as e:
+        return (
+            "",
+            "Error: Unable to establish IPMI v2 / RMCP+ session\n%s\n" % e,
+            1,
+        )
+    if completion_code is None:
+        return (
+            "",
+            "Unable to send RAW command (channel=0x0 netfn=0x%x lun=0x0"
+            " cmd=0x%x)\n" % (netfn, cmd),
+            1,
+        )
+    if completion_code:
+        return (
+            "",
+            "Unable to send RAW command (channel=0x0 netfn=0x%x lun=0x0"
+            " cmd=0x%x rsp=0x%x): %s\n"
+            % (
+                netfn,
+                cmd,
+                completion_code,
+                completion_code_text(completion_code),
+            ),
+            1,
+        )
+    if netfn == 0x06 and cmd in (0x02, 0x03):
+        # The BMC drops its sessions when it resets.
+        session.close()
+    try:
+        return formatter(response_data), "", 0
+    except IndexError:
+        return (
+            "",
+            "Invalid response length %d for %s\n"
+            % (len(response_data), command),
+            1,
+        )
@@ -5,7 +5,9 @@ Provide useful ipmi functions.
 """
 
 import json
+import os
 import re
+import socket
 import tempfile
 
 import bmc_ssh_utils as bsu
@@ -15,6 +17,7 @@ import gen_print as gp
 import gen_robot_keyword as grk
 import gen_robot_utils as gru
 import ipmi_client as ic
+import ipmi_lanplus as il
 import var_funcs as vf
 from robot.libraries.BuiltIn import BuiltIn
 
@@ -118,6 +121,14 @@ def execute_ipmi_cmd(
         )
 
     if ipmi_cmd_type == "external":
+        if ic.native_ipmi_supported(cmd_string, **options):
+            rc, stdout, stderr = ic.execute_native_ipmi_command(
+                cmd_string,
+                print_output=print_output,
+                ignore_err=ignore_err,
+                **options
+            )
+            return stdout, stderr, rc
         cmd_buf = ic.create_ipmi_ext_command_string(cmd_string, **options)
         rc, stdout, stderr = gc.shell_cmd(
             cmd_buf,
@@ -128,6 +139,240 @@ def execute_ipmi_cmd(
         return stdout, stderr, rc
 
 
+def get_raw_cmd_table_command(table_entry):
+    r"""
+    Return the raw command string (e.g. "0x06 0x01") from an IPMI_RAW_CMD or
+    DCMI_RAW_CMD table entry.
+
+    Description of argument(s):
+    table_entry                     Either a raw command string or a table
+                                    list whose first element is the raw
+                                    command (e.g.
+                                    IPMI_RAW_CMD['Device ID']['Get']).
+    """
+
+    if isinstance(table_entry, (list, tuple)):
+        return table_entry[0]
+    return table_entry
+
+
+def execute_ipmi_raw_cmd_batch(
+    table_entries, window=16, print_output=0, idempotent=0, **options
+):
+    r"""
+    Run a list of IPMI raw commands as one batch and return a list of result
+    dictionaries, one per command, in the same order.
+
+    The commands are run over a single native lanplus session (see
+    ipmi_lanplus.py).  If the ipmitool options can't be honored natively or
+    the session can't be established, the commands are instead run by one
+    "ipmitool exec" process (see execute_ipmi_raw_cmd_batch_file).
+
+    Unless idempotent is set, the commands are sent one at a time in order.
+    Only a batch of commands which may safely be run in any order and more
+    than once (e.g. "Get" commands) should be run with idempotent set, in
+    which case up to window requests are outstanding at once.  In either
+    case, a request which gets no response is resent (as ipmitool does), so a
+    command whose response is lost may be run twice.
+
+    Example result:
+
+    results:
+      [0]:
+        [command]:                   0x06 0x01
+        [completion_code]:           0
+        [response]:                  20 81 06 00 02 bf 00 00 00 00 00
+        [latency]:                   0.0031
+      [1]:
+        [command]:                   0x00 0x08 0x05 0x00 0x00 0x00
+        [completion_code]:           204
+        [response]:
+        [latency]:                   0.0028
+
+    The response is formatted like the IPMI_RAW_CMD table's expected output
+    (i.e. lowercase hex bytes separated by single spaces).  The
+    completion_code is None for a command which got no response.  The
+    latency is the number of seconds from sending the request to receiving
+    its response or None if it was not measured.
+
+    Description of argument(s):
+    table_entries                   A list of raw command strings or table
+                                    entries (see get_raw_cmd_table_command).
+    window                          The maximum number of requests to have
+                                    outstanding on the native session at
+                                    once if idempotent is set.
+    print_output                    If this is set, this function will print
+                                    each command and its result.
+    idempotent                      Indicates that the commands are
+                                    read-only or otherwise safe to pipeline
+                                    (see above).
+    options                         Any ipmitool options (see
+                                    create_ipmi_ext_command_string).
+    """
+
+    command_list = [
+        get_raw_cmd_table_command(entry) for entry in table_entries
+    ]
+    request_list = []
+    for command in command_list:
+        parsed_command = il.parse_ipmi_command("raw " + command)
+        if parsed_command is None:
+            break
+        request_list.append(parsed_command[:3])
+    session_options = ic.native_session_options(**options)
+
+    results = None
+    if session_options is not None and len(request_list) == len(command_list):
+        session = il.get_session(**session_options)
+        gp.qprint_timen(
+            "Running %d IPMI raw commands on a native lanplus session."
+            % len(command_list)
+        )
+        try:
+            response_list = session.raw_command_list(
+                request_list, window if int(idempotent) else 1
+            )
+            results = [
+                {
+                    "command": command,
+                    "completion_code": completion_code,
+                    "response": " ".join("%02x" % byte for byte in data),
+                    "latency": (
+                        None if completion_code is None else round(latency, 6)
+                    ),
+                }
+                for command, (completion_code, data, latency) in zip(
+                    command_list, response_list
+                )
+            ]
+        except (ValueError, socket.error) as e:
+            gp.qprint_timen(
+                "Unable to use the native lanplus session: %s\n"
+                "Falling back to ipmitool exec." % e
+            )
+    if results is None:
+        results = execute_ipmi_raw_cmd_batch_file(command_list, **options)
+
+    if print_output:
+        gp.print_var(results)
+    return results
+
+
+# The ipmitool echo output which follows each command in a batch file.
+batch_end_marker = "ipmi_raw_batch_end"
+
+
+def execute_ipmi_raw_cmd_batch_file(command_list, **options):
+    r"""
+    Run a list of IPMI raw commands with one "ipmitool exec" process and return
+    a list of result dictionaries (see execute_ipmi_raw_cmd_batch).
+
+    Each raw command in the batch file is followed by an ipmitool echo of a
+    marker line so that each command's output can be found in the combined
+    stdout.  Per-command latencies are not available so each latency is None.
+
+    Description of argument(s):
+    command_list                    A list of raw command strings (e.g.
+                                    "0x06 0x01").
+    options                         Any ipmitool options (see
+                                    create_ipmi_ext_command_string).
+    """
+
+    batch_file = tempfile.NamedTemporaryFile(
+        "w", prefix="ipmi_raw_batch_", suffix=".txt", delete=False
+    )
+    try:
+        for index, command in enumerate(command_list):
+            batch_file.write("raw %s\n" % command)
+            batch_file.write("echo %s %d\n" % (batch_end_marker, index))
+        batch_file.close()
+        cmd_buf = ic.create_ipmi_ext_command_string(
+            "exec " + batch_file.name, **options
+        )
+        rc, stdout, stderr = gc.shell_cmd(
+            cmd_buf, print_output=0, ignore_err=1, return_stderr=1
+        )
+    finally:
+        os.remove(batch_file.name)
+
+    # Collect each command's stdout lines.  A command which succeeded prints
+    # at least one (possibly empty) line while one which failed prints none.
+    output_dict = {}
+    line_list = []
+    for line in stdout.splitlines():
+        words = line.split()
+        if len(words) == 2 and words[0] == batch_end_marker:
+            output_dict[int(words[1])] = line_list
+            line_list = []
+        else:
+            line_list.append(line)
+    # ipmitool prints one error line to stderr for each failed raw command.
+    error_list = re.findall(
+        r"Unable to send RAW command \(([^)]*)\)", stderr, re.MULTILINE
+    )
+
+    results = []
+    for index, command in enumerate(command_list):
+        completion_code = None
+        response = ""
+        if output_dict.get(index):
+            completion_code = 0
+            response = " ".join(" ".join(output_dict[index]).split())
+        elif index in output_dict and error_list:
+            match = re.search(r"rsp=(0x[0-9a-fA-F]+)", error_list.pop(0))
+            if match:
+                completion_code = int(match.group(1), 16)
+        results.append(
+            {
+                "command": command,
+                "completion_code": completion_code,
+                "response": response,
+                "latency": None,
+            }
+        )
+    return results
+
+
+def get_ipmi_raw_cmd_latency_stats(results):
+    r"""
+    Return a dictionary of latency statistics (in seconds) for the results
+    returned by execute_ipmi_raw_cmd_batch.
+
+    Example result:
+
+    stats:
+      [count]:                       120
+      [failed]:                      2
+      [min]:                         0.0018
+      [avg]:                         0.0031
+      [p95]:                         0.0052
+      [max]:                         0.0113
+
+    Description of argument(s):
+    results                         The results returned by
+                                    execute_ipmi_raw_cmd_batch.
+    """
+
+    latency_list = sorted(
+        result["latency"]
+        for result in results
+        if result["latency"] is not None
+    )
+    stats = {
+        "count": len(results),
+        "failed": len(
+            [result for result in results if result["completion_code"] != 0]
+        ),
+    }
+    if not latency_list:
+        return stats
+    stats["min"] = latency_list[0]
+    stats["avg"] = round(sum(latency_list) / len(latency_list), 6)
+    stats["p95"] = latency_list[int(0.95 * (len(latency_list) - 1))]
+    stats["max"] = latency_list[-1]
+    return stats
+
+
 def get_lan_print_dict(channel_number="", ipmi_cmd_type="external"):
     r"""
     Get IPMI 'lan print' output and return it as a dictionary.
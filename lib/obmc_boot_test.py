@@ -12,11 +12,6 @@ import re
 import signal
 import time
 
-try:
-    import cPickle as pickle
-except ImportError:
-    import pickle
-
 import socket
 
 import gen_arg as ga
@@ -32,6 +27,7 @@ import pel_utils as pel
 import state as st
 import var_stack as vs
 from boot_data import *
+from boot_timing import boot_phase_timer
 from robot.libraries.BuiltIn import BuiltIn
 from robot.utils import DotDict
 
@@ -87,6 +83,12 @@ redfish_supported = BuiltIn().get_variable_value(
 redfish_rest_supported = BuiltIn().get_variable_value(
     "${REDFISH_REST_SUPPORTED}", default=False
 )
+# If set, the elapsed time of each phase of each boot is exported to CSV, JSON Lines and Prometheus textfiles
+# in this directory.  See boot_timing.py for details.
+boot_timing_dir_path = os.environ.get(
+    "BOOT_TIMING_DIR_PATH", ""
+) or BuiltIn().get_variable_value("${BOOT_TIMING_DIR_PATH}", default="")
+boot_timer = boot_phase_timer()
 redfish_delete_sessions = int(
     BuiltIn().get_variable_value("${REDFISH_DELETE_SESSIONS}", default=1)
 )
@@ -243,6 +245,7 @@ def process_pgm_parms():
     global boot_list
     global boot_stack
     global boot_results_file_path
+    global boot_journal
     global boot_results
     global boot_history
     global ffdc_list_file_path
@@ -250,6 +253,7 @@ def process_pgm_parms():
     global ffdc_summary_list_path
     global boot_table
     global valid_boot_types
+    global boot_timer
 
     if ffdc_dir_path_style == "":
         ffdc_dir_path_style = int(os.environ.get("FFDC_DIR_PATH_STYLE", "0"))
@@ -266,14 +270,15 @@ def process_pgm_parms():
         pgm_name, openbmc_nickname, master_pid
     )
 
-    if os.path.isfile(boot_results_file_path):
-        # We've been called before in this run so we'll load the saved
-        # boot_results and boot_history objects.
-        boot_results, boot_history = pickle.load(
-            open(boot_results_file_path, "rb")
-        )
-    else:
-        boot_results = boot_results(boot_table, boot_pass, boot_fail)
+    # If we've been called before in this run, the boot_results and
+    # boot_history objects are reconstructed from the journal.
+    boot_journal = boot_results_journal(boot_results_file_path)
+    boot_results, boot_history = boot_journal.load(
+        boot_table, boot_pass, boot_fail, max_boot_history
+    )
+
+    if boot_timing_dir_path != "" and boot_timer.csv_file_path == "":
+        boot_timer = boot_phase_timer(boot_timing_dir_path, openbmc_nickname)
 
     ffdc_list_file_path = (
         base_tool_dir_path + openbmc_nickname + "/FFDC_FILE_LIST"
@@ -985,10 +990,11 @@ def run_boot(boot):
 
     print_test_start_message(boot)
 
-    plug_in_setup()
-    rc, shell_rc, failed_plug_in_name = grpi.rprocess_plug_in_packages(
-        call_point="pre_boot"
-    )
+    with boot_timer.phase("pre_boot_plug_ins"):
+        plug_in_setup()
+        rc, shell_rc, failed_plug_in_name = grpi.rprocess_plug_in_packages(
+            call_point="pre_boot"
+        )
     if rc != 0:
         error_message = (
             "Plug-in failed with non-zero return code.\n"
@@ -1008,18 +1014,23 @@ def run_boot(boot):
         gp.qprintn()
 
         if boot_table[boot]["method_type"] == "keyword":
-            rk.my_run_keywords(
-                boot_table[boot].get("lib_file_path", ""),
-                boot_table[boot]["method"],
-                quiet=quiet,
-            )
+            with boot_timer.phase("boot_method"):
+                rk.my_run_keywords(
+                    boot_table[boot].get("lib_file_path", ""),
+                    boot_table[boot]["method"],
+                    quiet=quiet,
+                )
 
         if boot_table[boot]["bmc_reboot"]:
-            st.wait_for_comm_cycle(int(state["epoch_seconds"]))
-            plug_in_setup()
-            rc, shell_rc, failed_plug_in_name = grpi.rprocess_plug_in_packages(
-                call_point="post_reboot"
-            )
+            with boot_timer.phase("bmc_reboot_wait"):
+                st.wait_for_comm_cycle(int(state["epoch_seconds"]))
+            with boot_timer.phase("post_reboot_plug_ins"):
+                plug_in_setup()
+                (
+                    rc,
+                    shell_rc,
+                    failed_plug_in_name,
+                ) = grpi.rprocess_plug_in_packages(call_point="post_reboot")
             if rc != 0:
                 error_message = "Plug-in failed with non-zero return code.\n"
                 error_message += gp.sprint_var(rc, fmt=gp.hexa())
@@ -1029,28 +1040,31 @@ def run_boot(boot):
             match_state = st.anchor_state(state)
             del match_state["epoch_seconds"]
             # Wait for the state to change in any way.
-            st.wait_state(
-                match_state,
-                wait_time=state_change_timeout,
-                interval="10 seconds",
-                invert=1,
-            )
+            with boot_timer.phase("state_change_wait"):
+                st.wait_state(
+                    match_state,
+                    wait_time=state_change_timeout,
+                    interval="10 seconds",
+                    invert=1,
+                )
 
         gp.qprintn()
         if boot_table[boot]["end"]["chassis"] == "Off":
             boot_timeout = power_off_timeout
         else:
             boot_timeout = power_on_timeout
-        st.wait_state(
-            boot_table[boot]["end"],
-            wait_time=boot_timeout,
-            interval="10 seconds",
-        )
+        with boot_timer.phase("end_state_wait"):
+            st.wait_state(
+                boot_table[boot]["end"],
+                wait_time=boot_timeout,
+                interval="10 seconds",
+            )
 
-    plug_in_setup()
-    rc, shell_rc, failed_plug_in_name = grpi.rprocess_plug_in_packages(
-        call_point="post_boot"
-    )
+    with boot_timer.phase("post_boot_plug_ins"):
+        plug_in_setup()
+        rc, shell_rc, failed_plug_in_name = grpi.rprocess_plug_in_packages(
+            call_point="post_boot"
+        )
     if rc != 0:
         error_message = (
             "Plug-in failed with non-zero return code.\n"
@@ -1085,6 +1099,7 @@ def test_loop_body():
 
     boot_count += 1
     gp.qprint_timen("Starting boot " + str(boot_count) + ".")
+    boot_timer.start_boot(boot_count, next_boot)
 
     pre_boot_plug_in_setup()
 
@@ -1112,23 +1127,29 @@ def test_loop_body():
     gp.qprint(completion_msg)
 
     boot_results.update(next_boot, boot_status)
-
-    plug_in_setup()
-    # NOTE: A post_test_case call point failure is NOT counted as a boot
-    # failure.
-    rc, shell_rc, failed_plug_in_name = grpi.rprocess_plug_in_packages(
-        call_point="post_test_case", stop_on_plug_in_failure=0
+    boot_journal.append(
+        next_boot, boot_status, boot_history[-1] if boot_history else ""
     )
 
-    plug_in_setup()
-    rc, shell_rc, failed_plug_in_name = grpi.rprocess_plug_in_packages(
-        call_point="ffdc_check",
-        shell_rc=dump_ffdc_rc(),
-        stop_on_plug_in_failure=1,
-        stop_on_non_zero_rc=1,
-    )
+    with boot_timer.phase("post_test_case_plug_ins"):
+        plug_in_setup()
+        # NOTE: A post_test_case call point failure is NOT counted as a boot
+        # failure.
+        rc, shell_rc, failed_plug_in_name = grpi.rprocess_plug_in_packages(
+            call_point="post_test_case", stop_on_plug_in_failure=0
+        )
+
+    with boot_timer.phase("ffdc_check_plug_ins"):
+        plug_in_setup()
+        rc, shell_rc, failed_plug_in_name = grpi.rprocess_plug_in_packages(
+            call_point="ffdc_check",
+            shell_rc=dump_ffdc_rc(),
+            stop_on_plug_in_failure=1,
+            stop_on_non_zero_rc=1,
+        )
     if ffdc_check == "All" or shell_rc == dump_ffdc_rc():
-        status, ret_values = grk.run_key_u("my_ffdc", ignore=1)
+        with boot_timer.phase("ffdc"):
+            status, ret_values = grk.run_key_u("my_ffdc", ignore=1)
         if status != "PASS":
             gp.qprint_error("Call to my_ffdc failed.\n")
             # Leave a record for caller that "soft" errors occurred.
@@ -1136,31 +1157,38 @@ def test_loop_body():
             gpu.save_plug_in_value(soft_errors, pgm_name)
 
     if delete_errlogs:
-        # print error logs before delete
-        if redfish_support_trans_state:
-            status, error_logs = grk.run_key_u("Get Redfish Event Logs")
-            log.print_error_logs(
-                error_logs, "AdditionalDataURI Message Severity"
-            )
-        else:
-            status, error_logs = grk.run_key_u("Get Error Logs")
-            log.print_error_logs(error_logs, "AdditionalData Message Severity")
-        pels = pel.peltool("-l", ignore_err=1)
-        gp.qprint_var(pels)
-
-        # We need to purge error logs between boots or they build up.
-        grk.run_key(delete_errlogs_cmd, ignore=1)
-        grk.run_key(delete_bmcdump_cmd, ignore=1)
-        if redfish_support_trans_state:
-            grk.run_key(delete_sysdump_cmd, ignore=1)
+        with boot_timer.phase("errlog_cleanup"):
+            # print error logs before delete
+            if redfish_support_trans_state:
+                status, error_logs = grk.run_key_u("Get Redfish Event Logs")
+                log.print_error_logs(
+                    error_logs, "AdditionalDataURI Message Severity"
+                )
+            else:
+                status, error_logs = grk.run_key_u("Get Error Logs")
+                log.print_error_logs(
+                    error_logs, "AdditionalData Message Severity"
+                )
+            pels = pel.get_pel_index(ignore_err=1).pel_data
+            gp.qprint_var(pels)
+
+            # We need to purge error logs between boots or they build up.
+            grk.run_key(delete_errlogs_cmd, ignore=1)
+            grk.run_key(delete_bmcdump_cmd, ignore=1)
+            if redfish_support_trans_state:
+                grk.run_key(delete_sysdump_cmd, ignore=1)
 
     boot_results.print_report()
     gp.qprint_timen("Finished boot " + str(boot_count) + ".")
 
-    plug_in_setup()
-    rc, shell_rc, failed_plug_in_name = grpi.rprocess_plug_in_packages(
-        call_point="stop_check", shell_rc=stop_test_rc(), stop_on_non_zero_rc=1
-    )
+    with boot_timer.phase("stop_check_plug_ins"):
+        plug_in_setup()
+        rc, shell_rc, failed_plug_in_name = grpi.rprocess_plug_in_packages(
+            call_point="stop_check",
+            shell_rc=stop_test_rc(),
+            stop_on_non_zero_rc=1,
+        )
+    boot_timer.end_boot(boot_status)
     if shell_rc == stop_test_rc():
         message = "Stopping as requested by user.\n"
         gp.qprint_time(message)
@@ -1190,16 +1218,17 @@ def obmc_boot_test_teardown():
             call_point="cleanup", stop_on_plug_in_failure=0
         )
 
-    if "boot_results_file_path" in globals():
-        # Save boot_results and boot_history objects to a file in case they are
-        # needed again.
-        gp.qprint_timen("Saving boot_results to the following path.")
-        gp.qprint_var(boot_results_file_path)
-        pickle.dump(
-            (boot_results, boot_history),
-            open(boot_results_file_path, "wb"),
-            pickle.HIGHEST_PROTOCOL,
+    boot_timer.print_report()
+
+    if "boot_journal" in globals():
+        # Each boot's results were appended to the journal as the boot
+        # finished.  Make sure they are on disk in case they are needed again.
+        gp.qprint_timen(
+            "Syncing the boot_results journal at the following path."
         )
+        gp.qprint_var(boot_results_file_path)
+        boot_journal.close()
+        boot_journal.compact()
 
     global save_stack
     # Restore any global values saved on the save_stack.
@@ -1364,7 +1393,7 @@ def obmc_boot_test_py(
         else:
             status, error_logs = grk.run_key_u("Get Error Logs")
             log.print_error_logs(error_logs, "AdditionalData Message Severity")
-        pels = pel.peltool("-l", ignore_err=1)
+        pels = pel.get_pel_index(ignore_err=1).pel_data
         gp.qprint_var(pels)
 
         # Delete errlogs prior to doing any boot tests.
@@ -4,6 +4,7 @@ r"""
 PEL functions.
 """
 
+import bisect
 import json
 import os
 import sys
@@ -74,6 +75,235 @@ def peltool(option_string, parse_json=True, **bsu_options):
     return out_buf
 
 
+class PelIndex:
+    r"""
+    Cache of parsed "peltool -l" data which is refreshed incrementally.
+
+    On refresh, the BMC lists PELs newest first ("peltool -lr") and the
+    listing is cut off on the BMC at the newest PEL already cached so that
+    only new PELs are transferred and parsed.  The PEL count ("peltool -n")
+    is obtained by the same command.  If it shows that PELs were deleted
+    (e.g. by "peltool -D"), the whole listing is fetched again.
+
+    Lookups by SRC, severity and commit time are indexed.
+
+    Example:
+
+    pel_index = PelIndex()
+    pel_index.refresh()
+    pel_ids = pel_index.get_pel_ids(src="BD8D1002", severity="Predictive Error")
+    """
+
+    def __init__(
+        self, include_hidden_pels=False, include_informational_pels=False
+    ):
+        r"""
+        Description of argument(s):
+        include_hidden_pels           True/False (default: False).
+                                      Set True to include hidden PELs.
+        include_informational_pels    True/False (default: False).
+                                      Set True to include informational PELs.
+        """
+
+        self.filter_option_string = ""
+        if include_hidden_pels:
+            self.filter_option_string += " -h"
+        if include_informational_pels:
+            self.filter_option_string += " -f"
+        self.clear()
+
+    def clear(self):
+        r"""
+        Discard all cached PEL data.
+        """
+
+        # PEL data keyed by PEL ID in "peltool -l" order.
+        self.pel_data = {}
+        self.pel_count = None
+        self.src_index = {}
+        self.severity_index = {}
+        # A sorted list of (commit time epoch seconds, PEL ID) tuples.
+        self.time_index = []
+
+    def refresh(self, **bsu_options):
+        r"""
+        Fetch any PELs which are not yet cached and return the PEL data
+        dictionary (keyed by PEL ID).  Raise PeltoolException if the peltool
+        output cannot be parsed unless ignore_err is set in bsu_options, in
+        which case the error is printed and the emptied PEL data dictionary is
+        returned.
+
+        Description of argument(s):
+        bsu_options                     Options to be passed directly to
+                                        bmc_execute_command. See its prolog for
+                                        details.
+        """
+
+        option_string = (
+            "-n"
+            + self.filter_option_string
+            + " ; peltool -l -r"
+            + self.filter_option_string
+        )
+        if self.pel_data:
+            # Stop the listing at the newest cached PEL.  Its ID followed by a
+            # colon only appears as the key of its entry.
+            last_pel_id = next(reversed(self.pel_data))
+            option_string += (
+                " | awk -v id='\"" + last_pel_id + "\":'"
+                " 'index($0, id) {exit} {print}'"
+            )
+        out_buf = peltool(option_string, parse_json=False, **bsu_options)
+
+        count_buf, _, list_buf = out_buf.partition("}")
+        list_buf = list_buf.strip() or "{}"
+        try:
+            pel_count = list(json.loads(count_buf + "}").values())[0]
+            try:
+                new_pel_data = json.loads(list_buf)
+                complete = True
+            except ValueError:
+                # The listing was cut off at the newest cached PEL.
+                new_pel_data = json.loads(list_buf.rstrip(",") + "\n}")
+                complete = False
+        except (ValueError, IndexError) as e:
+            # The cache may no longer match the BMC so the next refresh
+            # starts over.
+            self.clear()
+            if int(fa.args_to_objects(bsu_options).get("ignore_err", 0)):
+                print(str(e))
+                print(out_buf)
+                return self.pel_data
+            raise PeltoolException(
+                "Failed to parse peltool output : " + str(e) + "\n" + out_buf
+            ) from e
+
+        if complete:
+            # Either this is the first refresh or the newest cached PEL was
+            # deleted.
+            self.clear()
+        elif pel_count != self.pel_count + len(new_pel_data):
+            # PELs were deleted.  Fetch the whole listing.
+            self.clear()
+            return self.refresh(**bsu_options)
+
+        self.pel_count = pel_count
+        # The listing is newest first.
+        for pel_id in reversed(list(new_pel_data)):
+            self.add_pel(pel_id, new_pel_data[pel_id])
+        return self.pel_data
+
+    def add_pel(self, pel_id, pel_record):
+        r"""
+        Add a PEL record to the cache and indexes.
+
+        Description of argument(s):
+        pel_id        PEL ID. E.g. 0x50000021.
+        pel_record    The PEL's "peltool -l" data (a dictionary with "SRC",
+                      "Sev", "Commit Time", etc. keys).
+        """
+
+        self.pel_data[pel_id] = pel_record
+        self.src_index.setdefault(pel_record.get("SRC", ""), []).append(pel_id)
+        self.severity_index.setdefault(pel_record.get("Sev", ""), []).append(
+            pel_id
+        )
+        try:
+            commit_time = datetime.strptime(
+                " ".join(pel_record["Commit Time"].split()),
+                "%m/%d/%Y %H:%M:%S",
+            ).timestamp()
+        except (KeyError, ValueError):
+            return
+        bisect.insort(self.time_index, (commit_time, pel_id))
+
+    def get_pel_ids(
+        self, src=None, severity=None, start_time=None, end_time=None
+    ):
+        r"""
+        Return a list of the IDs of the cached PELs which match all of the
+        given criteria (in "peltool -l" order).
+
+        Description of argument(s):
+        src           SRC ID (e.g. BCXXYYYY).
+        severity      PEL severity (e.g. "Predictive Error").
+        start_time    Only PELs committed at or after this time (a datetime
+                      object or epoch seconds).
+        end_time      Only PELs committed before this time (a datetime object
+                      or epoch seconds).
+        """
+
+        candidate_sets = []
+        if src is not None:
+            candidate_sets.append(set(self.src_index.get(src, [])))
+        if severity is not None:
+            candidate_sets.append(set(self.severity_index.get(severity, [])))
+        if start_time is not None or end_time is not None:
+            if isinstance(start_time, datetime):
+                start_time = start_time.timestamp()
+            if isinstance(end_time, datetime):
+                end_time = end_time.timestamp()
+            start_ix = 0
+            end_ix = len(self.time_index)
+            if start_time is not None:
+                start_ix = bisect.bisect_left(self.time_index, (start_time,))
+            if end_time is not None:
+                end_ix = bisect.bisect_left(self.time_index, (end_time,))
+            candidate_sets.append(
+                set(pel_id for _, pel_id in self.time_index[start_ix:end_ix])
+            )
+        if not candidate_sets:
+            return list(self.pel_data)
+        pel_ids = set.intersection(*candidate_sets)
+        return [pel_id for pel_id in self.pel_data if pel_id in pel_ids]
+
+    def get_srcs(self):
+        r"""
+        Return a list of the SRC IDs of the cached PELs (in "peltool -l" order).
+        """
+
+        return [pel_record["SRC"] for pel_record in self.pel_data.values()]
+
+    def get_latest_pel_ids(self, number_of_pels=1):
+        r"""
+        Return the IDs of the latest cached PELs, newest first.
+
+        Description of argument(s):
+        number_of_pels       Number of PEL IDs to be returned.
+        """
+
+        pel_ids = list(self.pel_data)
+        return pel_ids[::-1][:number_of_pels]
+
+
+# PelIndex objects keyed by (include_hidden_pels, include_informational_pels).
+pel_indexes = {}
+
+
+def get_pel_index(
+    include_hidden_pels=False, include_informational_pels=False, **bsu_options
+):
+    r"""
+    Return the shared PelIndex object for the given options after refreshing
+    it (see PelIndex.refresh for how errors are handled).
+
+    Description of arguments:
+    include_hidden_pels           True/False (default: False).
+                                  Set True to include hidden PELs.
+    include_informational_pels    True/False (default: False).
+                                  Set True to include informational PELs.
+    bsu_options                   Options to be passed directly to
+                                  bmc_execute_command. See its prolog for
+                                  details.
+    """
+
+    key = (bool(include_hidden_pels), bool(include_informational_pels))
+    if key not in pel_indexes:
+        pel_indexes[key] = PelIndex(*key)
+    pel_indexes[key].refresh(**bsu_options)
+    return pel_indexes[key]
+
+
 def get_pel_data_from_bmc(
     include_hidden_pels=False, include_informational_pels=False
 ):
@@ -87,12 +317,11 @@ def get_pel_data_from_bmc(
                                   Set True to get informational PELs else False.
     """
     try:
-        pel_cmd = " -l"
-        if include_hidden_pels:
-            pel_cmd = pel_cmd + " -h"
-        if include_informational_pels:
-            pel_cmd = pel_cmd + " -f"
-        pel_data = peltool(pel_cmd)
+        pel_data = dict(
+            get_pel_index(
+                include_hidden_pels, include_informational_pels
+            ).pel_data
+        )
         if not pel_data:
             print("No PEL data present in BMC ...")
     except Exception as exception:
@@ -206,14 +435,13 @@ def fetch_all_pel_ids_for_src(src_id, severity, include_hidden_pels=False):
     """
 
     try:
-        src_pel_ids = []
-        pel_data = get_pel_data_from_bmc(include_hidden_pels)
-        pel_id_list = pel_data.keys()
-        for pel_id in pel_id_list:
-            # Check if required SRC ID with severity is present
-            if src_id in pel_data[pel_id]["SRC"]:
-                if pel_data[pel_id]["Sev"] == severity:
-                    src_pel_ids.append(pel_id)
+        pel_index = get_pel_index(include_hidden_pels)
+        # Check if required SRC ID with severity is present
+        src_pel_ids = [
+            pel_id
+            for pel_id in pel_index.get_pel_ids(severity=severity)
+            if src_id in pel_index.pel_data[pel_id]["SRC"]
+        ]
 
         if not src_pel_ids:
             raise PeltoolException(
@@ -234,12 +462,7 @@ def fetch_all_src(include_hidden_pels=False):
                               Set True to get hidden PELs else False.
     """
     try:
-        src_id = []
-        pel_data = get_pel_data_from_bmc(include_hidden_pels)
-        if pel_data:
-            pel_id_list = pel_data.keys()
-            for pel_id in pel_id_list:
-                src_id.append(pel_data[pel_id]["SRC"])
+        src_id = get_pel_index(include_hidden_pels).get_srcs()
         print("SRC IDs: " + str(src_id))
     except Exception as exception:
         raise PeltoolException(
@@ -319,6 +542,4 @@ def get_latest_pels(number_of_pels=1):
     number_of_pels       Number of PELS to be returned.
     """
 
-    pel_data = peltool("-lr")
-    pel_ids = list(pel_data.keys())
-    return pel_ids[:number_of_pels]
+    return get_pel_index().get_latest_pel_ids(number_of_pels)
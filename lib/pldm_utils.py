@@ -7,6 +7,7 @@ PLDM functions.
 import json
 import random
 import re
+import shlex
 import string
 
 import bmc_ssh_utils as bsu
@@ -55,6 +56,263 @@ def pldmtool(option_string, **bsu_options):
         return stdout
 
 
+# Printed after the output of each command in a batched remote invocation.
+batch_end_marker = "pldm_batch_end"
+
+
+def strip_handle(handle_string):
+    r"""
+    Return the string found in the parentheses of a pldmtool string handle
+    (e.g. "Enabled" for "4(Enabled)") or the handle string itself if it has
+    none.
+
+    Description of argument(s):
+    handle_string         A pldmtool string handle value.
+    """
+
+    match = re.search(r"\((.*?)\)", str(handle_string))
+    if match:
+        return match.group(1)
+    return handle_string
+
+
+class BIOSAttributeTable:
+    r"""
+    BIOS attribute model built from the pldmtool AttributeTable and
+    AttributeValueTable.
+
+    Both tables are loaded by a single remote invocation and indexed by
+    attribute name and handle.  Current values are kept until a write, which
+    invalidates them.  set_values applies any number of attribute updates
+    (and reads back the AttributeValueTable to verify them) in a single
+    remote invocation rather than two pldmtool SSH calls per attribute.
+
+    Example:
+
+    bios_table = BIOSAttributeTable()
+    failures = bios_table.set_values({"pvm_default_os_type": "AIX"})
+    """
+
+    def __init__(self, **bsu_options):
+        r"""
+        Description of argument(s):
+        bsu_options           Options to be passed directly to
+                              bmc_execute_command. See its prolog for details.
+        """
+
+        self.bsu_options = fa.args_to_objects(bsu_options)
+        # Attribute table entries keyed by attribute name.
+        self.attributes = {}
+        # Attribute names keyed by attribute handle.
+        self.names = {}
+        # Current values keyed by attribute name (None if not loaded).
+        self.current_values = None
+
+    def run_batch(self, commands):
+        r"""
+        Run the pldmtool commands in a single remote invocation and return a
+        list of their outputs (stdout and stderr combined).
+
+        Description of argument(s):
+        commands              A list of pldmtool option strings.
+        """
+
+        # Each marker is printed on a line of its own, even if the command's
+        # output lacks a trailing newline.
+        cmd_buf = "".join(
+            "pldmtool "
+            + command
+            + " 2>&1 ; printf '\\n%s\\n' "
+            + batch_end_marker
+            + " ; "
+            for command in commands
+        )
+        stdout, stderr, rc = bsu.bmc_execute_command(
+            cmd_buf, **self.bsu_options, ignore_err=1
+        )
+        # The output is split on marker lines rather than on "marker\n" since
+        # SSHLibrary strips the newline which follows the last marker.
+        outputs = re.split(
+            "^" + batch_end_marker + "$\n?", stdout, flags=re.MULTILINE
+        )
+        if len(outputs) != len(commands) + 1:
+            raise ValueError(
+                "Unexpected output from batched pldmtool commands: "
+                + stdout
+                + stderr
+            )
+        return outputs[:-1]
+
+    def load(self):
+        r"""
+        Load and index the AttributeTable and the AttributeValueTable.
+        """
+
+        attr_table_buf, value_table_buf = self.run_batch(
+            [
+                "bios GetBIOSTable --type AttributeTable",
+                "bios GetBIOSTable --type AttributeValueTable",
+            ]
+        )
+        self.attributes = {}
+        self.names = {}
+        for entry in json.loads(attr_table_buf):
+            name = strip_handle(entry["AttributeNameHandle"])
+            self.attributes[name] = entry
+            self.names[entry["AttributeHandle"]] = name
+        self.load_values(value_table_buf)
+
+    def load_values(self, value_table_buf=None):
+        r"""
+        Load the current values from the AttributeValueTable.
+
+        Description of argument(s):
+        value_table_buf       The pldmtool AttributeValueTable output.  If
+                              this is None, it is fetched from the BMC.
+        """
+
+        if not self.attributes:
+            self.load()
+            return
+        if value_table_buf is None:
+            (value_table_buf,) = self.run_batch(
+                ["bios GetBIOSTable --type AttributeValueTable"]
+            )
+        self.current_values = {}
+        for entry in json.loads(value_table_buf):
+            name = self.names.get(entry["AttributeHandle"])
+            if name is None:
+                continue
+            if "CurrentString" in entry:
+                value = entry["CurrentString"]
+            elif "CurrentValue" in entry:
+                value = entry["CurrentValue"]
+            elif "CurrentValueStringHandleIndex[0]" in entry:
+                value = entry["CurrentValueStringHandleIndex[0]"]
+                if isinstance(value, int):
+                    # An index into the attribute's possible values.
+                    value = strip_handle(
+                        self.attributes[name][
+                            "PossibleValueStringHandle[" + str(value) + "]"
+                        ]
+                    )
+            else:
+                continue
+            self.current_values[name] = value
+
+    def invalidate(self):
+        r"""
+        Discard the current values so that they are reloaded when next used.
+        """
+
+        self.current_values = None
+
+    def get_current_values(self):
+        r"""
+        Return a dictionary of the current value of each attribute keyed by
+        attribute name.
+        """
+
+        if self.current_values is None:
+            self.load_values()
+        return self.current_values
+
+    def set_values(self, attr_values, verify=True):
+        r"""
+        Set the given attribute values in a single remote invocation and
+        return a dictionary of error messages keyed by the names of any
+        attributes which could not be set (an empty dictionary means success).
+
+        Description of argument(s):
+        attr_values           A dictionary of new values keyed by attribute
+                              name.  String values may be enclosed in double
+                              quotes (e.g. '"Power Off"').
+        verify                Read back the AttributeValueTable (in the same
+                              remote invocation) and report any attribute
+                              whose current value differs from the value set.
+        """
+
+        if not self.attributes:
+            self.load()
+        names = list(attr_values)
+        commands = [
+            "bios SetBIOSAttributeCurrentValue -a "
+            + shlex.quote(name)
+            + " -d "
+            + shlex.quote(str(attr_values[name]).strip('"'))
+            for name in names
+        ]
+        if verify:
+            commands.append("bios GetBIOSTable --type AttributeValueTable")
+        outputs = self.run_batch(commands)
+        self.invalidate()
+
+        failures = {}
+        for name, output in zip(names, outputs):
+            try:
+                response = json.loads(output)["Response"]
+            except (ValueError, KeyError, TypeError):
+                response = output.strip()
+            if response != "SUCCESS":
+                failures[name] = response
+        if verify:
+            self.load_values(outputs[-1])
+            for name in names:
+                if name in failures:
+                    continue
+                expected_value = (
+                    str(attr_values[name]).replace('"', "").strip()
+                )
+                current_value = str(self.current_values.get(name, "")).strip()
+                if current_value != expected_value:
+                    failures[name] = (
+                        "Current value "
+                        + current_value
+                        + " does not match "
+                        + expected_value
+                    )
+        return failures
+
+
+# The BIOSAttributeTable object shared by the functions in this module.
+bios_attribute_table = None
+
+
+def get_bios_attribute_table(reload=False):
+    r"""
+    Return the shared BIOSAttributeTable object, loading it if necessary.
+
+    Description of argument(s):
+    reload                Reload the tables even if they are already loaded.
+    """
+
+    global bios_attribute_table
+    if bios_attribute_table is None:
+        bios_attribute_table = BIOSAttributeTable()
+    if reload or not bios_attribute_table.attributes:
+        bios_attribute_table.load()
+    return bios_attribute_table
+
+
+def SetBIOSAttributeValues(attr_values, verify=True):
+    r"""
+    Set many BIOS attributes in a single remote invocation and return a
+    dictionary of error messages keyed by the names of any attributes which
+    could not be set or verified.
+
+    Example:
+
+    ${failures}=  SetBIOSAttributeValues  ${bios_attr_data}
+    Should Be Empty  ${failures}
+
+    Description of argument(s):
+    attr_values           A dictionary of new values keyed by attribute name.
+    verify                See BIOSAttributeTable.set_values for details.
+    """
+
+    return get_bios_attribute_table().set_values(attr_values, verify)
+
+
 def GetBIOSEnumAttributeOptionalValues(attr_val_table_data):
     """
     From pldmtool GetBIOSTable of type AttributeValueTable get the dict of
@@ -201,6 +459,10 @@ def GetBIOSAttrOriginalValues(attr_val_table_data):
     @return                 Dict of BIOS attribute and its value.
 
     """
+    # The current values of all attributes are obtained with a single
+    # remote invocation rather than one pldmtool call per attribute.
+    current_values = get_bios_attribute_table(reload=True).get_current_values()
+
     attr_val_data_dict = {}
     for item in attr_val_table_data:
         attr_handle = re.findall(r"\(.*?\)", item["AttributeNameHandle"])
@@ -208,20 +470,16 @@ def GetBIOSAttrOriginalValues(attr_val_table_data):
 
         # Exclude BIOS attribute which are ReadOnly.
         if "ReadOnly" not in item["AttributeType"]:
-            command = (
-                "bios GetBIOSAttributeCurrentValueByHandle -a " + attr_name
-            )
-            value = pldmtool(command)
-            if "error" in value:
+            if attr_name not in current_values:
                 print("Ignore BIOS attribute which throws error...")
                 pass
-            elif not value["CurrentValue"]:
+            elif not current_values[attr_name]:
                 if "name" in attr_name:
                     attr_val_data_dict[attr_name] = '""'
                 elif "hb_lid_ids" in attr_name:
                     attr_val_data_dict[attr_name] = '""'
             else:
-                attr_val_data_dict[attr_name] = value["CurrentValue"]
+                attr_val_data_dict[attr_name] = current_values[attr_name]
 
     return attr_val_data_dict
 
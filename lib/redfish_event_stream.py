@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+r"""
+See redfish_event_stream class prolog below for details.
+"""
+
+import os
+import socket
+import threading
+import time
+
+import requests
+from urllib3.exceptions import InsecureRequestWarning
+
+requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)
+
+
+class redfish_event_stream(object):
+    r"""
+    redfish_event_stream maintains a Redfish EventService server-sent events (SSE) connection to a BMC in a
+    background thread and lets the caller wait for the arrival of the next event.
+
+    The stream is reconnected automatically if it is lost.  The connected attribute indicates whether the
+    stream is presently open so that callers can fall back to polling while it is not.
+
+    Example use:
+
+    stream = redfish_event_stream(openbmc_host, openbmc_username, openbmc_password)
+    stream.start()
+    while not done():
+        stream.wait_for_event(timeout=10)
+    stream.stop()
+    """
+
+    def __init__(
+        self,
+        host,
+        username,
+        password,
+        https_port=443,
+        sse_uri="/redfish/v1/EventService/SSE",
+        reconnect_interval=5,
+    ):
+        r"""
+        Initialize the redfish_event_stream object.
+
+        Description of argument(s):
+        host                        The IP or host name of the BMC.
+        username                    The username for the BMC.
+        password                    The password for the BMC.
+        https_port                  The BMC's HTTPS port.
+        sse_uri                     The URI of the EventService SSE stream.
+        reconnect_interval          The number of seconds to wait before attempting to reconnect a stream
+                                    which has been lost or which could not be opened.
+        """
+        self.__url = "https://" + str(host) + ":" + str(https_port) + sse_uri
+        self.__auth = (username, password)
+        self.__reconnect_interval = reconnect_interval
+        self.__event = threading.Event()
+        self.__stop = threading.Event()
+        # Serializes stop's shutdown of the response's socket with the background thread's close of the
+        # response.
+        self.__response_lock = threading.Lock()
+        self.__response = None
+        self.__thread = None
+        self.connected = False
+        self.event_count = 0
+        self.last_event_time = None
+        self.last_event_data = ""
+        self.last_error = None
+
+    def start(self):
+        r"""
+        Start the background thread which reads the event stream.
+        """
+        if self.__thread is not None:
+            return
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.__read_stream)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def stop(self):
+        r"""
+        Close the event stream and stop the background thread.
+        """
+        self.__stop.set()
+        with self.__response_lock:
+            if self.__response is not None:
+                # Closing the response here would block on the lock held by the background thread's pending
+                # read (i.e. until the next event arrives), so the connection's socket is shut down instead,
+                # which ends that read.  The thread then closes the response.  The socket is shut down via a
+                # duplicate of its file descriptor so that the response's own socket object is left for the
+                # thread to close.
+                try:
+                    with socket.socket(
+                        fileno=os.dup(self.__response.raw.fileno())
+                    ) as sock:
+                        sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    # The connection has already been closed by the BMC.
+                    pass
+        if self.__thread is not None:
+            self.__thread.join(self.__reconnect_interval)
+            self.__thread = None
+        self.connected = False
+
+    def wait_for_event(self, timeout=None):
+        r"""
+        Wait for an event to arrive and return True if one arrived or False if the timeout expired first.
+
+        Any events which arrived since the prior call to this function also satisfy the wait.
+
+        Description of argument(s):
+        timeout                     The maximum number of seconds to wait.  None means wait indefinitely.
+        """
+        arrived = self.__event.wait(timeout)
+        self.__event.clear()
+        return arrived
+
+    def __read_stream(self):
+        r"""
+        Read the event stream until stop is called, reconnecting as needed.
+        """
+        while not self.__stop.is_set():
+            try:
+                response = requests.get(
+                    self.__url,
+                    auth=self.__auth,
+                    headers={"Accept": "text/event-stream"},
+                    stream=True,
+                    verify=False,
+                    timeout=(30, None),
+                )
+                with self.__response_lock:
+                    self.__response = response
+                if self.__stop.is_set():
+                    # stop was called while the stream was being opened so there was no socket for it to shut
+                    # down.  The response is closed below.
+                    break
+                if self.__response.status_code != 200:
+                    raise requests.exceptions.ConnectionError(
+                        "HTTP status code " + str(self.__response.status_code)
+                    )
+                self.connected = True
+                # Events are small and infrequent so they are read a byte at a time.  With larger reads,
+                # an event could wait in the buffer until enough later events arrive to fill it.
+                for line in self.__response.iter_lines(
+                    chunk_size=1, decode_unicode=True
+                ):
+                    # Each SSE event ends with a blank line and carries its payload in "data:" lines.
+                    if line and line.startswith("data:"):
+                        self.last_event_data = line[5:].strip()
+                        self.last_event_time = time.time()
+                        self.event_count += 1
+                        self.__event.set()
+            except Exception as exception:
+                # Printing from this thread is avoided since robot output functions may only be called from
+                # the main thread.  The error is kept for the caller to inspect.
+                if not self.__stop.is_set():
+                    self.last_error = exception
+            finally:
+                with self.__response_lock:
+                    if self.__response is not None:
+                        self.__response.close()
+                        self.__response = None
+                self.connected = False
+            # Wake any waiter so that it notices the loss of the stream.
+            self.__event.set()
+            self.__stop.wait(self.__reconnect_interval)
@@ -5,6 +5,9 @@ See redfish_plus class prolog below for details.
 """
 
 import json
+import threading
+import time
+from collections import OrderedDict
 
 import func_args as fa
 import gen_print as gp
@@ -43,6 +46,130 @@ def valid_http_status_code(status, valid_status_codes):
     raise ValueError(message)
 
 
+class redfish_response_cache(object):
+    r"""
+    An LRU cache of redfish GET responses keyed by URI.
+
+    Cached responses are revalidated with the BMC via conditional GET requests (i.e. If-None-Match and
+    If-Modified-Since headers) so that an unchanged resource costs a "304 Not Modified" round-trip rather than
+    a full transfer and parse of the resource.  If a ttl is specified, a cached response that is younger than
+    ttl seconds is returned without contacting the BMC at all.
+    """
+
+    def __init__(self, ttl=0, max_entries=256):
+        r"""
+        Initialize the redfish_response_cache object.
+
+        Description of argument(s):
+        ttl                         The number of seconds for which a cached response may be returned without
+                                    revalidating it with the BMC.  A value of 0 means that every cached
+                                    response is revalidated.
+        max_entries                 The maximum number of URIs to cache.  The least recently used entry is
+                                    evicted when this limit is exceeded.
+        """
+        self.ttl = float(ttl)
+        self.max_entries = int(max_entries)
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.invalidations = 0
+
+    def lookup(self, uri):
+        r"""
+        Return a tuple consisting of the cached response for uri and a boolean indicating whether the response
+        is fresh (i.e. may be returned without revalidation).  If uri is not cached, return (None, False).
+
+        Description of argument(s):
+        uri                         The URI of the resource (e.g. "/redfish/v1/Systems/system").
+        """
+        with self.__lock:
+            entry = self.__entries.get(uri.rstrip("/"))
+            if entry is None:
+                return None, False
+            self.__entries.move_to_end(uri.rstrip("/"))
+            response, store_time = entry
+            return response, (time.time() - store_time) < self.ttl
+
+    def store(self, uri, response):
+        r"""
+        Store the response for uri in the cache.
+
+        Description of argument(s):
+        uri                         The URI of the resource (e.g. "/redfish/v1/Systems/system").
+        response                    The response object returned by the GET request.
+        """
+        with self.__lock:
+            self.__entries[uri.rstrip("/")] = (response, time.time())
+            self.__entries.move_to_end(uri.rstrip("/"))
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+
+    def invalidate(self, uri=None):
+        r"""
+        Remove entries affected by a change to uri from the cache.
+
+        An entry is considered affected if its URI is uri, a child of uri (e.g. a PATCH of
+        /redfish/v1/Systems/system invalidates /redfish/v1/Systems/system/Bios) or a parent of uri (e.g. a POST
+        of /redfish/v1/Systems/system/Actions/ComputerSystem.Reset invalidates /redfish/v1/Systems/system).
+
+        Description of argument(s):
+        uri                         The URI of the modified resource.  If this is None, the entire cache is
+                                    cleared.
+        """
+        with self.__lock:
+            if uri is None:
+                self.invalidations += len(self.__entries)
+                self.__entries.clear()
+                return
+            uri = uri.rstrip("/")
+            for cached_uri in list(self.__entries):
+                if (
+                    cached_uri == uri
+                    or cached_uri.startswith(uri + "/")
+                    or uri.startswith(cached_uri + "/")
+                ):
+                    del self.__entries[cached_uri]
+                    self.invalidations += 1
+
+    def count(self, counter):
+        r"""
+        Increment the named statistics counter.
+
+        Description of argument(s):
+        counter                     The name of the counter (e.g. "hits", "misses", "revalidations").
+        """
+        with self.__lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get_stats(self):
+        r"""
+        Return a dictionary of cache statistics.
+
+        Example result:
+
+        stats:
+          [entries]:                 12
+          [hits]:                    140
+          [misses]:                  12
+          [revalidations]:           388
+          [invalidations]:           3
+          [round_trips_saved]:       140
+          [transfers_saved]:         528
+        """
+        with self.__lock:
+            return {
+                "entries": len(self.__entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "invalidations": self.invalidations,
+                "round_trips_saved": self.hits,
+                "transfers_saved": self.hits + self.revalidations,
+            }
+
+
 class redfish_plus(HttpClient):
     r"""
     redfish_plus is a wrapper for redfish rest that provides the following benefits vs. using redfish
@@ -53,10 +180,104 @@ class redfish_plus(HttpClient):
         - Automatic valid_status_codes processing (i.e. an exception will be raised if the rest response
           status code is not as expected.
         - Easily used from robot programs.
+        - An optional GET response cache (see enable_response_cache below).
     """
 
     ROBOT_LIBRARY_SCOPE = "TEST SUITE"
 
+    _response_cache = None
+
+    def enable_response_cache(self, ttl=0, max_entries=256):
+        r"""
+        Enable caching of GET responses.
+
+        Once enabled, GET responses which carry an ETag or Last-Modified header are cached by URI and
+        subsequent GET requests for the same URI are sent as conditional requests.  Any post, put, patch or
+        delete made through this object invalidates the cached entries for the URI, its parents and its
+        children.
+
+        Description of argument(s):
+        ttl                         See redfish_response_cache for details.
+        max_entries                 See redfish_response_cache for details.
+        """
+        self._response_cache = redfish_response_cache(ttl, max_entries)
+
+    def disable_response_cache(self):
+        r"""
+        Disable caching of GET responses and return the final cache statistics.
+        """
+        stats = self.get_response_cache_stats()
+        self._response_cache = None
+        return stats
+
+    def get_response_cache_stats(self):
+        r"""
+        Return a dictionary of response cache statistics or an empty dictionary if the cache is not enabled.
+        See redfish_response_cache.get_stats for details.
+        """
+        if self._response_cache is None:
+            return {}
+        return self._response_cache.get_stats()
+
+    def cached_get(self, path, args=None, headers=None, **kwargs):
+        r"""
+        Perform a GET request using the response cache and return the response.
+
+        Description of argument(s):
+        path                        The URI to access.
+        args                        The query parameters to provide with the request.  Requests with query
+                                    parameters bypass the cache.
+        headers                     Additional HTTP headers to provide in the request.
+        kwargs                      This is passed directly to the parent class get method.
+        """
+        cache = self._response_cache
+        parent_get = super(redfish_plus, self).get
+        if args:
+            return parent_get(path, args=args, headers=headers, **kwargs)
+
+        cached_response, fresh = cache.lookup(path)
+        if fresh:
+            cache.count("hits")
+            return cached_response
+
+        headers = dict(headers or {})
+        if cached_response is not None:
+            etag = cached_response.getheader("ETag")
+            last_modified = cached_response.getheader("Last-Modified")
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        response = parent_get(path, headers=headers, **kwargs)
+        if response.status == 304 and cached_response is not None:
+            cache.count("revalidations")
+            cache.store(path, cached_response)
+            return cached_response
+
+        cache.count("misses")
+        if response.status == 200 and (
+            cache.ttl
+            or response.getheader("ETag")
+            or response.getheader("Last-Modified")
+        ):
+            cache.store(path, response)
+        return response
+
+    def invalidate_response_cache(self, *args, **kwargs):
+        r"""
+        Invalidate the response cache entries affected by a request with the given arguments.
+
+        Description of argument(s):
+        args                        The positional arguments of the modifying request.  The first is the URI.
+        kwargs                      The keyword arguments of the modifying request.  If args is empty, the
+                                    URI is taken from the "path" key.
+        """
+        if self._response_cache is None:
+            return
+        path = args[0] if args else kwargs.get("path")
+        self._response_cache.invalidate(path)
+
     def rest_request(self, func, *args, **kwargs):
         r"""
         Perform redfish rest request and return response.
@@ -128,6 +349,8 @@ class redfish_plus(HttpClient):
     def get(self, *args, **kwargs):
         if MTLS_ENABLED == "True":
             return self.rest_request(self.get_with_mtls, *args, **kwargs)
+        elif self._response_cache is not None:
+            return self.rest_request(self.cached_get, *args, **kwargs)
         else:
             return self.rest_request(
                 super(redfish_plus, self).get, *args, **kwargs
@@ -142,6 +365,7 @@ class redfish_plus(HttpClient):
             )
 
     def post(self, *args, **kwargs):
+        self.invalidate_response_cache(*args, **kwargs)
         if MTLS_ENABLED == "True":
             return self.rest_request(self.post_with_mtls, *args, **kwargs)
         else:
@@ -150,6 +374,7 @@ class redfish_plus(HttpClient):
             )
 
     def put(self, *args, **kwargs):
+        self.invalidate_response_cache(*args, **kwargs)
         if MTLS_ENABLED == "True":
             return self.rest_request(self.put_with_mtls, *args, **kwargs)
         else:
@@ -158,6 +383,7 @@ class redfish_plus(HttpClient):
             )
 
     def patch(self, *args, **kwargs):
+        self.invalidate_response_cache(*args, **kwargs)
         if MTLS_ENABLED == "True":
             return self.rest_request(self.patch_with_mtls, *args, **kwargs)
         else:
@@ -166,6 +392,7 @@ class redfish_plus(HttpClient):
             )
 
     def delete(self, *args, **kwargs):
+        self.invalidate_response_cache(*args, **kwargs)
         if MTLS_ENABLED == "True":
             return self.rest_request(self.delete_with_mtls, *args, **kwargs)
         else:
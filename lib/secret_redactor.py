@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+
+r"""
+This module provides a secret_redactor class (see its prolog below) along with a module-level shared redactor
+which is used by gen_print (e.g. register_passwords/replace_passwords), by ffdc_collector's logging and
+therefore by robot log output produced via gen_print.
+"""
+
+import logging
+import re
+import threading
+
+# Above this many secrets, a single compiled regex search is faster than a substring search per secret.
+max_substring_prefilter_secrets = 8
+
+
+class secret_redactor(object):
+    r"""
+    secret_redactor replaces registered secrets (e.g. passwords) with a string of asterisks.
+
+    All secrets are compiled into one regular expression alternation (longest secret first so that a secret
+    which is a prefix of another never leaves the remainder exposed).  A buffer which cannot contain any
+    secret is returned without being rewritten: for a handful of secrets, a substring search per secret is
+    used as the prefilter since it is several times faster than a regex scan.
+
+    Example use:
+
+    redactor = secret_redactor()
+    redactor.register("0penBmc")
+    print(redactor.redact("password=0penBmc"))
+
+    stream = redactor.stream()
+    for chunk in chunks:
+        out_file.write(stream.write(chunk))
+    out_file.write(stream.flush())
+    """
+
+    def __init__(self, replacement="********"):
+        r"""
+        Initialize the secret_redactor object.
+
+        Description of argument(s):
+        replacement                 The string which is to replace each secret.
+        """
+        self.replacement = replacement
+        self.__lock = threading.Lock()
+        # The state is replaced as a whole (rather than updated in place) so that readers never need the
+        # lock.  It consists of the secrets tuple, the compiled regex and the maximum secret length.
+        self.__state = ((), None, 0)
+
+    def register(self, *args):
+        r"""
+        Register one or more secrets.  None, blank or already registered secrets are ignored.
+
+        Description of argument(s):
+        args                        One or more secret values.
+        """
+        with self.__lock:
+            secrets = list(self.__state[0])
+            for secret in args:
+                if secret is None:
+                    continue
+                secret = str(secret)
+                if secret == "" or secret in secrets:
+                    continue
+                secrets.append(secret)
+            if len(secrets) == len(self.__state[0]):
+                return
+            sorted_secrets = sorted(secrets, key=len, reverse=True)
+            regex = re.compile("|".join(re.escape(x) for x in sorted_secrets))
+            self.__state = (tuple(secrets), regex, len(sorted_secrets[0]))
+
+    def secrets(self):
+        r"""
+        Return a list of the registered secrets in the order in which they were registered.
+        """
+        return list(self.__state[0])
+
+    def max_secret_length(self):
+        r"""
+        Return the length of the longest registered secret (0 if there are none).
+        """
+        return self.__state[2]
+
+    def might_contain_secret(self, buffer):
+        r"""
+        Return True unless the buffer certainly contains no secret.
+
+        Description of argument(s):
+        buffer                      The string to be checked.
+        """
+        secrets, regex, max_length = self.__state
+        if not secrets:
+            return False
+        if len(secrets) <= max_substring_prefilter_secrets:
+            return any(secret in buffer for secret in secrets)
+        return regex.search(buffer) is not None
+
+    def redact(self, buffer):
+        r"""
+        Return the buffer with all registered secrets replaced.
+
+        Description of argument(s):
+        buffer                      The string to be redacted.
+        """
+        if not self.might_contain_secret(buffer):
+            return buffer
+        return self.__state[1].sub(self.replacement, buffer)
+
+    def stream(self):
+        r"""
+        Return a new redaction_stream object for redacting a stream of chunks with this redactor.
+        """
+        return redaction_stream(self)
+
+    def get_regex(self):
+        r"""
+        Return the compiled regex which matches any registered secret (None if there are none).
+        """
+        return self.__state[1]
+
+
+class redaction_stream(object):
+    r"""
+    redaction_stream redacts text which arrives in chunks, catching secrets which are split across chunk
+    boundaries.
+
+    Up to max_secret_length - 1 characters at the end of each chunk are held back until the next write (or
+    flush) since they might be the start of a secret.
+    """
+
+    def __init__(self, redactor):
+        r"""
+        Initialize the redaction_stream object.
+
+        Description of argument(s):
+        redactor                    The secret_redactor object whose secrets are to be redacted.
+        """
+        self.__redactor = redactor
+        self.__pending = ""
+
+    def write(self, chunk):
+        r"""
+        Add the chunk to the stream and return the redacted text which is now safe to output.
+
+        Description of argument(s):
+        chunk                       The next string in the stream.
+        """
+        buffer = self.__pending + chunk
+        hold_length = self.__redactor.max_secret_length() - 1
+        if hold_length <= 0:
+            self.__pending = ""
+            return self.__redactor.redact(buffer)
+        cut_ix = len(buffer) - hold_length
+        if cut_ix <= 0:
+            self.__pending = buffer
+            return ""
+        if not self.__redactor.might_contain_secret(buffer):
+            self.__pending = buffer[cut_ix:]
+            return buffer[:cut_ix]
+        # A match which starts before cut_ix is complete since at least max_secret_length characters follow
+        # its start.  Such a match may extend past cut_ix in which case cut_ix is moved to its end.
+        output = []
+        position = 0
+        for match in self.__redactor.get_regex().finditer(buffer):
+            if match.start() >= cut_ix:
+                break
+            output.append(buffer[position : match.start()])
+            output.append(self.__redactor.replacement)
+            position = match.end()
+        cut_ix = max(cut_ix, position)
+        output.append(buffer[position:cut_ix])
+        self.__pending = buffer[cut_ix:]
+        return "".join(output)
+
+    def flush(self):
+        r"""
+        Return the redacted text held back by prior writes.
+        """
+        buffer = self.__pending
+        self.__pending = ""
+        return self.__redactor.redact(buffer)
+
+
+class redaction_filter(logging.Filter):
+    r"""
+    redaction_filter is a logging filter which redacts secrets from each record's message.  Add it to each
+    handler (rather than to a logger) so that records from child loggers are redacted too.
+    """
+
+    def __init__(self, redactor=None):
+        r"""
+        Initialize the redaction_filter object.
+
+        Description of argument(s):
+        redactor                    The secret_redactor object to use.  Defaults to the shared redactor.
+        """
+        logging.Filter.__init__(self)
+        self.__redactor = redactor
+
+    def filter(self, record):
+        r"""
+        Redact the record's message and return True so that the record is always logged.
+        """
+        redactor = self.__redactor or shared_redactor
+        message = record.getMessage()
+        if redactor.might_contain_secret(message):
+            record.msg = redactor.redact(message)
+            record.args = None
+        return True
+
+
+# The redactor shared by gen_print, ffdc_collector, etc.
+shared_redactor = secret_redactor()
+
+
+def register_secrets(*args):
+    r"""
+    Register one or more secrets with the shared redactor.  See secret_redactor.register for details.
+    """
+    shared_redactor.register(*args)
+
+
+def redact(buffer):
+    r"""
+    Return the buffer with all secrets registered with the shared redactor replaced.
+    """
+    return shared_redactor.redact(buffer)
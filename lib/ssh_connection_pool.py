@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+
+r"""
+This module provides a pool of persistent SSH connections (see the ssh_connection_pool class prolog below)
+along with module-level functions which manage a single shared pool.  The module may be used directly as a
+robot library.
+
+Example robot code:
+
+Library  ../lib/ssh_connection_pool.py
+
+Enable SSH Connection Pool  max_idle_time=${300}
+...
+${stats}=  Get SSH Connection Pool Stats
+Rprint Vars  stats
+"""
+
+import select
+import socket
+import threading
+import time
+
+import paramiko
+
+
+class ssh_connection_pool(object):
+    r"""
+    ssh_connection_pool keeps authenticated paramiko SSH connections open between commands so that each
+    command does not pay for a new TCP connection, key exchange and login.
+
+    Connections are keyed by (host, port, username).  An idle connection is health-checked before it is
+    reused and is discarded if it has been idle for longer than max_idle_time.  A command which fails because
+    its connection has died (e.g. because the BMC rebooted) is retried once on a new connection.
+    """
+
+    def __init__(
+        self,
+        max_idle_time=300,
+        keepalive_interval=15,
+        connect_timeout=25,
+        max_connections_per_host=4,
+    ):
+        r"""
+        Initialize the ssh_connection_pool object.
+
+        Description of argument(s):
+        max_idle_time               The number of seconds a connection may sit idle in the pool before it is
+                                    closed rather than reused.
+        keepalive_interval          The number of seconds between SSH keepalive messages on each connection.
+                                    A value of 0 disables keepalives.
+        connect_timeout             The number of seconds to allow for connecting and logging in.
+        max_connections_per_host    The maximum number of idle connections to keep per key.
+        """
+        self.max_idle_time = float(max_idle_time)
+        self.keepalive_interval = int(keepalive_interval)
+        self.connect_timeout = float(connect_timeout)
+        self.max_connections_per_host = int(max_connections_per_host)
+        self.__lock = threading.Lock()
+        # Idle connections keyed by (host, port, username).  Each entry is a list of [client, last_used_time]
+        # lists.
+        self.__idle = {}
+        self.__stats = {}
+
+    def __host_stats(self, key):
+        r"""
+        Return the statistics dictionary for the given key, creating it if necessary.  The caller must hold
+        the lock.
+        """
+        host_key = "%s:%s" % (key[0], key[1])
+        if host_key not in self.__stats:
+            self.__stats[host_key] = {
+                "commands": 0,
+                "connects": 0,
+                "reuses": 0,
+                "reconnects": 0,
+                "evictions": 0,
+                "ttfb_total": 0.0,
+                "ttfb_max": 0.0,
+            }
+        return self.__stats[host_key]
+
+    def __connect(self, key, password):
+        r"""
+        Create, login and return a new SSH client for the given key.
+        """
+        host, port, username = key
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(
+            host,
+            port=int(port),
+            username=username,
+            password=password,
+            timeout=self.connect_timeout,
+            banner_timeout=self.connect_timeout,
+            auth_timeout=self.connect_timeout,
+            allow_agent=False,
+            look_for_keys=False,
+        )
+        if self.keepalive_interval:
+            client.get_transport().set_keepalive(self.keepalive_interval)
+        with self.__lock:
+            self.__host_stats(key)["connects"] += 1
+        return client
+
+    @staticmethod
+    def __is_healthy(client):
+        r"""
+        Return True if the client's transport is still usable.
+        """
+        transport = client.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+        try:
+            transport.send_ignore()
+        except (paramiko.SSHException, socket.error, EOFError):
+            return False
+        return True
+
+    def __acquire(self, key, password):
+        r"""
+        Return a tuple consisting of a connected SSH client for the given key and a boolean indicating
+        whether it was reused from the pool.
+        """
+        now = time.time()
+        while True:
+            with self.__lock:
+                idle_list = self.__idle.get(key, [])
+                if not idle_list:
+                    break
+                client, last_used_time = idle_list.pop()
+                stats = self.__host_stats(key)
+            if (
+                now - last_used_time > self.max_idle_time
+                or not self.__is_healthy(client)
+            ):
+                with self.__lock:
+                    stats["evictions"] += 1
+                client.close()
+                continue
+            with self.__lock:
+                stats["reuses"] += 1
+            return client, True
+
+        return self.__connect(key, password), False
+
+    def __release(self, key, client):
+        r"""
+        Return the client to the pool (or close it if the pool for the key is full).
+        """
+        with self.__lock:
+            idle_list = self.__idle.setdefault(key, [])
+            if len(idle_list) < self.max_connections_per_host:
+                idle_list.append([client, time.time()])
+                return
+        client.close()
+
+    def __run(self, client, cmd_buf, time_out):
+        r"""
+        Run cmd_buf on the client and return stdout, stderr, rc and the time to first byte.
+        """
+        channel = client.get_transport().open_session(
+            timeout=self.connect_timeout
+        )
+        start_time = time.time()
+        channel.exec_command(cmd_buf)
+        channel.shutdown_write()
+        stdout_chunks = []
+        stderr_chunks = []
+        ttfb = None
+        end_time = None if time_out is None else start_time + float(time_out)
+        while True:
+            got_data = False
+            if channel.recv_ready():
+                stdout_chunks.append(channel.recv(32768))
+                got_data = True
+            if channel.recv_stderr_ready():
+                stderr_chunks.append(channel.recv_stderr(32768))
+                got_data = True
+            if got_data:
+                if ttfb is None:
+                    ttfb = time.time() - start_time
+                continue
+            if (
+                channel.exit_status_ready()
+                and not channel.recv_ready()
+                and not channel.recv_stderr_ready()
+            ):
+                break
+            if end_time is not None and time.time() > end_time:
+                channel.close()
+                raise ValueError(
+                    "The SSH command timed out after "
+                    + str(time_out)
+                    + " seconds:\n"
+                    + cmd_buf
+                )
+            # Block until the channel has something for us (or a short time passes).
+            select.select([channel], [], [], 0.1)
+        rc = channel.recv_exit_status()
+        channel.close()
+        if ttfb is None:
+            ttfb = time.time() - start_time
+        stdout = b"".join(stdout_chunks).decode("utf-8", errors="replace")
+        stderr = b"".join(stderr_chunks).decode("utf-8", errors="replace")
+        # Remove the trailing newline as SSHLibrary's execute_command does.
+        if stdout.endswith("\n"):
+            stdout = stdout[:-1]
+        if stderr.endswith("\n"):
+            stderr = stderr[:-1]
+        return stdout, stderr, rc, ttfb
+
+    def execute_command(
+        self, cmd_buf, host, username, password, port=22, time_out=None
+    ):
+        r"""
+        Run the given command on a pooled SSH connection and return the stdout, stderr and the return code.
+
+        Description of argument(s):
+        cmd_buf                     The command string to be run in an SSH session.
+        host                        The host name or IP address of the target.
+        username                    The username to login with.
+        password                    The password to login with.
+        port                        The SSH port of the target.
+        time_out                    The number of seconds to allow for the execution of cmd_buf.  A value of
+                                    None means that there is no limit to how long the command may take.
+        """
+        key = (str(host), str(port), str(username))
+        client, reused = self.__acquire(key, password)
+        try:
+            stdout, stderr, rc, ttfb = self.__run(client, cmd_buf, time_out)
+        except (paramiko.SSHException, socket.error, EOFError):
+            # The connection died (e.g. the target rebooted).  Retry once on a new connection.
+            client.close()
+            with self.__lock:
+                self.__host_stats(key)["reconnects"] += 1
+            client = self.__connect(key, password)
+            try:
+                stdout, stderr, rc, ttfb = self.__run(
+                    client, cmd_buf, time_out
+                )
+            except Exception:
+                client.close()
+                raise
+        except Exception:
+            client.close()
+            raise
+        self.__release(key, client)
+        with self.__lock:
+            stats = self.__host_stats(key)
+            stats["commands"] += 1
+            stats["ttfb_total"] += ttfb
+            stats["ttfb_max"] = max(stats["ttfb_max"], ttfb)
+        return stdout, stderr, rc
+
+    def get_stats(self):
+        r"""
+        Return a dictionary of per-host statistics.
+
+        Example result:
+
+        stats:
+          [bmc1:22]:
+            [commands]:              250
+            [connects]:              2
+            [reuses]:                248
+            [reconnects]:            1
+            [evictions]:             0
+            [reuse_ratio]:           0.992
+            [ttfb_avg]:              0.0121
+            [ttfb_max]:              0.2311
+        """
+        with self.__lock:
+            stats = {}
+            for host_key, host_stats in self.__stats.items():
+                stats[host_key] = {
+                    key: value
+                    for key, value in host_stats.items()
+                    if key != "ttfb_total"
+                }
+                commands = host_stats["commands"]
+                acquisitions = host_stats["reuses"] + host_stats["connects"]
+                stats[host_key]["reuse_ratio"] = (
+                    round(host_stats["reuses"] / acquisitions, 4)
+                    if acquisitions
+                    else 0.0
+                )
+                stats[host_key]["ttfb_avg"] = (
+                    round(host_stats["ttfb_total"] / commands, 6)
+                    if commands
+                    else 0.0
+                )
+            return stats
+
+    def close_all(self, host=None):
+        r"""
+        Close the idle connections in the pool.
+
+        Description of argument(s):
+        host                        If specified, only the connections to this host are closed.
+        """
+        with self.__lock:
+            keys = [
+                key
+                for key in self.__idle
+                if host is None or key[0] == str(host)
+            ]
+            clients = []
+            for key in keys:
+                clients += [
+                    client for client, last_used_time in self.__idle.pop(key)
+                ]
+        for client in clients:
+            client.close()
+
+
+# The shared pool used by gen_robot_ssh.execute_ssh_command.  It is None until enable_ssh_connection_pool is
+# called.
+shared_pool = None
+
+
+def enable_ssh_connection_pool(
+    max_idle_time=300,
+    keepalive_interval=15,
+    connect_timeout=25,
+    max_connections_per_host=4,
+):
+    r"""
+    Create the shared SSH connection pool so that bmc_execute_command, os_execute_command and other
+    execute_ssh_command callers use it.
+
+    See the ssh_connection_pool class for a description of the arguments.
+    """
+    global shared_pool
+    if shared_pool is not None:
+        shared_pool.close_all()
+    shared_pool = ssh_connection_pool(
+        max_idle_time,
+        keepalive_interval,
+        connect_timeout,
+        max_connections_per_host,
+    )
+
+
+def disable_ssh_connection_pool():
+    r"""
+    Close all pooled connections, discard the shared pool and return its final statistics.
+    """
+    global shared_pool
+    if shared_pool is None:
+        return {}
+    stats = shared_pool.get_stats()
+    shared_pool.close_all()
+    shared_pool = None
+    return stats
+
+
+def get_ssh_connection_pool_stats():
+    r"""
+    Return the shared pool's per-host statistics (see ssh_connection_pool.get_stats) or an empty dictionary
+    if the pool is not enabled.
+    """
+    if shared_pool is None:
+        return {}
+    return shared_pool.get_stats()
+
+
+def close_ssh_connection_pool_connections(host=None):
+    r"""
+    Close the shared pool's idle connections (e.g. prior to a deliberate BMC reboot).
+
+    Description of argument(s):
+    host                            If specified, only the connections to this host are closed.
+    """
+    if shared_pool is not None:
+        shared_pool.close_all(host)
@@ -31,14 +31,17 @@ import imp
 import os
 import re
 import sys
+import threading
+import time
 
 import bmc_ssh_utils as bsu
 import gen_cmd as gc
 import gen_print as gp
 import gen_robot_utils as gru
 import gen_valid as gv
+from redfish_event_stream import redfish_event_stream
 from robot.libraries.BuiltIn import BuiltIn
-from robot.utils import DotDict
+from robot.utils import DotDict, secs_to_timestr, timestr_to_secs
 
 # NOTE: Avoid importing utils.robot because utils.robot imports state.py
 # (indirectly) which will cause failures.
@@ -103,6 +106,42 @@ default_os_req_states = ["os_ping", "os_login", "os_run_cmd"]
 # or the local epoch time.
 USE_BMC_EPOCH_TIME = int(os.environ.get("USE_BMC_EPOCH_TIME", 0))
 
+# This environment variable directs the get_state function to obtain its
+# independent substates concurrently.  The ping and packet_loss commands are
+# run in the background while the REST/Redfish state is being read and, when
+# USE_BMC_EPOCH_TIME is set, uptime and epoch_seconds are obtained with a
+# single BMC command.
+GET_STATE_CONCURRENT = int(os.environ.get("GET_STATE_CONCURRENT", 0)) or int(
+    BuiltIn().get_variable_value("${GET_STATE_CONCURRENT}", default=0)
+)
+
+# This environment variable directs the wait_state function to re-check the
+# state as soon as the BMC sends a Redfish event rather than only once per
+# interval.  See wait_state for details.
+WAIT_STATE_EVENT_DRIVEN = int(
+    os.environ.get("WAIT_STATE_EVENT_DRIVEN", 0)
+) or int(BuiltIn().get_variable_value("${WAIT_STATE_EVENT_DRIVEN}", default=0))
+
+# The sub states whose changes are reported by BMC events.  wait_state only
+# waits on events when all of the requested sub states are in this list.
+event_driven_req_states = [
+    "rest",
+    "redfish",
+    "chassis",
+    "requested_chassis",
+    "bmc",
+    "requested_bmc",
+    "boot_progress",
+    "operating_system",
+    "host",
+    "requested_host",
+    "attempts_left",
+]
+
+# The get_state function records the number of seconds taken to obtain each
+# group of substates in this dictionary.  See get_state_timing for details.
+state_timing = DotDict()
+
 # Useful state constant definition(s).
 if not redfish_support_trans_state:
     # When a user calls get_state w/o specifying req_states, default_req_states
@@ -572,6 +611,54 @@ def get_os_state(
     return os_state
 
 
+def get_state_timing():
+    r"""
+    Return a dictionary containing the number of seconds taken by the most
+    recent get_state call to obtain each group of substates.
+
+    Example result:
+
+    state_timing:
+      state_timing[ping]:                             0.004233
+      state_timing[packet_loss]:                      4.012811
+      state_timing[uptime]:                           0.391221
+      state_timing[epoch_seconds]:                    0.391221
+      state_timing[redfish]:                          1.200452
+      state_timing[os]:                               0.002871
+      state_timing[total]:                            4.014099
+
+    Substates which were obtained together (e.g. uptime and epoch_seconds
+    when obtained with a single BMC command) show the same value.
+    """
+
+    return state_timing
+
+
+def collect_background_process(sub_proc, start_time, results, sub_state):
+    r"""
+    Wait for the background process to finish and store a (stdout, return
+    code, elapsed seconds) tuple in results[sub_state].
+
+    This is run in a thread for each background process so that each
+    process's elapsed time is measured when that process finishes rather
+    than when its results are collected.
+
+    Description of argument(s):
+    sub_proc                        A Popen object (e.g. as returned by
+                                    shell_cmd with fork=1).
+    start_time                      The time at which the process was started.
+    results                         A dictionary to receive the result.
+    sub_state                       The key for the result (e.g. "ping").
+    """
+
+    out_buf, err_buf = sub_proc.communicate()
+    results[sub_state] = (
+        out_buf,
+        sub_proc.returncode,
+        round(time.time() - start_time, 6),
+    )
+
+
 def get_state(
     openbmc_host="",
     openbmc_username="",
@@ -581,6 +668,7 @@ def get_state(
     os_password="",
     req_states=default_req_states,
     quiet=None,
+    concurrent=None,
 ):
     r"""
     Get component states such as chassis state, bmc state, etc, put them into a
@@ -611,9 +699,19 @@ def get_state(
     quiet             Indicates whether status details (e.g. curl commands)
                       should be written to the console.
                       Defaults to either global value of ${QUIET} or to 1.
+    concurrent        Indicates whether independent substates should be
+                      obtained concurrently.  The resulting state is the same
+                      either way.  Defaults to GET_STATE_CONCURRENT.
     """
 
     quiet = int(gp.get_var_value(quiet, 0))
+    if concurrent is None:
+        concurrent = GET_STATE_CONCURRENT
+    concurrent = int(concurrent)
+
+    global state_timing
+    state_timing = DotDict()
+    get_state_start_time = time.time()
 
     # Set parm defaults where necessary and validate all parms.
     if openbmc_host == "":
@@ -683,32 +781,108 @@ def get_state(
     requested_host = ""
     attempts_left = ""
 
+    ping_cmd_buf = "ping -c 1 -w 2 " + openbmc_host
+    packet_loss_cmd_buf = (
+        "ping -c 5 -w 5 "
+        + openbmc_host
+        + " | egrep 'packet loss' | sed -re 's/.* ([0-9]+)%.*/\\1/g'"
+    )
+
     # Get the component states.
-    if "ping" in req_states:
+    if concurrent:
+        # Start the ping commands in the background.  They will run while the
+        # remaining sub states are obtained and will be collected below.
+        background_procs = DotDict()
+        if "ping" in req_states:
+            background_procs["ping"] = gc.shell_cmd(
+                ping_cmd_buf, print_output=0, show_err=0, fork=1
+            )
+        if "packet_loss" in req_states:
+            background_procs["packet_loss"] = gc.shell_cmd(
+                packet_loss_cmd_buf, print_output=0, show_err=0, fork=1
+            )
+        background_results = {}
+        background_threads = []
+        for sub_state, sub_proc in background_procs.items():
+            thread = threading.Thread(
+                target=collect_background_process,
+                args=(
+                    sub_proc,
+                    get_state_start_time,
+                    background_results,
+                    sub_state,
+                ),
+            )
+            thread.daemon = True
+            thread.start()
+            background_threads.append(thread)
+
+    if "ping" in req_states and not concurrent:
         # See if the OS pings.
+        start_time = time.time()
         rc, out_buf = gc.shell_cmd(
-            "ping -c 1 -w 2 " + openbmc_host,
+            ping_cmd_buf,
             print_output=0,
             show_err=0,
             ignore_err=1,
         )
         if rc == 0:
             ping = 1
+        state_timing["ping"] = round(time.time() - start_time, 6)
 
-    if "packet_loss" in req_states:
+    if "packet_loss" in req_states and not concurrent:
         # See if the OS pings.
-        cmd_buf = (
-            "ping -c 5 -w 5 "
-            + openbmc_host
-            + " | egrep 'packet loss' | sed -re 's/.* ([0-9]+)%.*/\\1/g'"
-        )
+        start_time = time.time()
         rc, out_buf = gc.shell_cmd(
-            cmd_buf, print_output=0, show_err=0, ignore_err=1
+            packet_loss_cmd_buf, print_output=0, show_err=0, ignore_err=1
         )
         if rc == 0:
             packet_loss = out_buf.rstrip("\n")
+        state_timing["packet_loss"] = round(time.time() - start_time, 6)
 
-    if "uptime" in req_states:
+    need_uptime = "uptime" in req_states
+    need_epoch_seconds = (
+        "epoch_seconds" in req_states or "elapsed_boot_time" in req_states
+    )
+    if (
+        concurrent
+        and USE_BMC_EPOCH_TIME
+        and need_uptime
+        and need_epoch_seconds
+    ):
+        # Get uptime and epoch_seconds with a single BMC command.
+        start_time = time.time()
+        remote_cmd_buf = (
+            "bash -c 'read uptime filler 2>/dev/null < /proc/uptime"
+            + ' && [ ! -z "${uptime}" ] && echo ${uptime} && date -u +%s\''
+        )
+        cmd_buf = [
+            "BMC Execute Command",
+            re.sub("\\$", "\\$", remote_cmd_buf),
+            "quiet=1",
+            "test_mode=0",
+            "time_out=5",
+        ]
+        gp.qprint_issuing(cmd_buf, 0)
+        gp.qprint_issuing(remote_cmd_buf, 0)
+        try:
+            stdout, stderr, rc = BuiltIn().wait_until_keyword_succeeds(
+                "10 sec", "5 sec", *cmd_buf
+            )
+            if rc == 0 and stderr == "":
+                out_lines = stdout.split("\n")
+                uptime = out_lines[0]
+                epoch_seconds = out_lines[1].rstrip("\n")
+        except AssertionError as my_assertion_error:
+            pass
+        except IndexError:
+            pass
+        state_timing["uptime"] = state_timing["epoch_seconds"] = round(
+            time.time() - start_time, 6
+        )
+        need_uptime = need_epoch_seconds = False
+
+    if need_uptime:
         # Sometimes reading uptime results in a blank value. Call with
         # wait_until_keyword_succeeds to ensure a non-blank value is obtained.
         remote_cmd_buf = (
@@ -722,6 +896,7 @@ def get_state(
             "test_mode=0",
             "time_out=5",
         ]
+        start_time = time.time()
         gp.qprint_issuing(cmd_buf, 0)
         gp.qprint_issuing(remote_cmd_buf, 0)
         try:
@@ -732,8 +907,10 @@ def get_state(
                 uptime = stdout
         except AssertionError as my_assertion_error:
             pass
+        state_timing["uptime"] = round(time.time() - start_time, 6)
 
-    if "epoch_seconds" in req_states or "elapsed_boot_time" in req_states:
+    if need_epoch_seconds:
+        start_time = time.time()
         date_cmd_buf = "date -u +%s"
         if USE_BMC_EPOCH_TIME:
             cmd_buf = ["BMC Execute Command", date_cmd_buf, "quiet=${1}"]
@@ -752,6 +929,7 @@ def get_state(
             )
             if shell_rc == 0:
                 epoch_seconds = out_buf.rstrip("\n")
+        state_timing["epoch_seconds"] = round(time.time() - start_time, 6)
 
     if "elapsed_boot_time" in req_states:
         global start_boot_seconds
@@ -777,6 +955,7 @@ def get_state(
         need_rest = len(req_rest) > 0
         state = DotDict()
         if need_rest:
+            start_time = time.time()
             cmd_buf = [
                 "Read Properties",
                 SYSTEM_STATE_URI + "enumerate",
@@ -829,6 +1008,7 @@ def get_state(
                             state[new_attr_name] = ret_values[url_path][
                                 attr_name
                             ]
+            state_timing["rest"] = round(time.time() - start_time, 6)
     else:
         master_req_rf = [
             "redfish",
@@ -846,6 +1026,7 @@ def get_state(
         need_rf = len(req_rf) > 0
         state = DotDict()
         if need_rf:
+            start_time = time.time()
             cmd_buf = ["Redfish Get States"]
             gp.dprint_issuing(cmd_buf)
             try:
@@ -871,6 +1052,22 @@ def get_state(
                 state["bmc"] = ret_values["bmc"]
                 if platform_arch_type != "x86":
                     state["boot_progress"] = ret_values["boot_progress"]
+            state_timing["redfish"] = round(time.time() - start_time, 6)
+
+    if concurrent:
+        # Collect the results of the background ping commands.
+        for thread in background_threads:
+            thread.join()
+        for sub_state, (out_buf, rc, elapsed) in background_results.items():
+            # The background commands were started before anything else so
+            # their elapsed time is measured from the start of this function.
+            state_timing[sub_state] = elapsed
+            if rc != 0:
+                continue
+            if sub_state == "ping":
+                ping = 1
+            else:
+                packet_loss = out_buf.rstrip("\n")
 
     for sub_state in req_states:
         if sub_state in state:
@@ -884,6 +1081,7 @@ def get_state(
     if os_host == "":
         # The caller has not specified an os_host so as far as we're concerned,
         # it doesn't exist.
+        state_timing["total"] = round(time.time() - get_state_start_time, 6)
         return state
 
     os_req_states = [
@@ -902,6 +1100,7 @@ def get_state(
             if sub_state in req_states:
                 os_up_match[sub_state] = master_os_up_match[sub_state]
         os_up = compare_states(state, os_up_match)
+        start_time = time.time()
         os_state = get_os_state(
             os_host=os_host,
             os_username=os_username,
@@ -912,6 +1111,9 @@ def get_state(
         )
         # Append os_state dictionary to ours.
         state.update(os_state)
+        state_timing["os"] = round(time.time() - start_time, 6)
+
+    state_timing["total"] = round(time.time() - get_state_start_time, 6)
 
     return state
 
@@ -1047,6 +1249,8 @@ def wait_state(
     os_username="",
     os_password="",
     quiet=None,
+    event_driven=None,
+    max_event_interval="10 seconds",
 ):
     r"""
     Wait for the Open BMC machine's composite state to match the specified
@@ -1084,15 +1288,39 @@ def wait_state(
     quiet             Indicates whether status details should be written to the
                       console.  Defaults to either global value of ${QUIET} or
                       to 1.
+    event_driven      Indicates whether the state should be re-checked when
+                      the BMC sends a Redfish EventService event rather than
+                      every interval.  This only applies when every sub state
+                      in match_state is reported by BMC events (see
+                      event_driven_req_states).  While the event stream is
+                      down, the state is checked every interval.  Defaults to
+                      WAIT_STATE_EVENT_DRIVEN.
+    max_event_interval
+                      The maximum amount of time between state checks while
+                      waiting for events.  This guards against missed events.
+                      This value may be expressed in Robot Framework's time
+                      format (e.g. 1 minute, 2 min 3 s, 4.5).
     """
 
     quiet = int(gp.get_var_value(quiet, 0))
+    if event_driven is None:
+        event_driven = WAIT_STATE_EVENT_DRIVEN
+    event_driven = int(event_driven)
 
     try:
         match_state = return_state_constant(match_state)
     except TypeError:
         pass
 
+    req_states = [
+        sub_state
+        for sub_state in match_state.keys()
+        if sub_state != expressions_key()
+    ]
+    event_driven = event_driven and all(
+        sub_state in event_driven_req_states for sub_state in req_states
+    )
+
     if not quiet:
         if invert:
             alt_text = "cease to "
@@ -1134,9 +1362,20 @@ def wait_state(
     ]
     gp.dprint_issuing(cmd_buf)
     try:
-        state = BuiltIn().wait_until_keyword_succeeds(
-            wait_time, interval, *cmd_buf
-        )
+        if event_driven:
+            state = wait_state_on_events(
+                cmd_buf,
+                wait_time,
+                interval,
+                max_event_interval,
+                openbmc_host=openbmc_host,
+                openbmc_username=openbmc_username,
+                openbmc_password=openbmc_password,
+            )
+        else:
+            state = BuiltIn().wait_until_keyword_succeeds(
+                wait_time, interval, *cmd_buf
+            )
     except AssertionError as my_assertion_error:
         gp.printn()
         message = my_assertion_error.args[0]
@@ -1161,6 +1400,80 @@ def wait_state(
     return state
 
 
+def wait_state_on_events(
+    cmd_buf,
+    wait_time,
+    interval,
+    max_event_interval,
+    openbmc_host="",
+    openbmc_username="",
+    openbmc_password="",
+):
+    r"""
+    Run the keyword in cmd_buf each time the BMC sends a Redfish event until it
+    succeeds and return its result.
+
+    This is the event-driven counterpart of Robot's Wait Until Keyword
+    Succeeds.  It raises an AssertionError with the same message if the keyword
+    does not succeed within wait_time.
+
+    Description of argument(s):
+    cmd_buf             The keyword and its arguments (e.g. ["Check State",
+                        match_state, ...]).
+    wait_time           The total amount of time to wait.  See wait_state for
+                        details.
+    interval            The amount of time between keyword runs while the
+                        event stream is down.
+    max_event_interval  The maximum amount of time between keyword runs while
+                        the event stream is up.
+    openbmc_host        The DNS name or IP address of the BMC.
+                        This defaults to global ${OPENBMC_HOST}.
+    openbmc_username    The username to be used to login to the BMC.
+                        This defaults to global ${OPENBMC_USERNAME}.
+    openbmc_password    The password to be used to login to the BMC.
+                        This defaults to global ${OPENBMC_PASSWORD}.
+    """
+
+    wait_secs = timestr_to_secs(wait_time)
+    interval_secs = timestr_to_secs(interval)
+    max_event_interval_secs = timestr_to_secs(max_event_interval)
+
+    event_stream = redfish_event_stream(
+        openbmc_host or BuiltIn().get_variable_value("${OPENBMC_HOST}"),
+        openbmc_username
+        or BuiltIn().get_variable_value("${OPENBMC_USERNAME}"),
+        openbmc_password
+        or BuiltIn().get_variable_value("${OPENBMC_PASSWORD}"),
+        https_port=BuiltIn().get_variable_value("${HTTPS_PORT}") or 443,
+    )
+    event_stream.start()
+    end_time = time.time() + wait_secs
+    try:
+        while True:
+            status, ret_values = BuiltIn().run_keyword_and_ignore_error(
+                *cmd_buf
+            )
+            if status == "PASS":
+                return ret_values
+            remaining_secs = end_time - time.time()
+            if remaining_secs <= 0:
+                message = (
+                    "Keyword '" + cmd_buf[0] + "' failed after retrying for "
+                )
+                message += (
+                    secs_to_timestr(wait_secs) + ". The last error was: "
+                )
+                message += str(ret_values)
+                raise AssertionError(message)
+            if event_stream.connected:
+                timeout = max_event_interval_secs
+            else:
+                timeout = interval_secs
+            event_stream.wait_for_event(min(timeout, remaining_secs))
+    finally:
+        event_stream.stop()
+
+
 def set_start_boot_seconds(value=0):
     global start_boot_seconds
     start_boot_seconds = int(value)
@@ -167,7 +167,7 @@ class tally_sheet:
 
         self.__table[row_key][field_key] = value
 
-    def inc_row_field(self, row_key, field_key):
+    def inc_row_field(self, row_key, field_key, value=1):
         r"""
         Increment the value of the specified field in the specified row.
         The value of the field must be numeric.
@@ -177,9 +177,11 @@ class tally_sheet:
                                 be updated.
         field_key               The key that identifies which field in the row
                                 that is to be updated.
+        value                   The amount by which the field is to be
+                                incremented.
         """
 
-        self.__table[row_key][field_key] += 1
+        self.__table[row_key][field_key] += value
 
     def dec_row_field(self, row_key, field_key):
         r"""
@@ -235,18 +235,14 @@ def parse_key_value(string, delim=":", strip=" ", to_lower=1, underscores=1):
     underscores                     Change any blanks found in the key name to underscores.
     """
 
-    pair = string.split(delim)
-
-    key = pair[0].strip(strip)
-    if len(pair) == 0:
-        value = ""
-    else:
-        value = delim.join(pair[1:]).strip(strip)
+    key, delim, value = string.partition(delim)
+    key = key.strip(strip)
+    value = value.strip(strip)
 
     if to_lower:
         key = key.lower()
     if underscores:
-        key = re.sub(r" ", "_", key)
+        key = key.replace(" ", "_")
 
     return key, value
 
@@ -570,6 +566,71 @@ def create_field_desc_regex(line):
     return field_desc_regex
 
 
+# Compiled field descriptor regexes keyed by field descriptor line.  See get_field_desc_regex.
+field_desc_regex_cache = {}
+
+
+def get_field_desc_regex(line):
+    r"""
+    Return the compiled form of the regular expression that create_field_desc_regex returns for the line.
+
+    The result is cached so that repeated parsing of reports with the same layout (e.g. when polling) does
+    not rebuild and recompile the regular expression.
+
+    Description of argument(s):
+    line                            A line consisting of dashes to represent fields and spaces to delimit
+                                    fields.
+    """
+
+    field_desc_regex = field_desc_regex_cache.get(line)
+    if field_desc_regex is None:
+        if len(field_desc_regex_cache) >= 256:
+            field_desc_regex_cache.clear()
+        field_desc_regex = re.compile(create_field_desc_regex(line))
+        field_desc_regex_cache[line] = field_desc_regex
+    return field_desc_regex
+
+
+def parse_report(report_list, to_lower=1, field_delim=None):
+    r"""
+    Parse a list containing report text lines and return a tuple consisting of the list of column names and
+    a list containing a list of field values for each data line.
+
+    This is the parser used by list_to_report and list_to_columns.  See list_to_report for a description of
+    the report format and of the arguments.  Note that, like list_to_report, this function removes any field
+    descriptor line from report_list.
+    """
+
+    if len(report_list) <= 1:
+        return [], []
+
+    if field_delim is not None:
+        report_list = [line.replace("|", "") for line in report_list]
+
+    header_line = report_list[0]
+    if to_lower:
+        header_line = header_line.lower()
+
+    if not re.match(r"^-[ -]*$", report_list[1]):
+        columns = header_line.split()
+        return columns, [line.split() for line in report_list[1:]]
+
+    # We have a field descriptor line (see example 2 in the list_to_report prolog).
+    field_desc_regex = get_field_desc_regex(report_list[1])
+    pad_format_string = "%-" + str(len(report_list[1])) + "s"
+    # The field descriptor line has served its purpose.  Deleting it.
+    del report_list[1]
+
+    rows = []
+    for line in [header_line] + report_list[1:]:
+        # Pad the line with spaces on the right to facilitate processing with field_desc_regex.
+        match = field_desc_regex.search(pad_format_string % line)
+        if match is None:
+            raise IndexError("list index out of range")
+        rows.append([field.strip() for field in match.groups()])
+    return rows[0], rows[1:]
+
+
 def list_to_report(report_list, to_lower=1, field_delim=None):
     r"""
     Convert a list containing report text lines to a report "object" and return it.
@@ -634,42 +695,10 @@ def list_to_report(report_list, to_lower=1, field_delim=None):
         # If we don't have at least a descriptor line and one line of data, return an empty array.
         return []
 
-    if field_delim is not None:
-        report_list = [re.sub("\\|", "", line) for line in report_list]
-
-    header_line = report_list[0]
-    if to_lower:
-        header_line = header_line.lower()
-
-    field_desc_regex = ""
-    if re.match(r"^-[ -]*$", report_list[1]):
-        # We have a field descriptor line (as shown in example 2 above).
-        field_desc_regex = create_field_desc_regex(report_list[1])
-        field_desc_len = len(report_list[1])
-        pad_format_string = "%-" + str(field_desc_len) + "s"
-        # The field descriptor line has served its purpose.  Deleting it.
-        del report_list[1]
-
-    # Process the header line by creating a list of column names.
-    if field_desc_regex == "":
-        columns = header_line.split()
-    else:
-        # Pad the line with spaces on the right to facilitate processing with field_desc_regex.
-        header_line = pad_format_string % header_line
-        columns = list(
-            map(str.strip, re.findall(field_desc_regex, header_line)[0])
-        )
+    columns, rows = parse_report(report_list, to_lower, field_delim)
 
     report_obj = []
-    for report_line in report_list[1:]:
-        if field_desc_regex == "":
-            line = report_line.split()
-        else:
-            # Pad the line with spaces on the right to facilitate processing with field_desc_regex.
-            report_line = pad_format_string % report_line
-            line = list(
-                map(str.strip, re.findall(field_desc_regex, report_line)[0])
-            )
+    for line in rows:
         try:
             line_dict = collections.OrderedDict(zip(columns, line))
         except AttributeError:
@@ -679,6 +708,43 @@ def list_to_report(report_list, to_lower=1, field_delim=None):
     return report_obj
 
 
+def list_to_columns(report_list, to_lower=1, field_delim=None):
+    r"""
+    Convert a list containing report text lines to a column-oriented report and return it.
+
+    The result is a dictionary whose keys are the column names and whose values are lists of the column's
+    field values (one per data line).  For large reports (e.g. thousands of sensor lines) this is faster to
+    build and to search than the list of dictionaries returned by list_to_report.  A data line with fewer
+    fields than there are columns gets "" for each missing field.
+
+    Example:
+    Given the report_list shown in the list_to_report prolog, this function will return:
+
+    df_columns:
+      [filesystem]:
+        [0]:                           dev
+        [1]:                           tmpfs
+      [1k-blocks]:
+        [0]:                           247120
+        [1]:                           248408
+      ...
+
+    Description of argument(s):
+    report_list                     See list_to_report prolog for details.
+    to_lower                        See list_to_report prolog for details.
+    field_delim                     See list_to_report prolog for details.
+    """
+
+    columns, rows = parse_report(report_list, to_lower, field_delim)
+    result = collections.OrderedDict()
+    for column_ix, column in enumerate(columns):
+        result[column] = [
+            line[column_ix] if column_ix < len(line) else "" for line in rows
+        ]
+
+    return result
+
+
 def outbuf_to_report(out_buf, **args):
     r"""
     Convert a text buffer containing report lines to a report "object" and return it.
@@ -726,6 +792,23 @@ def outbuf_to_report(out_buf, **args):
     return list_to_report(report_list, **args)
 
 
+def outbuf_to_columns(out_buf, **args):
+    r"""
+    Convert a text buffer containing report lines to a column-oriented report and return it.
+
+    Refer to list_to_columns and list_to_report (above) for more details.
+
+    Description of argument(s):
+    out_buf                         A text report.  The first line must be a header line which contains
+                                    column names.  Column names may not contain spaces.
+    **args                          Arguments to be interpreted by list_to_columns.  (See docstring of
+                                    list_to_columns function for details).
+    """
+
+    report_list = list(filter(None, out_buf.split("\n")))
+    return list_to_columns(report_list, **args)
+
+
 def nested_get(key_name, structure):
     r"""
     Return a list of all values from the nested structure that have the given key name.